@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+# * Request signing cost: a new `CytomineAuth` with a fresh HMAC and a formatted
+# * Date header for every request (previous implementation) versus the signer
+# * and the Date header cached by the client.
+# *
+# * Also reports the number of GET requests per second sent to a local stand-in
+# * server, where the signing cost is part of the per-request client overhead.
+# *
+# * Usage: python benchmarks/bench_auth.py [--signatures 100000] [--requests 2000]
+
+import base64
+import hashlib
+import hmac
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import gmtime, strftime
+from typing import Any, Callable, Dict, Optional, Type
+
+import requests  # type: ignore
+
+from cytomine.cytomine import Cytomine, CytomineAuth
+
+URL = "http://localhost/api/annotation/1/crop.png?maxSize=256&increaseArea=1.2"
+
+
+class LegacyAuth(CytomineAuth):
+    def authorization(self, method: str, content_type: str, date: str, url: str) -> str:
+        token = (
+            f"{method}\n\n{content_type}\n{date}\n"
+            f"{self.base_path}{url.replace(self.base_url, '')}"
+        )
+        signature = base64.b64encode(
+            hmac.new(
+                bytes(self.private_key, "utf-8"),
+                token.encode("utf-8"),
+                hashlib.sha1,
+            ).digest()
+        )
+        return f"CYTOMINE {self.public_key}:{signature.decode('utf-8')}"
+
+
+def legacy_signature() -> str:
+    auth = LegacyAuth("public", "private", "http://localhost/api/", "/api/")
+    date = strftime("%a, %d %b %Y %H:%M:%S +0000", gmtime())
+    return auth.authorization("GET", "application/json", date, URL)
+
+
+def shared_signature(auth: CytomineAuth) -> Callable[[], str]:
+    def sign() -> str:
+        date = Cytomine._headers()["date"]  # pylint: disable=protected-access
+        return auth.authorization("GET", "application/json", date, URL)
+
+    return sign
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1  # send headers and body at once
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        body = b'{"id": 1}' if self.path.startswith("/api/") else b""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        pass
+
+
+def throughput(fn: Callable[[], Any], n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - start)
+
+
+class LegacyCytomine(Cytomine):
+    """Client signing each request with a new `CytomineAuth` and formatted Date."""
+
+    def _get(
+        self,
+        uri: str,
+        query_parameters: Optional[Dict[str, Any]],
+        with_base_path: bool = True,
+        retry: bool = True,
+    ) -> requests.Response:
+        return self._session.get(
+            f"{self._base_url(with_base_path)}{uri}",
+            allow_redirects=False,
+            auth=LegacyAuth(
+                self._public_key,
+                self._private_key,
+                self._base_url(),
+                self._base_path,
+            ),
+            headers={
+                "accept": "application/json, */*",
+                "date": strftime("%a, %d %b %Y %H:%M:%S +0000", gmtime()),
+                "X-Requested-With": "XMLHTTPRequest",
+            },
+            params=query_parameters,
+        )
+
+
+def requests_per_second(client_class: Type[Cytomine], host: str, n: int) -> float:
+    with client_class(host, "public", "private", use_cache=False, configure_logging=False) as c:
+        c.logger.disabled = True
+        return throughput(lambda: c.get("user/1.json", {"max": 10}), n)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(prog="request signing benchmark")
+    parser.add_argument("--signatures", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=2000)
+    params, _ = parser.parse_known_args(sys.argv[1:])
+
+    shared = shared_signature(
+        CytomineAuth("public", "private", "http://localhost/api/", "/api/")
+    )
+    print(f"signatures/s  previous: {throughput(legacy_signature, params.signatures):10.0f}")
+    print(f"signatures/s  shared  : {throughput(shared, params.signatures):10.0f}")
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    stand_in = f"http://127.0.0.1:{httpd.server_address[1]}"
+    previous = requests_per_second(LegacyCytomine, stand_in, params.requests)
+    current = requests_per_second(Cytomine, stand_in, params.requests)
+    httpd.shutdown()
+    print(f"requests/s    previous: {previous:10.0f}")
+    print(f"requests/s    shared  : {current:10.0f}")
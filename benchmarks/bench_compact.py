@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+# * Memory used by an AnnotationCollection populated with regular models
+# * and with compact models (`compact=True`), and the same annotations as
+# * NumPy columns (`ColumnBuilder`, used by `Collection.fetch_columnar`).
+# *
+# * Usage: python benchmarks/bench_compact.py [--items 200000]
+
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from typing import Any, Dict, List
+
+from cytomine.models import AnnotationCollection
+from cytomine.models._utilities.columns import ColumnBuilder
+
+
+def annotations(n: int) -> Dict[str, Any]:
+    collection: List[Dict[str, Any]] = [
+        {
+            "id": i,
+            "class": "be.cytomine.domain.ontology.UserAnnotation",
+            "created": "1700000000000",
+            "updated": None,
+            "deleted": None,
+            "image": 1000 + i % 50,
+            "slice": 2000 + i % 50,
+            "project": 42,
+            "user": 7,
+            "term": [i % 5],
+            "area": 1250.5,
+            "perimeter": 141.4,
+            "location": f"POLYGON (({i} 0, {i} 10, {i + 10} 10, {i + 10} 0, {i} 0))",
+            "cropURL": f"/api/userannotation/{i}/crop.png",
+        }
+        for i in range(n)
+    ]
+    return {"collection": collection, "size": n}
+
+
+def measure(response: Dict[str, Any], mode: str) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "columns":
+        columns = ColumnBuilder()
+        columns.extend(response["collection"])
+        result: Any = columns.to_numpy()
+        del columns
+    else:
+        result = AnnotationCollection()
+        result._compact = mode == "compact"  # pylint: disable=protected-access
+        result.populate(response)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    label = mode
+    print(f"{label:8}: {size / 2 ** 20:8.1f} MiB, {elapsed:6.2f} s")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(prog="compact models memory benchmark")
+    parser.add_argument("--items", type=int, default=200000)
+    params, _ = parser.parse_known_args(sys.argv[1:])
+
+    data = annotations(params.items)
+    print(f"{params.items} annotations")
+    measure(data, "models")
+    measure(data, "compact")
+    measure(data, "columns")
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# * Download time of a large file from a local stand-in server that supports HTTP
+# * range requests and caps the throughput of each connection (like a remote server
+# * behind a per-connection bandwidth limit), with 1 to N parallel ranged requests.
+# *
+# * Usage: python benchmarks/bench_download.py [--size-mib 64] [--mib-per-second 32]
+# *                                            [--part-size-mib 8] [--workers 1 4 8]
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Tuple
+
+from cytomine.cytomine import Cytomine
+
+SEND_SIZE = 2**18
+
+
+def range_handler(content: bytes, bytes_per_second: float) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            if not self.path.startswith("/file"):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", "9")
+                self.end_headers()
+                self.wfile.write(b'{"id": 1}')
+                return
+
+            first, end = self._requested_range()
+            if self.headers.get("Range"):
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {first}-{end - 1}/{len(content)}")
+            else:
+                self.send_response(200)
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(end - first))
+            self.end_headers()
+
+            began = time.perf_counter()
+            for offset in range(first, end, SEND_SIZE):
+                self.wfile.write(content[offset : min(offset + SEND_SIZE, end)])
+                ahead = (offset + SEND_SIZE - first) / bytes_per_second
+                time.sleep(max(0.0, began + ahead - time.perf_counter()))
+
+        def _requested_range(self) -> Tuple[int, int]:
+            requested = self.headers.get("Range")
+            if not requested:
+                return 0, len(content)
+            first, last = requested.split("=", 1)[1].split("-")
+            return int(first), min(int(last or len(content) - 1), len(content) - 1) + 1
+
+        def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(prog="ranged download benchmark")
+    parser.add_argument("--size-mib", type=int, default=64)
+    parser.add_argument("--mib-per-second", type=float, default=32)
+    parser.add_argument("--part-size-mib", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    params, _ = parser.parse_known_args(sys.argv[1:])
+
+    data = os.urandom(params.size_mib * 2**20)
+    checksum = f"sha256:{hashlib.sha256(data).hexdigest()}"
+    httpd = ThreadingHTTPServer(
+        ("127.0.0.1", 0),
+        range_handler(data, params.mib_per_second * 2**20),
+    )
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    stand_in = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    directory = tempfile.mkdtemp()
+    try:
+        with Cytomine(
+            stand_in,
+            "public",
+            "private",
+            use_cache=False,
+            configure_logging=False,
+        ) as client:
+            client.logger.disabled = True
+            for n_workers in params.workers:
+                destination = os.path.join(directory, f"file-{n_workers}")
+                start = time.perf_counter()
+                assert client.download_file(
+                    f"{stand_in}/file/download",
+                    destination,
+                    n_workers=n_workers,
+                    part_size=params.part_size_mib * 2**20,
+                    checksum=checksum,
+                )
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{n_workers} worker(s): {elapsed:6.2f} s "
+                    f"({params.size_mib / elapsed:7.1f} MiB/s)"
+                )
+    finally:
+        httpd.shutdown()
+        shutil.rmtree(directory)
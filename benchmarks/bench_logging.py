@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+# * Per-response logging cost of the client with DEBUG disabled: response dump and
+# * messages formatted for every response (previous implementation) versus
+# * formatting guarded by the enabled levels, for a large collection response.
+# *
+# * Usage: python benchmarks/bench_logging.py [--items 20000] [--calls 200]
+
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable
+
+import requests  # type: ignore
+from requests_toolbelt.utils import dump
+
+from cytomine.cytomine import Cytomine, read_response_message
+
+
+def legacy_log_response(logger: logging.Logger, response: requests.Response, message: Any) -> None:
+    msg = f"[{response.request.method}] {message} | {response.status_code} {response.reason}"
+    if response.status_code == requests.codes.ok:
+        logger.log(logging.INFO, msg)
+    else:
+        logger.log(
+            logging.ERROR,
+            f"{msg} ({read_response_message(response, key='errors')})",
+        )
+    logger.debug("DUMP:\n%s", dump.dump_all(response).decode("utf-8"))
+
+
+def collection_response(n: int) -> requests.Response:
+    body = json.dumps(
+        {"collection": [{"id": i, "name": f"annotation {i}"} for i in range(n)], "size": n}
+    ).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+            pass
+
+    httpd = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.handle_request)
+    thread.start()
+    response = requests.get(
+        f"http://127.0.0.1:{httpd.server_address[1]}/api/annotation.json",
+        timeout=10,
+    )
+    thread.join()
+    httpd.server_close()
+    return response
+
+
+class _Client(Cytomine):
+    def __init__(self, logger: logging.Logger) -> None:  # pylint: disable=super-init-not-called
+        self._logger = logger
+
+
+def measure(fn: Callable[[], Any], calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(prog="response logging benchmark")
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--calls", type=int, default=200)
+    params, _ = parser.parse_known_args(sys.argv[1:])
+
+    collection = collection_response(params.items)
+    for level in (logging.WARNING, logging.INFO):
+        log = logging.getLogger("bench")
+        log.setLevel(level)
+        log.addHandler(logging.NullHandler())
+        log.propagate = False
+        client = _Client(log)
+
+        previous = measure(
+            functools.partial(legacy_log_response, log, collection, "annotation.json"),
+            params.calls,
+        )
+        current = measure(
+            functools.partial(
+                client._log_response,  # pylint: disable=protected-access
+                collection,
+                "annotation.json",
+            ),
+            params.calls,
+        )
+        print(
+            f"{logging.getLevelName(level):7} "
+            f"{len(collection.content) / 2 ** 20:.1f} MiB response: "
+            f"previous {previous * 1e6:9.1f} us, lazy {current * 1e6:9.1f} us"
+        )
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+# * Per-call overhead of `generic_parallel` on small batches: threads spawned and
+# * joined at every call (previous implementation) versus the client shared pool.
+# *
+# * Also reports the peak memory used to process a large generator with
+# * `generic_parallel` (all results kept) and `generic_parallel_stream` (flat memory).
+# *
+# * Usage: python benchmarks/bench_parallel.py [--calls 2000] [--batch 8] [--cpus N]
+# *                                            [--items 200000]
+# * `--cpus` sets the number of threads spawned per call by the previous implementation
+# * (it used to be the number of CPUs of the machine).
+
+import queue
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import cpu_count
+from threading import Thread
+from typing import Any, Callable, Iterator, List
+
+from cytomine.models._utilities import parallel
+
+
+def legacy_generic_parallel(
+    data: List[Any],
+    worker_fn: Callable[[Any], Any],
+    n_workers: int,
+) -> List[Any]:
+    def worker(_in: Any, _out: Any) -> None:
+        while True:
+            item = _in.get()
+            if item is None:
+                break
+            _out.put((item, worker_fn(item)))
+
+    in_queue: queue.Queue = queue.Queue()
+    out_queue: queue.Queue = queue.Queue()
+    threads = [Thread(target=worker, args=[in_queue, out_queue]) for _ in range(n_workers)]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    for item in data:
+        in_queue.put(item)
+    for _ in range(n_workers):
+        in_queue.put(None)
+    for t in threads:
+        t.join()
+    results = []
+    while not out_queue.empty():
+        results.append(out_queue.get_nowait())
+    return results
+
+
+class _Client:
+    max_workers = min(32, cpu_count() + 4)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+
+def measure(fn: Callable[[], Any], calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def peak_memory(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def payloads(n: int) -> Iterator[bytes]:
+    return (bytes(256) for _ in range(n))
+
+
+def consume(stream: Iterator[Any]) -> None:
+    for _ in stream:
+        pass
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(prog="generic_parallel overhead benchmark")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--cpus", type=int, default=cpu_count())
+    parser.add_argument("--items", type=int, default=200000)
+    params, _ = parser.parse_known_args(sys.argv[1:])
+
+    batch = list(range(params.batch))
+    parallel._get_client = lambda: _Client  # type: ignore  # pylint: disable=protected-access
+
+    before = measure(lambda: legacy_generic_parallel(batch, abs, params.cpus), params.calls)
+    after = measure(lambda: parallel.generic_parallel(batch, abs), params.calls)
+    batch_peak = peak_memory(
+        lambda: parallel.generic_parallel(payloads(params.items), len)
+    )
+    stream_peak = peak_memory(
+        lambda: consume(parallel.generic_parallel_stream(payloads(params.items), len))
+    )
+    _Client.executor.shutdown()
+
+    print(f"batch of {params.batch} items, {params.calls} calls, {params.cpus} cpus")
+    print(f"threads per call : {before * 1e6:9.1f} us/call")
+    print(f"shared pool      : {after * 1e6:9.1f} us/call ({before / after:.1f}x)")
+    print(f"{params.items} items of 256 bytes")
+    print(f"generic_parallel        : peak {batch_peak / 2 ** 20:8.1f} MiB")
+    print(f"generic_parallel_stream : peak {stream_peak / 2 ** 20:8.1f} MiB")
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+# * Throughput of image windows (tiles) fetched in parallel from a stand-in server
+# * running in another process: downloaded to files then read back (or decoded
+# * from them), versus kept in memory with `ImageInstance.window_content()`.
+# *
+# * Usage: python benchmarks/bench_tiles.py [--tiles 2000] [--tile-size 512]
+# *                                         [--workers 8] [--decode]
+
+# pylint: disable=unused-argument
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Any, Callable, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from cytomine.cytomine import Cytomine
+from cytomine.models import ImageInstance
+from cytomine.models._utilities import generic_parallel_stream
+from cytomine.models._utilities.imaging import decode_image
+
+
+def handler(tile: bytes) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            body = tile if "/window-" in self.path else b'{"id": 1}'
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+            pass
+
+    return Handler
+
+
+def serve(tile: bytes, port: "multiprocessing.Queue[int]") -> None:
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler(tile))
+    port.put(httpd.server_address[1])
+    httpd.serve_forever()
+
+
+def jpeg_tile(size: int) -> bytes:
+    buffer = BytesIO()
+    Image.frombytes("RGB", (size, size), os.urandom(size * size * 3)).save(
+        buffer, format="JPEG", quality=90
+    )
+    return buffer.getvalue()
+
+
+def measure(
+    name: str,
+    regions: List[Tuple[int, int, int, int]],
+    fetch: Callable[[Tuple[int, int, int, int]], Any],
+    n_workers: int,
+    tile_bytes: int,
+) -> None:
+    start = time.perf_counter()
+    for _, result in generic_parallel_stream(regions, fetch, n_workers, ordered=True):
+        assert result is not None
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:8} {len(regions) / elapsed:8.1f} tiles/s "
+        f"{len(regions) * tile_bytes / elapsed / 2 ** 20:8.1f} MiB/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(prog="tile benchmark")
+    parser.add_argument("--tiles", type=int, default=2000)
+    parser.add_argument("--tile-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--decode", action="store_true")
+    params, _ = parser.parse_known_args(sys.argv[1:])
+
+    content = jpeg_tile(params.tile_size)
+    queue: "multiprocessing.Queue[int]" = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(content, queue), daemon=True)
+    server.start()
+    stand_in = f"http://127.0.0.1:{queue.get()}"
+
+    side = params.tile_size
+    positions = [(i * side, 0, side, side) for i in range(params.tiles)]
+    image = ImageInstance(id=1)
+    directory = tempfile.mkdtemp()
+
+    def from_disk(region: Tuple[int, int, int, int]) -> Any:
+        path = os.path.join(directory, f"{region[0]}.jpg")
+        if not image.window(*region, dest_pattern=path):
+            return None
+        if params.decode:
+            with Image.open(path) as tile:
+                return np.asarray(tile)
+        with open(path, "rb") as f:
+            return f.read()
+
+    def in_memory(region: Tuple[int, int, int, int]) -> Any:
+        data = image.window_content(*region)
+        return decode_image(data) if params.decode and data is not None else data
+
+    try:
+        with Cytomine(
+            stand_in,
+            "public",
+            "private",
+            use_cache=False,
+            configure_logging=False,
+        ) as client:
+            client.logger.disabled = True
+            print(f"{params.tiles} tiles of {len(content) / 2 ** 10:.0f} KiB, "
+                  f"{params.workers} workers, decode={params.decode}")
+            measure("disk", positions, from_disk, params.workers, len(content))
+            measure("memory", positions, in_memory, params.workers, len(content))
+    finally:
+        server.terminate()
+        shutil.rmtree(directory)
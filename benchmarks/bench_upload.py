@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# * Upload throughput and client CPU time per GiB of a large local file sent as a
+# * multipart body to a stand-in server running in another process: the
+# * `MultipartEncoder` of requests-toolbelt reading the open file (previous
+# * implementation) versus `MultipartFileStream` with memory-mapped or aligned reads.
+# *
+# * Usage: python benchmarks/bench_upload.py [--size-gib 2] [--directory /tmp]
+# *                                          [--buffer-mib 1] [--repeat 3]
+
+# pylint: disable=unused-argument
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, BinaryIO, Callable, Tuple
+
+import requests  # type: ignore
+from requests_toolbelt import MultipartEncoder
+
+from cytomine.multipart import MultipartFileStream
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        remaining = int(self.headers["Content-Length"])
+        view = memoryview(bytearray(2**20))
+        while remaining > 0:
+            n = self.rfile.readinto(view[: min(remaining, len(view))])  # type: ignore
+            if not n:
+                break
+            remaining -= n
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"[]")
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        pass
+
+
+def serve(port: "multiprocessing.Queue[int]") -> None:
+    httpd = HTTPServer(("127.0.0.1", 0), Handler)
+    port.put(httpd.server_address[1])
+    httpd.serve_forever()
+
+
+Body = Callable[[str, BinaryIO, int], Tuple[Any, str]]
+
+
+def legacy_body(path: str, file: BinaryIO, buffer_size: int) -> Tuple[Any, str]:
+    encoder = MultipartEncoder(fields={"files[]": (os.path.basename(path), file)})
+    return encoder, encoder.content_type
+
+
+def stream_body(use_mmap: bool) -> Body:
+    def body(path: str, file: BinaryIO, buffer_size: int) -> Tuple[Any, str]:
+        stream = MultipartFileStream("files[]", path, buffer_size=buffer_size, use_mmap=use_mmap)
+        return stream, stream.content_type
+
+    return body
+
+
+def measure(
+    session: requests.Session,
+    url: str,
+    path: str,
+    body: Body,
+    buffer_size: int,
+) -> Tuple[float, float]:
+    with open(path, "rb") as file:
+        data, content_type = body(path, file, buffer_size)
+        wall, cpu = time.perf_counter(), time.process_time()
+        response = session.post(url, data=data, headers={"Content-Type": content_type})
+        response.raise_for_status()
+        return time.perf_counter() - wall, time.process_time() - cpu
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(prog="upload benchmark")
+    parser.add_argument("--size-gib", type=float, default=2)
+    parser.add_argument("--directory", default=tempfile.gettempdir())
+    parser.add_argument("--buffer-mib", type=float, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    params, _ = parser.parse_known_args(sys.argv[1:])
+
+    size = int(params.size_gib * 2**30)
+    fd, filename = tempfile.mkstemp(dir=params.directory)
+    with os.fdopen(fd, "wb") as f:
+        block = os.urandom(2**24)
+        for offset in range(0, size, len(block)):
+            f.write(block[: size - offset])
+
+    queue: "multiprocessing.Queue[int]" = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(queue,), daemon=True)
+    server.start()
+    stand_in = f"http://127.0.0.1:{queue.get()}/upload"
+
+    try:
+        with requests.Session() as http:
+            for name, make_body in (
+                ("MultipartEncoder", legacy_body),
+                ("stream, aligned reads", stream_body(False)),
+                ("stream, mmap", stream_body(True)),
+            ):
+                best_wall, best_cpu = float("inf"), float("inf")
+                for _attempt in range(params.repeat):
+                    elapsed, cpu_time = measure(
+                        http,
+                        stand_in,
+                        filename,
+                        make_body,
+                        int(params.buffer_mib * 2**20),
+                    )
+                    best_wall, best_cpu = min(best_wall, elapsed), min(best_cpu, cpu_time)
+                gib = size / 2**30
+                print(
+                    f"{name:22}: {gib / best_wall:6.2f} GiB/s, "
+                    f"{best_cpu / gib:6.2f} CPU s/GiB"
+                )
+    finally:
+        server.terminate()
+        os.remove(filename)
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+import asyncio
+import logging
+import os
+from json.decoder import JSONDecodeError
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Union
+
+import requests  # type: ignore
+
+from cytomine import codec
+from cytomine.cytomine import Cytomine, CytomineAuth
+
+try:
+    import aiohttp
+    from yarl import URL
+except ImportError:  # pragma: no cover
+    aiohttp = None  # type: ignore
+
+if TYPE_CHECKING:
+    from cytomine.models.collection import Collection
+    from cytomine.models.model import Model
+
+
+class AsyncCytomine:
+    """Asyncio counterpart of the `Cytomine` client, for keeping many requests in
+    flight from a single thread. It requires the optional `aiohttp` dependency.
+
+    Examples
+    --------
+    >>> async with AsyncCytomine(host, public_key, private_key) as client:
+    ...     images = await ImageInstanceCollection().fetch_with_filter_async("project", 1)
+    """
+
+    __instance: Optional["AsyncCytomine"] = None
+
+    def __init__(
+        self,
+        host: str,
+        public_key: str,
+        private_key: str,
+        protocol: Optional[str] = None,
+        max_connections: int = 100,
+    ) -> None:
+        """
+        Initialize the asynchronous Cytomine client. The HTTP session is opened
+        when entering the client context (or with `open()`).
+
+        Parameters
+        ----------
+        host : str
+            The Cytomine host (with or without protocol).
+        public_key : str
+            The Cytomine public key.
+        private_key : str
+            The Cytomine private key.
+        protocol : str ("http", "https", "http://", "https://") (optional)
+            The default protocol - used only if the host value does not specify one
+        max_connections : int
+            Maximum number of simultaneous connections.
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncCytomine requires the 'aiohttp' package.")
+
+        self._host, self._protocol = Cytomine._parse_url(  # pylint: disable=protected-access
+            host, protocol
+        )
+        self._public_key = public_key
+        self._private_key = private_key
+        self._base_path = "/api/"
+        self._max_connections = max_connections
+        self._auth = CytomineAuth(public_key, private_key, self._base_url(), self._base_path)
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._logger = logging.getLogger("cytomine.client")
+
+    async def open(self) -> "AsyncCytomine":
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._max_connections),
+            )
+        AsyncCytomine.__instance = self
+        return self
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if AsyncCytomine.__instance is self:
+            AsyncCytomine.__instance = None
+
+    async def __aenter__(self) -> "AsyncCytomine":
+        return await self.open()
+
+    async def __aexit__(self, type: Any, value: Any, traceback: Any) -> None:
+        await self.close()
+
+    @staticmethod
+    def get_instance() -> "AsyncCytomine":
+        if AsyncCytomine.__instance is None:
+            raise ConnectionError(
+                "You must open an AsyncCytomine client to get its instance."
+            )
+        return AsyncCytomine.__instance
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    @property
+    def logger(self) -> logging.Logger:
+        return self._logger
+
+    def _base_url(self, with_base_path: bool = True) -> str:
+        url = f"{self._protocol}://{self._host}"
+        if with_base_path:
+            url += self._base_path
+        return url
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        query_parameters: Optional[Dict[str, Any]] = None,
+        data: Optional[Any] = None,
+        content_type: Optional[str] = None,
+    ) -> "aiohttp.ClientResponse":
+        if self._session is None:
+            raise ConnectionError("The AsyncCytomine client is not open.")
+
+        if not url.startswith("http"):
+            url = f"{self._base_url()}{url}"
+
+        # Encode the query string exactly like the synchronous client does,
+        # as it is part of the signed token.
+        prepared = requests.PreparedRequest()
+        prepared.prepare_url(url, query_parameters)
+        url = prepared.url  # type: ignore
+
+        headers = Cytomine._headers(content_type=content_type)  # pylint: disable=protected-access
+        headers["authorization"] = self._auth.authorization(
+            method,
+            headers.get("content-type", ""),
+            headers["date"],
+            url,
+        )
+
+        return await self._session.request(
+            method,
+            URL(url, encoded=True),
+            headers=headers,
+            data=data,
+            allow_redirects=False,
+        )
+
+    async def _read_json(
+        self,
+        response: "aiohttp.ClientResponse",
+        message: Union[str, "Collection", "Model"],
+    ) -> Tuple[bool, Any]:
+        body = await response.read()
+        if response.status != requests.codes.ok:
+            self._logger.error(
+                "[%s] %s | %s %s (%s)",
+                response.method,
+                message,
+                response.status,
+                response.reason,
+                body[:1000],
+            )
+            return False, None
+
+        self._logger.info(
+            "[%s] %s | %s %s",
+            response.method,
+            message,
+            response.status,
+            response.reason,
+        )
+        try:
+            return True, codec.loads(body)
+        except (UnicodeDecodeError, JSONDecodeError):
+            return False, None
+
+    async def get(
+        self,
+        uri: str,
+        query_parameters: Optional[Dict[str, Any]] = None,
+    ) -> Union[bool, Dict[str, Any]]:
+        async with await self._request("GET", uri, query_parameters) as response:
+            ok, content = await self._read_json(response, uri)
+        return content if ok else False
+
+    async def get_model(
+        self,
+        model: "Model",
+        query_parameters: Optional[Dict[str, Any]] = None,
+    ) -> Union[bool, "Model"]:
+        async with await self._request("GET", model.uri(), query_parameters) as response:
+            ok, content = await self._read_json(response, model.uri())
+        if not ok:
+            return False
+
+        return model.populate(content)
+
+    async def get_collection(
+        self,
+        collection: "Collection",
+        query_parameters: Optional[Dict[str, Any]] = None,
+        append_mode: bool = False,
+    ) -> Union[bool, "Collection"]:
+        uri = collection.uri()
+        async with await self._request("GET", uri, query_parameters) as response:
+            ok, content = await self._read_json(response, uri)
+        if not ok:
+            return False
+
+        return collection.populate(content, append_mode)
+
+    async def post_collection(
+        self,
+        collection: "Collection",
+        query_parameters: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        uri = collection.uri(without_filters=True)
+        async with await self._request(
+            "POST",
+            uri,
+            query_parameters,
+            data=collection.to_json().encode("utf-8"),
+            content_type="application/json",
+        ) as response:
+            ok, _ = await self._read_json(response, uri)
+        return ok
+
+    async def download_file(
+        self,
+        url: str,
+        destination: str,
+        override: bool = False,
+        payload: Any = None,
+        chunk_size: int = 2**20,
+    ) -> bool:
+        if not override and os.path.exists(destination):
+            return True
+
+        # The file is written off the event loop, to a partial file renamed once complete.
+        loop = asyncio.get_running_loop()
+        partial = f"{destination}.part"
+        async with await self._request(
+            "GET",
+            url,
+            payload,
+            content_type="application/json",
+        ) as response:
+            if response.status != requests.codes.ok:
+                self._logger.error(
+                    "[GET] %s | %s %s", url, response.status, response.reason
+                )
+                return False
+
+            f = await loop.run_in_executor(
+                None, lambda: open(partial, "wb")  # pylint: disable=consider-using-with
+            )
+            try:
+                with f:
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        await loop.run_in_executor(None, f.write, chunk)
+            except BaseException:
+                await loop.run_in_executor(None, os.remove, partial)
+                raise
+
+        await loop.run_in_executor(None, os.replace, partial, destination)
+        self._logger.info("File downloaded successfully from %s", url)
+        return True
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+# pylint: disable=import-outside-toplevel
+
+import json
+from json.decoder import JSONDecodeError
+from typing import Any, Dict, Type, Union
+
+
+class JSONCodec:
+    """Standard library codec, and base class of the other codecs."""
+
+    name = "json"
+
+    def dumps(self, obj: Any, **dump_parameters: Any) -> str:
+        return json.dumps(obj, **dump_parameters)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, obj: Any, **dump_parameters: Any) -> str:
+        if dump_parameters:
+            # orjson does not support the formatting options of the standard library
+            return super().dumps(obj, **dump_parameters)
+        return self._orjson.dumps(obj, option=self._orjson.OPT_NON_STR_KEYS).decode(
+            "utf-8"
+        )
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    name = "ujson"
+
+    def __init__(self) -> None:
+        import ujson
+
+        self._ujson = ujson
+
+    def dumps(self, obj: Any, **dump_parameters: Any) -> str:
+        if dump_parameters:
+            return super().dumps(obj, **dump_parameters)
+        return self._ujson.dumps(obj, ensure_ascii=False)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return self._ujson.loads(data)
+        except ValueError as e:
+            raise JSONDecodeError(str(e), str(data), 0) from e
+
+
+CODECS: Dict[str, Type[JSONCodec]] = {
+    codec.name: codec for codec in (OrjsonCodec, UjsonCodec, JSONCodec)
+}
+
+
+def _default_codec() -> JSONCodec:
+    for codec in CODECS.values():
+        try:
+            return codec()
+        except ImportError:
+            continue
+    return JSONCodec()
+
+
+_codec = _default_codec()
+
+
+def get_codec() -> JSONCodec:
+    return _codec
+
+
+def set_codec(codec: Union[str, JSONCodec]) -> None:
+    """Select the JSON codec used by the client for request and response bodies.
+    By default, the first installed library among orjson, ujson and the standard
+    library is used.
+
+    Parameters
+    ----------
+    codec: str|JSONCodec
+        A codec instance, or the name of a known codec ("orjson", "ujson", "json").
+
+    Raises
+    ------
+    ImportError:
+        When the library of the requested codec is not installed.
+    """
+    global _codec  # pylint: disable=global-statement
+    if isinstance(codec, str):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown JSON codec '{codec}'.")
+        codec = CODECS[codec]()
+    _codec = codec
+
+
+def dumps(obj: Any, **dump_parameters: Any) -> str:
+    return _codec.dumps(obj, **dump_parameters)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return _codec.loads(data)
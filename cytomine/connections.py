@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+import threading
+from typing import Any, Dict, Type
+
+from urllib3 import connectionpool, poolmanager
+
+
+class ConnectionCounter:
+    """
+    Count the requests sent and the sockets connected by the connection pools of
+    a urllib3 pool manager. The pools are created from subclasses of the urllib3
+    pool classes, set as the public `pool_classes_by_scheme` of the manager, whose
+    public `ConnectionCls` counts its `connect()` and `request()` calls. This works
+    the same with urllib3 1.x and 2.x, and the counts are kept when the manager
+    discards the pools of least recently used hosts.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self.pool_classes: Dict[str, Type[connectionpool.HTTPConnectionPool]] = {
+            scheme: self._pool_class(pool_class)
+            for scheme, pool_class in poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def install(self, manager: poolmanager.PoolManager) -> None:
+        """Count the connections of the pools created by `manager` from now on."""
+        manager.pool_classes_by_scheme = self.pool_classes
+
+    def _add_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def _add_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def _pool_class(
+        self,
+        pool_class: Type[connectionpool.HTTPConnectionPool],
+    ) -> Type[connectionpool.HTTPConnectionPool]:
+        counter = self
+        connection_class: Any = pool_class.ConnectionCls
+
+        class CountingConnection(connection_class):  # type: ignore
+            def connect(self) -> None:
+                counter._add_connection()  # pylint: disable=protected-access
+                super().connect()
+
+            def request(self, *args: Any, **kwargs: Any) -> Any:
+                counter._add_request()  # pylint: disable=protected-access
+                return super().request(*args, **kwargs)
+
+            # urllib3 1.x sends chunked bodies with `request_chunked()`
+            if hasattr(connection_class, "request_chunked"):
+
+                def request_chunked(self, *args: Any, **kwargs: Any) -> Any:
+                    counter._add_request()  # pylint: disable=protected-access
+                    return super().request_chunked(*args, **kwargs)
+
+        CountingConnection.__name__ = connection_class.__name__
+        return type(pool_class.__name__, (pool_class,), {"ConnectionCls": CountingConnection})
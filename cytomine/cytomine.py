@@ -23,13 +23,16 @@ import hmac
 import http.client as http_client
 import logging
 import os
-import shutil
 import sys
+import tempfile
+import threading
 import time
 import warnings
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
 from json.decoder import JSONDecodeError
 from time import gmtime, strftime
+from urllib.parse import urlsplit
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -43,10 +46,18 @@ from typing import (
 
 import requests  # type: ignore
 from cachecontrol import CacheControlAdapter
-from requests_toolbelt import MultipartEncoder
 from requests_toolbelt.utils import dump
 
+from cytomine import codec
+from cytomine.connections import ConnectionCounter
+from cytomine.download import DEFAULT_PART_SIZE, RangedDownload, write_file
+from cytomine.multipart import DEFAULT_BUFFER_SIZE, ChunkedUpload, MultipartFileStream
+from cytomine.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from cytomine.throttle import RequestLimiter
+from cytomine.tile_cache import TileCache, cacheable, persistent
+
 if TYPE_CHECKING:
+    from cytomine.dedup import UploadIndex
     from cytomine.models.collection import Collection
     from cytomine.models.model import Model
     from cytomine.models.storage import UploadedFile
@@ -126,29 +137,48 @@ class CytomineAuth(requests.auth.AuthBase):
         self.base_url = base_url
         self.base_path = base_path if sign_with_base_path else ""
 
-    def __call__(self, r: requests.PreparedRequest) -> requests.PreparedRequest:
-        content_type = r.headers.get("content-type", "")
+    @property
+    def private_key(self) -> str:
+        return self._private_key
+
+    @private_key.setter
+    def private_key(self, private_key: str) -> None:
+        # The keyed HMAC state is computed once, and copied for each signature.
+        self._private_key = private_key
+        self._hmac = hmac.new(bytes(private_key, "utf-8"), digestmod=hashlib.sha1)
+
+    def authorization(self, method: str, content_type: str, date: str, url: str) -> str:
+        """Compute the value of the authorization header for a request to `url`
+        (complete URL, query string included)."""
         token = (
-            f"{r.method}\n\n"
+            f"{method}\n\n"
             f"{content_type}\n"
-            f"{r.headers['date']}\n"
+            f"{date}\n"
             f"{self.base_path}"
-            f"{r.url.replace(self.base_url, '')}"  # type: ignore
+            f"{url.replace(self.base_url, '')}"
         )
 
-        signature = base64.b64encode(
-            hmac.new(
-                bytes(self.private_key, "utf-8"),
-                token.encode("utf-8"),
-                hashlib.sha1,
-            ).digest()
-        )
+        signer = self._hmac.copy()
+        signer.update(token.encode("utf-8"))
+        signature = base64.b64encode(signer.digest())
+
+        return f"CYTOMINE {self.public_key}:{signature.decode('utf-8')}"
 
-        authorization = f"CYTOMINE {self.public_key}:{signature.decode('utf-8')}"
-        r.headers["authorization"] = authorization
+    def __call__(self, r: requests.PreparedRequest) -> requests.PreparedRequest:
+        r.headers["authorization"] = self.authorization(
+            r.method,  # type: ignore
+            r.headers.get("content-type", ""),  # type: ignore
+            r.headers["date"],  # type: ignore
+            r.url,  # type: ignore
+        )
         return r
 
 
+@functools.lru_cache(maxsize=1)
+def _http_date(timestamp: int) -> str:
+    return strftime("%a, %d %b %Y %H:%M:%S +0000", gmtime(timestamp))
+
+
 def deprecated(func: Callable[..., Any]) -> Callable[..., Any]:
     """This is a decorator which can be used to mark functions
     as deprecated. It will result in a warning being emitted
@@ -175,8 +205,8 @@ def read_response_message(
 ) -> str:
     content = response.content.decode(encoding)
     try:
-        return response.json().get(key, content)
-    except JSONDecodeError:
+        return codec.loads(response.content).get(key, content)
+    except (JSONDecodeError, AttributeError):
         return content
 
 
@@ -200,6 +230,17 @@ class Cytomine:
         protocol: Optional[str] = None,
         working_path: str = "/tmp",
         configure_logging: bool = True,
+        max_workers: Optional[int] = None,
+        pool_size: Optional[int] = None,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        retry_policy: Optional[RetryPolicy] = None,
+        api_limiter: Optional[RequestLimiter] = None,
+        image_limiter: Optional[RequestLimiter] = None,
+        upload_buffer_size: int = DEFAULT_BUFFER_SIZE,
+        tile_cache: Optional[TileCache] = None,
+        chunked_uploads: bool = False,
+        upload_checkpoints: Optional[str] = None,
         **kwargs: Any,
     ) -> None:
         """
@@ -226,6 +267,43 @@ class Cytomine:
             `basicConfig`) if the root logger has no handler already configured.
             Default value is True to mimic backwards compatibility.
             Starting v3.x, default value should be set to False.
+        max_workers : int (optional)
+            Size of the worker pool shared by the parallel helpers (crop dumps,
+            chunked collection saves,...). Workers mostly wait on the network,
+            so the default is sized for I/O concurrency and not for the number of CPUs.
+        pool_size : int (optional)
+            Maximum number of connections kept open in each connection pool (see
+            `pool_statistics`). Defaults to the size of the worker pool, and at least 10.
+        pool_block : bool
+            True for waiting for a free connection when a pool is exhausted, False
+            for opening an extra connection that is discarded after use.
+        keep_alive : bool
+            False for closing connections after each request.
+        retry_policy : RetryPolicy (optional)
+            Policy for retrying requests that fail with a connection error or a
+            transient server error (see `RetryPolicy` for the default policy).
+            `RetryPolicy.disabled()` for never retrying.
+        api_limiter : RequestLimiter (optional)
+            Rate and concurrency limits of the requests to the core API.
+            Defaults to 32 requests in flight, without rate limit.
+        image_limiter : RequestLimiter (optional)
+            Rate and concurrency limits of the image downloads (dumps, crops,
+            windows,...) and uploads, that are served by the image server.
+            Defaults to 8 requests in flight, without rate limit.
+        upload_buffer_size : int
+            Size in bytes of the blocks of the uploaded files sent at once (1 MiB by
+            default). The files are memory-mapped, or read with aligned reads, by
+            blocks of this size.
+        tile_cache : TileCache (optional)
+            Cache of the image windows, thumbnails and annotation crops, used by
+            all their downloads, to a file or in memory. None for no cache.
+        chunked_uploads : bool
+            True if the upload server accepts files sent in chunks with a
+            `Content-Range` header (see `upload_image`). Only enable it for servers
+            known to support it: the others take each chunk for a whole file.
+        upload_checkpoints : str (optional)
+            Directory of the checkpoints of interrupted chunked uploads.
+            Defaults to "cytomine-uploads" in the temporary directory.
         kwargs : dict
             Deprecated arguments.
         """
@@ -270,6 +348,35 @@ class Cytomine:
             requests_log = logging.getLogger("urllib3")
             requests_log.setLevel(logging.DEBUG)
 
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+        self._pool_size = pool_size if pool_size is not None else max(10, max_workers)
+        self._pool_block = pool_block
+        self._keep_alive = keep_alive
+
+        self._retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self._circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self._circuit_breakers_lock = threading.Lock()
+
+        self._limiters = {
+            "api": api_limiter if api_limiter is not None else RequestLimiter(max_in_flight=32),
+            "image": (
+                image_limiter if image_limiter is not None else RequestLimiter(max_in_flight=8)
+            ),
+        }
+
+        self._upload_buffer_size = upload_buffer_size
+        self._tile_cache = tile_cache
+        self._chunked_uploads = chunked_uploads
+        self._upload_checkpoints = upload_checkpoints or os.path.join(
+            tempfile.gettempdir(),
+            "cytomine-uploads",
+        )
+
         # Deprecated
         self._working_path = working_path
 
@@ -284,6 +391,7 @@ class Cytomine:
         private_key: str,
         verbose: int = 0,
         use_cache: bool = True,
+        **kwargs: Any,
     ) -> "Cytomine":
         """
         Connect the client with the given host and the provided credentials.
@@ -300,13 +408,15 @@ class Cytomine:
             The verbosity level of the client.
         use_cache : bool
             True to use HTTP cache, False otherwise.
+        kwargs : dict
+            Other client options (see `Cytomine.__init__`).
 
         Returns
         -------
         client : Cytomine
             A connected Cytomine client.
         """
-        return cls(host, public_key, private_key, verbose, use_cache)
+        return cls(host, public_key, private_key, verbose, use_cache, **kwargs)
 
     @classmethod
     def connect_from_cli(cls, argv: List[str], use_cache: bool = True) -> "Cytomine":
@@ -447,21 +557,98 @@ class Cytomine:
 
     def _start(self) -> None:
         self._session = requests.session()
-        if self._use_cache:
-            self._session.mount(f"{self._protocol}://", CacheControlAdapter())
+        if not self._keep_alive:
+            self._session.headers["Connection"] = "close"
+
+        # Requests to the API and to the host root (upload, import, image servers,...)
+        # go through separate adapters, so that each has its own connection pools.
+        self._connection_counters = {"api": ConnectionCounter(), "upload": ConnectionCounter()}
+        self._adapters = {
+            name: self._new_adapter(counter)
+            for name, counter in self._connection_counters.items()
+        }
+        self._session.mount(f"{self._protocol}://", self._adapters["upload"])
+        self._session.mount(self._base_url(), self._adapters["api"])
+
+        self._auth, self._upload_auth = self._create_auth()
 
         Cytomine.__instance = self
         self.wait_to_accept_connection()
         self._current_user = None
         self.set_current_user()
 
+    def _new_adapter(self, counter: ConnectionCounter) -> requests.adapters.HTTPAdapter:
+        adapter_class = CacheControlAdapter if self._use_cache else requests.adapters.HTTPAdapter
+        adapter = adapter_class(
+            pool_maxsize=self._pool_size,
+            pool_block=self._pool_block,
+        )
+        counter.install(adapter.poolmanager)
+        return adapter
+
+    def pool_statistics(self) -> Dict[str, Dict[str, int]]:
+        """
+        Connection reuse statistics of the connection pools of the client, for
+        requests to the API ("api") and to the other URLs of the host such as the
+        upload endpoint ("upload").
+
+        Returns
+        -------
+        statistics : dict
+            For each pool, the number of `requests` sent, of `connections` opened, of
+            `reused` connections (requests sent on an already open connection) and of
+            `idle` connections currently kept open. A low number of connections compared
+            to the number of requests means that connections are reused.
+            Connections are counted each time a socket is connected, including the
+            reconnections of a pooled connection closed by the server.
+        """
+        statistics = {}
+        for name, adapter in self._adapters.items():
+            counter = self._connection_counters[name]
+            stats = {
+                "requests": counter.requests,
+                "connections": counter.connections,
+                "reused": max(0, counter.requests - counter.connections),
+                "idle": 0,
+            }
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None and pool.pool is not None:
+                    stats["idle"] += sum(1 for conn in list(pool.pool.queue) if conn)
+            statistics[name] = stats
+        return statistics
+
     def __enter__(self) -> "Cytomine":
         # self._start()
         return self
 
     def __exit__(self, type: Any, value: Any, traceback: Any) -> None:
+        self._shutdown_executor()
         self._session.close()
 
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """The worker pool shared by all parallel operations of this client.
+        It is created on first use and shut down when leaving the client context."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="cytomine-worker",
+                )
+            return self._executor
+
+    def _shutdown_executor(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
     @staticmethod
     def get_instance() -> "Cytomine":
         if Cytomine.__instance is None:
@@ -484,8 +671,27 @@ class Cytomine:
     def set_credentials(self, public_key: str, private_key: str) -> None:
         self._public_key = public_key
         self._private_key = private_key
+        self._auth, self._upload_auth = self._create_auth()
         self.set_current_user()
 
+    def _create_auth(self) -> Tuple[CytomineAuth, CytomineAuth]:
+        """Signers shared by all the requests of the session, for the API and
+        for the upload host."""
+        return (
+            CytomineAuth(
+                self._public_key,
+                self._private_key,
+                self._base_url(),
+                self._base_path,
+            ),
+            CytomineAuth(
+                self._public_key,
+                self._private_key,
+                self._base_url(with_base_path=False),
+                "",
+            ),
+        )
+
     def _base_url(self, with_base_path: bool = True) -> str:
         url = f"{self._protocol}://{self._host}"
         if with_base_path:
@@ -505,7 +711,7 @@ class Cytomine:
         if content_type is not None:
             headers["content-type"] = content_type
 
-        headers["date"] = strftime("%a, %d %b %Y %H:%M:%S +0000", gmtime())
+        headers["date"] = _http_date(int(time.time()))
         headers["X-Requested-With"] = "XMLHTTPRequest"
 
         return headers
@@ -515,29 +721,40 @@ class Cytomine:
         response: requests.Response,
         message: Union[str, "Collection", "Model"],
     ) -> None:
+        # Messages are only formatted for enabled levels: the response dump in
+        # particular would copy large bodies (collections, tiles,...).
+        status_code = response.status_code
+        if status_code in (301, 302):
+            redirected_url = response.headers["Location"]
+            raise URLRedirectionException(status_code, redirected_url)
+
         try:
-            msg = (
-                f"[{response.request.method}] {message} | "
-                f"{response.status_code} {response.reason}"
-            )
             if (
-                response.status_code == requests.codes.ok
-                or response.status_code >= requests.codes.server_error
+                status_code == requests.codes.ok
+                or status_code >= requests.codes.server_error
             ):
-                self.log(msg)
-            elif response.status_code in (301, 302):
-                redirected_url = response.headers["Location"]
-                raise URLRedirectionException(response.status_code, redirected_url)
-            else:
-                self.log(
-                    f"{msg} ({read_response_message(response, key='errors')})",
-                    level=logging.ERROR,
+                if self._logger.isEnabledFor(logging.INFO):
+                    self._logger.info(
+                        "[%s] %s | %s %s",
+                        response.request.method,
+                        message,
+                        status_code,
+                        response.reason,
+                    )
+            elif self._logger.isEnabledFor(logging.ERROR):
+                self._logger.error(
+                    "[%s] %s | %s %s (%s)",
+                    response.request.method,
+                    message,
+                    status_code,
+                    response.reason,
+                    read_response_message(response, key="errors"),
                 )
-            self._logger.debug("DUMP:\n%s", dump.dump_all(response).decode("utf-8"))
+
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug("DUMP:\n%s", dump.dump_all(response).decode("utf-8"))
         except (UnicodeDecodeError, JSONDecodeError):
             self._logger.debug("DUMP:\nImpossible to decode.")
-        except URLRedirectionException:  # pylint: disable=try-except-raise
-            raise
 
     def log(self, msg: str, level: int = logging.INFO) -> None:
         self._logger.log(level, msg)
@@ -546,21 +763,157 @@ class Cytomine:
     def logger(self) -> logging.Logger:
         return self._logger
 
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        return self._retry_policy
+
+    def _circuit_breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        with self._circuit_breakers_lock:
+            if host not in self._circuit_breakers:
+                self._circuit_breakers[host] = self._retry_policy.new_circuit_breaker()
+            return self._circuit_breakers[host]
+
+    @property
+    def tile_cache(self) -> Optional[TileCache]:
+        return self._tile_cache
+
+    def limiter(self, service: str) -> RequestLimiter:
+        """The limiter of the requests to a service: "api" or "image"."""
+        return self._limiters[service]
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        retry: bool = True,
+        service: Optional[str] = "api",
+        retries: Optional[int] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        Send a request with the session, and retry it according to the client retry
+        policy. The response of the last attempt is returned, and the exception of the
+        last attempt is raised if it failed with a connection error.
+
+        Each attempt waits for the limiter of the `service` ("api" or "image"),
+        None when the caller already holds it, which is released while waiting
+        before a retry. The limiter of a streamed response is held until the
+        response is closed. `retries` overrides the number of retries of the
+        method in the policy, for requests known to be idempotent.
+
+        Raises
+        ------
+        CircuitOpenError
+            When the requests to the host are suspended after too many failures.
+        """
+        policy = self._retry_policy
+        retries = (policy.retries(method) if retries is None else retries) if retry else 0
+        breaker = self._circuit_breaker(url) if retry else None
+        policy.budget.deposit()
+
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError(urlsplit(url).netloc)
+
+            delay: Optional[float] = None
+            try:
+                response = self._send(method, url, service, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if breaker is not None:
+                    breaker.record_failure()
+                if not self._can_retry(attempt, retries, breaker):
+                    raise
+                reason = "connection error"
+            else:
+                if breaker is not None:
+                    breaker.record_response(response.status_code)
+                if response.status_code not in policy.statuses:
+                    return response
+
+                delay = policy.retry_after(response)
+                if (
+                    delay is not None and delay > policy.retry_after_max
+                ) or not self._can_retry(attempt, retries, breaker):
+                    return response
+                response.close()
+                reason = f"{response.status_code} {response.reason}"
+
+            if delay is None:
+                delay = policy.backoff(attempt)
+            attempt += 1
+            self._logger.warning(
+                "[%s] %s | %s, retry %d/%d in %.1f s",
+                method,
+                url,
+                reason,
+                attempt,
+                retries,
+                delay,
+            )
+            time.sleep(delay)
+            if "headers" in kwargs:
+                kwargs["headers"]["date"] = _http_date(int(time.time()))
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        service: Optional[str],
+        **kwargs: Any,
+    ) -> requests.Response:
+        if service is None:
+            return self._session.request(method, url, **kwargs)
+        if not kwargs.get("stream"):
+            with self._limiters[service]:
+                return self._session.request(method, url, **kwargs)
+
+        # The body of a streamed response is read by the caller after the request
+        limiter = self._limiters[service]
+        limiter.__enter__()  # pylint: disable=unnecessary-dunder-call
+        try:
+            response = self._session.request(method, url, **kwargs)
+        except BaseException:
+            limiter.__exit__(None, None, None)
+            raise
+
+        close = response.close
+        released = threading.Lock()
+
+        def close_and_release() -> None:
+            try:
+                close()
+            finally:
+                if released.acquire(blocking=False):  # pylint: disable=consider-using-with
+                    limiter.__exit__(None, None, None)
+
+        response.close = close_and_release  # type: ignore
+        return response
+
+    def _can_retry(
+        self,
+        attempt: int,
+        retries: int,
+        breaker: Optional[CircuitBreaker],
+    ) -> bool:
+        if attempt >= retries or (breaker is not None and breaker.is_open):
+            return False
+        return self._retry_policy.budget.withdraw()
+
     def _get(
         self,
         uri: str,
         query_parameters: Optional[Dict[str, Any]],
         with_base_path: bool = True,
+        retry: bool = True,
     ) -> requests.Response:
-        return self._session.get(
+        return self._request(
+            "GET",
             f"{self._base_url(with_base_path)}{uri}",
+            retry=retry,
             allow_redirects=False,
-            auth=CytomineAuth(
-                self._public_key,
-                self._private_key,
-                self._base_url(),
-                self._base_path,
-            ),
+            auth=self._auth,
             headers=self._headers(),
             params=query_parameters,
         )
@@ -575,7 +928,7 @@ class Cytomine:
         if not response.status_code == requests.codes.ok:
             return False
 
-        return response.json()
+        return codec.loads(response.content)
 
     def get_model(
         self,
@@ -585,7 +938,7 @@ class Cytomine:
         response = self._get(model.uri(), query_parameters)
 
         if response.status_code == requests.codes.ok:
-            response_json = response.json()
+            response_json = codec.loads(response.content)
             model = model.populate(response_json)
             self._log_response(response, model)
 
@@ -603,7 +956,7 @@ class Cytomine:
     ) -> Union[bool, "Collection"]:
         response = self._get(collection.uri(), query_parameters)
         if response.status_code == requests.codes.ok:
-            collection = collection.populate(response.json(), append_mode)
+            collection = collection.populate(codec.loads(response.content), append_mode)
 
         self._log_response(response, collection)
         if not response.status_code == requests.codes.ok:
@@ -611,23 +964,26 @@ class Cytomine:
 
         return collection
 
+    @staticmethod
+    def _encode_body(data: Optional[Any]) -> Optional[Any]:
+        # JSON bodies are sent as UTF-8 bytes: str bodies would be encoded as latin-1.
+        if isinstance(data, str):
+            return data.encode("utf-8")
+        return data
+
     def _put(
         self,
         uri: str,
         data: Optional[Any] = None,
         query_parameters: Optional[Dict[str, Any]] = None,
     ) -> requests.Response:
-        return self._session.put(
+        return self._request(
+            "PUT",
             f"{self._base_url()}{uri}",
-            auth=CytomineAuth(
-                self._public_key,
-                self._private_key,
-                self._base_url(),
-                self._base_path,
-            ),
+            auth=self._auth,
             headers=self._headers(content_type="application/json"),
             params=query_parameters,
-            data=data,
+            data=self._encode_body(data),
         )
 
     def put(
@@ -641,7 +997,7 @@ class Cytomine:
         if not response.status_code == requests.codes.ok:
             return False
 
-        return response.json()
+        return codec.loads(response.content)
 
     def put_model(
         self,
@@ -650,13 +1006,12 @@ class Cytomine:
     ) -> Union[bool, "Model"]:
         response = self._put(model.uri(), model.to_json(), query_parameters)
         if response.status_code == requests.codes.ok:
-            if model.callback_identifier.lower() in response.json():
-                model = model.populate(
-                    response.json()[model.callback_identifier.lower()]
-                )
+            response_json = codec.loads(response.content)
+            if model.callback_identifier.lower() in response_json:
+                model = model.populate(response_json[model.callback_identifier.lower()])
             else:
                 model = model.populate(
-                    response.json()[model.__class__.__name__.lower()]
+                    response_json[model.__class__.__name__.lower()]
                 )  # remove when REST URL are normalized
 
         self._log_response(response, model)
@@ -670,14 +1025,10 @@ class Cytomine:
         uri: str,
         query_parameters: Optional[Dict[str, Any]] = None,
     ) -> requests.Response:
-        return self._session.delete(
+        return self._request(
+            "DELETE",
             f"{self._base_url()}{uri}",
-            auth=CytomineAuth(
-                self._public_key,
-                self._private_key,
-                self._base_url(),
-                self._base_path,
-            ),
+            auth=self._auth,
             headers=self._headers(content_type="application/json"),
             params=query_parameters,
         )
@@ -713,17 +1064,13 @@ class Cytomine:
         query_parameters: Optional[Dict[str, Any]] = None,
         with_base_path: bool = True,
     ) -> requests.Response:
-        return self._session.post(
+        return self._request(
+            "POST",
             f"{self._base_url(with_base_path)}{uri}",
-            auth=CytomineAuth(
-                self._public_key,
-                self._private_key,
-                self._base_url(),
-                self._base_path,
-            ),
+            auth=self._auth,
             headers=self._headers(content_type="application/json"),
             params=query_parameters,
-            data=data,
+            data=self._encode_body(data),
         )
 
     def post(
@@ -737,7 +1084,7 @@ class Cytomine:
         if not response.status_code == requests.codes.ok:
             return False
 
-        return response.json()
+        return codec.loads(response.content)
 
     def post_model(
         self,
@@ -747,17 +1094,18 @@ class Cytomine:
         response = self._post(model.uri(), model.to_json(), query_parameters)
 
         if response.status_code == requests.codes.ok:
+            response_json = codec.loads(response.content)
             try:
-                if model.callback_identifier.lower() in response.json():
+                if model.callback_identifier.lower() in response_json:
                     model = model.populate(
-                        response.json()[model.callback_identifier.lower()]
+                        response_json[model.callback_identifier.lower()]
                     )
                 else:
                     model = model.populate(
-                        response.json()[model.__class__.__name__.lower()]
+                        response_json[model.__class__.__name__.lower()]
                     )  # remove when REST URL are normalized
             except KeyError:
-                self._logger.warning(response.json())
+                self._logger.warning(response_json)
 
         self._log_response(response, model)
 
@@ -804,7 +1152,7 @@ class Cytomine:
     def is_alive(self) -> bool:
         uri = "/server/ping"
         try:
-            response = self._get(uri, None, with_base_path=False)
+            response = self._get(uri, None, with_base_path=False, retry=False)
             self._log_response(response, uri)
             return response.status_code == requests.codes.ok
         except Exception:  # pylint: disable=broad-except
@@ -832,26 +1180,29 @@ class Cytomine:
         if not uri:
             uri = model.uri()
 
-        with open(filename, "rb") as file:
-            m = MultipartEncoder(fields={"files[]": (filename, file)})
-            response = self._session.post(
-                f"{self._base_url()}{uri}",
-                auth=CytomineAuth(
-                    self._public_key,
-                    self._private_key,
-                    self._base_url(),
-                    self._base_path,
-                ),
-                headers=self._headers(content_type=m.content_type),
-                params=query_parameters,
-                data=m,
-            )
+        body = MultipartFileStream(
+            "files[]",
+            filename,
+            filename=filename,
+            buffer_size=self._upload_buffer_size,
+        )
+        # Not retried: the body stream cannot be sent twice
+        response = self._request(
+            "POST",
+            f"{self._base_url()}{uri}",
+            service="image",
+            retries=0,
+            auth=self._auth,
+            headers=self._headers(content_type=body.content_type),
+            params=query_parameters,
+            data=body,  # memoryview blocks are sent as they are
+        )
 
         if not response.status_code == requests.codes.ok:
             self._logger.error("Error during file uploading to %s", uri)
             return False
 
-        model = model.populate(response.json())
+        model = model.populate(codec.loads(response.content))
         self._logger.info("File uploaded successfully to %s", uri)
 
         return model
@@ -862,45 +1213,130 @@ class Cytomine:
         destination: str,
         override: bool = False,
         payload: Any = None,
+        n_workers: int = 1,
+        part_size: int = DEFAULT_PART_SIZE,
+        checksum: Optional[str] = None,
     ) -> bool:
+        """
+        Download a file. The file is written to "<destination>.part", which is
+        renamed to `destination` once complete. An interrupted download is resumed
+        by the next call with HTTP range requests, from a checkpoint saved in
+        "<destination>.part.json".
+
+        Parameters
+        ----------
+        url : str
+            The URL of the file, absolute or relative to the API.
+        destination : str
+            The path of the downloaded file.
+        override : bool
+            True for downloading the file even if the destination already exists.
+        payload : dict (optional)
+            The query parameters.
+        n_workers : int
+            Number of parts of the file downloaded at once with HTTP range requests.
+        part_size : int
+            Size in bytes of the parts downloaded by the workers.
+        checksum : str (optional)
+            Expected checksum of the file, as "<algorithm>:<hex digest>"
+            (e.g. "sha256:9f86d0..."). The download fails if the file does not match.
+
+        Returns
+        -------
+        downloaded : bool
+            True if the file is downloaded (or already exists), False otherwise.
+        """
         if not url.startswith("http"):
             url = f"{self._base_url()}{url}"
 
-        if override or not os.path.exists(destination):
-            response = self._session.get(
+        if not override and os.path.exists(destination):
+            return True
+
+        if self._tile_cache is not None and checksum is None and cacheable(url):
+            content = self.download_content(url, payload)
+            if content is not None:
+                write_file(destination, content)
+            downloaded = content is not None
+        else:
+            download = RangedDownload(
+                functools.partial(self._image_request, "GET", url, params=payload),
+                url,
+                requests.Request("GET", url, params=payload).prepare().url or url,
+                destination,
+                self._logger,
+                self._log_response,
+            )
+            downloaded = download.run(n_workers, part_size, checksum)
+
+        if downloaded and self._logger.isEnabledFor(logging.INFO):
+            parameters = (
+                {k: v for k, v in payload.items() if v is not None}
+                if payload
+                else {}
+            )
+            self._logger.info(
+                "File downloaded successfully from %s with parameters %s",
                 url,
-                auth=CytomineAuth(
-                    self._public_key,
-                    self._private_key,
-                    self._base_url(),
-                    self._base_path,
-                ),
-                headers=self._headers(content_type="application/json"),
-                params=payload,
-                stream=True,
+                parameters,
             )
+        return downloaded
 
-            if not response.status_code == requests.codes.ok:
-                self._log_response(response, url)
-                return False
+    def download_content(self, url: str, payload: Any = None) -> Optional[bytes]:
+        """
+        Download a file in memory, e.g. an image window or crop. Windows,
+        thumbnails and crops are looked up in the tile cache first, if any.
 
-            with open(destination, "wb") as f:
-                response.raw.decode_content = True
-                shutil.copyfileobj(response.raw, f)
+        Parameters
+        ----------
+        url : str
+            The URL of the file, absolute or relative to the API.
+        payload : dict (optional)
+            The query parameters.
 
-                parameters = (
-                    str(dict(filter(lambda item: item[1] is not None, payload.items())))
-                    if payload
-                    else {}
-                )
-                self._logger.info(
-                    "File downloaded successfully from %s with parameters %s",
-                    url,
-                    parameters,
-                )
-            return True
+        Returns
+        -------
+        content : bytes (optional)
+            The content of the file, None if the download failed.
+        """
+        if not url.startswith("http"):
+            url = f"{self._base_url()}{url}"
 
-        return True
+        cache = self._tile_cache if self._tile_cache is not None and cacheable(url) else None
+        key = cache.key(url, payload) if cache is not None else ""
+        content = cache.get(key) if cache is not None else None
+        if content is not None:
+            return content
+
+        response = self._image_request("GET", url, params=payload)
+        if response.status_code != requests.codes.ok:
+            self._log_response(response, url)
+            return None
+        if cache is not None:
+            cache.put(key, response.content, persistent(url, payload))
+        return response.content
+
+    def _image_request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        content_type: str = "application/json",
+        data: Any = None,
+        retries: Optional[int] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Send a request to the image server (downloads, uploads), with `headers`
+        added to the client ones, waiting for the image limiter at each attempt."""
+        return self._request(
+            method,
+            url,
+            service="image",
+            retries=retries,
+            auth=self._auth if method == "GET" else self._upload_auth,
+            headers={**self._headers(content_type=content_type), **(headers or {})},
+            data=data,
+            **kwargs,
+        )
 
     def upload_image(
         self,
@@ -909,7 +1345,76 @@ class Cytomine:
         id_project: Optional[int] = None,
         properties: Optional[Dict[str, Any]] = None,
         sync: bool = False,
+        chunk_size: Optional[int] = None,
+        n_workers: int = 1,
+        progress: Optional[Callable[[int, int], None]] = None,
+        retries: int = 3,
+        dedup_index: Optional["UploadIndex"] = None,
     ) -> Union[bool, "UploadedFile"]:
+        """
+        Upload an image to a storage.
+
+        Parameters
+        ----------
+        filename : str
+            The path of the image file.
+        id_storage : int
+            The storage where the image is uploaded.
+        id_project : int (optional)
+            A project where the image is added.
+        properties : dict (optional)
+            Properties added to the image.
+        sync : bool
+            True for waiting for the end of the image processing by the server.
+        chunk_size : int (optional)
+            Upload the file in chunks of `chunk_size` bytes, each sent with a
+            `Content-Range` header and retried on failure. The upload server must
+            support it, as declared with the `chunked_uploads` client option.
+            An interrupted chunked upload is resumed by the next call from the
+            acknowledged chunks, recorded in the directory of the
+            `upload_checkpoints` client option. None sends the whole file at once,
+            as well as empty files.
+        n_workers : int
+            Number of chunks sent at once. The last chunk is always sent once all
+            the others are acknowledged.
+        progress : callable (optional)
+            Called as `progress(sent, total)` with the number of bytes sent so far.
+        retries : int
+            Number of retries of a failed chunk.
+        dedup_index : UploadIndex (optional)
+            Index of the files uploaded by content hash. A file already uploaded to
+            the storage is not uploaded again, and its existing uploaded file is
+            returned. New uploads are added to the index. The index is not looked
+            up when a project or properties are given, as they are only applied to
+            new uploads.
+
+        Returns
+        -------
+        uploaded_file : UploadedFile or bool
+            The uploaded file, False if the upload failed.
+
+        Raises
+        ------
+        ValueError
+            When a `chunk_size` is given but chunked uploads are not enabled.
+        """
+        if chunk_size is not None and not self._chunked_uploads:
+            raise ValueError(
+                "Chunked uploads are only supported by upload servers declared "
+                "with the chunked_uploads client option."
+            )
+
+        if dedup_index is not None and not id_project and not properties:
+            existing = dedup_index.find(filename, id_storage)
+            if existing is not None:
+                self._logger.info(
+                    "Image %s already uploaded to storage %s as uploaded file %s",
+                    filename,
+                    id_storage,
+                    existing.id,
+                )
+                return existing
+
         upload_host = self._base_url(with_base_path=False)
 
         query_parameters: Dict[str, Any] = {
@@ -926,20 +1431,39 @@ class Cytomine:
             query_parameters["keys"] = ",".join(list(properties.keys()))
             query_parameters["values"] = ",".join(list(properties.values()))
 
-        basename = os.path.basename(filename)
-        with open(filename, "rb") as file:
-            m = MultipartEncoder(fields={"files[]": (basename, file)})
-            response = self._session.post(
-                f"{upload_host}/upload",
-                auth=CytomineAuth(self._public_key, self._private_key, upload_host, ""),
-                headers=self._headers(content_type=m.content_type),
+        url = f"{upload_host}/upload"
+        if chunk_size is not None and os.path.getsize(filename) > 0:
+            upload = ChunkedUpload(
+                functools.partial(self._image_request, "POST", url, params=query_parameters),
+                url,
+                requests.Request("POST", url, params=query_parameters).prepare().url or url,
+                filename,
+                self._upload_checkpoints,
+                self._logger,
+                self._upload_buffer_size,
+            )
+            response = upload.run(chunk_size, n_workers, progress, retries)
+        else:
+            body = MultipartFileStream(
+                "files[]",
+                filename,
+                buffer_size=self._upload_buffer_size,
+                progress=progress,
+            )
+            response = self._image_request(
+                "POST",
+                url,
+                content_type=body.content_type,
+                data=body,
+                retries=0,
                 params=query_parameters,
-                data=m,
             )
 
-        if response.status_code == requests.codes.ok:
-            uf = self._process_upload_response(response.json()[0])
+        if response is not None and response.status_code == requests.codes.ok:
+            uf = self._process_upload_response(codec.loads(response.content)[0])
             self._logger.info("Image uploaded successfully")
+            if dedup_index is not None:
+                dedup_index.add(filename, id_storage, uf)
             return uf
 
         self._logger.error("Error during image upload.")
@@ -988,15 +1512,11 @@ class Cytomine:
 
         upload_host = self._base_url(with_base_path=False)
 
-        response = self._session.post(
+        response = self._image_request(
+            "POST",
             f"{upload_host}/import",
-            auth=CytomineAuth(
-                self._public_key,
-                self._private_key,
-                upload_host,
-                "",
-            ),
-            headers=self._headers(content_type="text/plain"),
+            content_type="text/plain",
+            retries=0,
             params={
                 "storage_id": storage_id,
                 "dataset_names": dataset_names,
@@ -1009,4 +1529,4 @@ class Cytomine:
             return {}
 
         self._logger.info("Datasets uploaded successfully")
-        return response.json()
+        return codec.loads(response.content)
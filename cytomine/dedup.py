@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from cytomine import codec
+from cytomine.download import file_digest
+from cytomine.models.image import AbstractImage
+from cytomine.models.storage import UploadedFile
+
+logger = logging.getLogger("cytomine.client")
+
+
+class UploadIndex:
+    """
+    Local index of the uploaded files by content hash, to skip the upload of files
+    already uploaded to a storage.
+
+    The server does not record the content hash of the uploaded files, so the index
+    is the reference: a file is known when a file with the same hash was uploaded to
+    the same storage with this index. Before being reused, an entry is checked
+    against the server: the uploaded file must still exist, in the same storage and
+    with the same size, otherwise the entry is dropped.
+
+    The hash of a file is also cached by path, size and modification time, so that
+    a file is read once across runs.
+
+    Examples
+    --------
+    >>> index = UploadIndex("uploads.json")
+    >>> uploaded_file = client.upload_image("slide.svs", id_storage, dedup_index=index)
+    """
+
+    def __init__(self, path: str, algorithm: str = "sha256") -> None:
+        self.path = path
+        self.algorithm = algorithm
+        self._uploads: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._digests: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                state = codec.loads(f.read())
+            if state.get("algorithm") == algorithm:
+                self._uploads = state.get("uploads", {})
+                self._digests = state.get("digests", {})
+
+    def save(self) -> None:
+        with self._lock:
+            state = {
+                "algorithm": self.algorithm,
+                "uploads": self._uploads,
+                "digests": self._digests,
+            }
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(codec.dumps(state))
+            os.replace(tmp_path, self.path)
+
+    def digest(self, filename: str) -> str:
+        """The content hash of a file, computed by streaming it once."""
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._digests.get(path)
+        if cached is not None and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+
+        digest = file_digest(path, self.algorithm)
+        with self._lock:
+            self._digests[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def find(self, filename: str, id_storage: int) -> Optional[UploadedFile]:
+        """
+        The uploaded file of the storage with the same content as `filename`,
+        None if there is none.
+
+        Parameters
+        ----------
+        filename : str
+            The path of the local file.
+        id_storage : int
+            The storage where the file would be uploaded.
+
+        Returns
+        -------
+        uploaded_file : UploadedFile (optional)
+            The uploaded file, fetched from the server. Its `images` attribute lists
+            the abstract images of the upload, as in the response of an upload.
+        """
+        digest = self.digest(filename)
+        with self._lock:
+            entry = self._uploads.get(digest, {}).get(str(id_storage))
+        if entry is None:
+            return None
+
+        uploaded_file = UploadedFile().fetch(entry["uploadedFile"])
+        if (
+            not isinstance(uploaded_file, UploadedFile)
+            or uploaded_file.storage != id_storage
+            or uploaded_file.size != os.path.getsize(filename)
+        ):
+            logger.info(
+                "Uploaded file %s is no longer in storage %s",
+                entry["uploadedFile"],
+                id_storage,
+            )
+            with self._lock:
+                del self._uploads[digest][str(id_storage)]
+            self.save()
+            return None
+
+        uploaded_file.images = [  # type: ignore
+            {"abstractImage": AbstractImage(id=id)} for id in entry["abstractImages"]
+        ]
+        return uploaded_file
+
+    def add(self, filename: str, id_storage: int, uploaded_file: UploadedFile) -> None:
+        """Record that `filename` is uploaded to the storage as `uploaded_file`."""
+        digest = self.digest(filename)
+        images = getattr(uploaded_file, "images", None) or []
+        with self._lock:
+            self._uploads.setdefault(digest, {})[str(id_storage)] = {
+                "uploadedFile": uploaded_file.id,
+                "abstractImages": [
+                    image["abstractImage"].id for image in images if "abstractImage" in image
+                ],
+                "filename": os.path.basename(filename),
+            }
+        self.save()
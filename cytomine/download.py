@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# pylint: disable=import-outside-toplevel
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, List, Optional, Tuple, cast
+
+import requests  # type: ignore
+
+from cytomine import codec
+from cytomine.retry import CircuitOpenError
+
+DEFAULT_PART_SIZE = 2**26  # 64 MiB
+CHUNK_SIZE = 2**20
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+def content_range(header: Optional[str]) -> Optional[Tuple[int, int, Optional[int]]]:
+    """First byte, last byte (inclusive) and total size given by a `Content-Range`
+    header, None if it is missing or invalid."""
+    match = _CONTENT_RANGE.fullmatch((header or "").strip())
+    if match is None:
+        return None
+    first, last, total = match.groups()
+    return int(first), int(last), None if total == "*" else int(total)
+
+
+_seek_lock = threading.Lock()
+
+
+def write_at(fd: int, data: bytes, offset: int) -> None:
+    """Write all `data` at `offset` of the file opened as `fd`, so that several
+    threads can write to the same file."""
+    view = memoryview(data)
+    while view:
+        if hasattr(os, "pwrite"):
+            written = os.pwrite(fd, view, offset)
+        else:  # pragma: no cover
+            with _seek_lock:
+                os.lseek(fd, offset, os.SEEK_SET)
+                written = os.write(fd, view)
+        view = view[written:]
+        offset += written
+
+
+def file_digest(path: str, algorithm: str) -> str:
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def check_checksum(path: str, checksum: str) -> bool:
+    """Check a file against a checksum written as "<algorithm>:<hex digest>",
+    e.g. "sha256:9f86d0...", with an algorithm supported by `hashlib`."""
+    algorithm, _, expected = checksum.partition(":")
+    if not expected:
+        raise ValueError(f"Invalid checksum '{checksum}', expected '<algorithm>:<digest>'.")
+    return file_digest(path, algorithm.lower()) == expected.lower()
+
+
+class TransferCheckpoint:
+    """
+    Progress of a download or of a chunked upload, saved in a sidecar file so that
+    an interrupted transfer can be resumed: the transferred byte ranges, the size
+    and (for downloads) the entity tag of the file. The progress is saved at most
+    every `save_interval` seconds while bytes are added, so that it survives a
+    killed process.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        key: str,
+        size: Optional[int] = None,
+        etag: Optional[str] = None,
+        completed: Optional[List[Tuple[int, int]]] = None,
+        save_interval: float = 5.0,
+    ) -> None:
+        self.path = path
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self.completed: List[Tuple[int, int]] = completed or []
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._saved_at = time.monotonic()
+
+    @classmethod
+    def load(cls, path: str, key: str) -> Optional["TransferCheckpoint"]:
+        """The checkpoint saved at `path`, None if there is none for the transfer `key`."""
+        try:
+            with open(path, "rb") as f:
+                state = codec.loads(f.read())
+            if state["key"] != key:
+                return None
+            return cls(
+                path,
+                key,
+                state["size"],
+                state["etag"],
+                [(int(start), int(end)) for start, end in state["completed"]],
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self) -> None:
+        with self._lock:
+            state = {
+                "key": self.key,
+                "size": self.size,
+                "etag": self.etag,
+                "completed": self.completed,
+            }
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(codec.dumps(state))
+            os.replace(tmp_path, self.path)
+            self._saved_at = time.monotonic()
+
+    def remove(self) -> None:
+        for path in (self.path, f"{self.path}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def reset(self, size: Optional[int], etag: Optional[str]) -> None:
+        with self._lock:
+            self.size = size
+            self.etag = etag
+            self.completed = []
+
+    def add(self, start: int, end: int) -> None:
+        """Record the bytes from `start` (inclusive) to `end` (exclusive) as transferred."""
+        if end <= start:
+            return
+        with self._lock:
+            merged: List[Tuple[int, int]] = []
+            for first, last in sorted(self.completed + [(start, end)]):
+                if merged and first <= merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+                else:
+                    merged.append((first, last))
+            self.completed = merged
+            due = time.monotonic() - self._saved_at >= self.save_interval
+        if due:
+            self.save()
+
+    def reached(self, offset: int) -> int:
+        """The end of the transferred bytes continuing from `offset`."""
+        with self._lock:
+            for start, end in self.completed:
+                if start <= offset < end:
+                    return end
+        return offset
+
+    def missing(self, part_size: int) -> List[Tuple[int, int]]:
+        """The byte ranges still to transfer, split in parts of at most `part_size` bytes."""
+        if self.size is None:
+            return [(0, part_size)]
+        with self._lock:
+            gaps, offset = [], 0
+            for start, end in self.completed + [(self.size, self.size)]:
+                if start > offset:
+                    gaps.append((offset, start))
+                offset = max(offset, end)
+        return [
+            (first, min(first + part_size, end))
+            for start, end in gaps
+            for first in range(start, end, part_size)
+        ]
+
+    @property
+    def transferred(self) -> int:
+        """The number of bytes transferred."""
+        with self._lock:
+            return sum(end - start for start, end in self.completed)
+
+    @property
+    def is_complete(self) -> bool:
+        return self.size is not None and self.missing(max(1, self.size)) == []
+
+
+def write_file(path: str, content: bytes) -> None:
+    """Write `content` to "<path>.part", renamed to `path` once complete."""
+    partial = f"{path}.part"
+    with open(partial, "wb") as f:
+        f.write(content)
+    os.replace(partial, path)
+
+
+class RangedDownload:
+    """
+    Download of a file into "<destination>.part", renamed to `destination` once
+    complete. An interrupted download is resumed with HTTP range requests, from a
+    checkpoint saved in "<destination>.part.json", and parts of the file can be
+    downloaded at once by several workers.
+
+    `send(headers, **kwargs)` sends the GET request of the file with the given
+    headers added to the client ones, with the client authentication, retry policy
+    and image limiter. `log_response(response, message)` logs the response of a
+    failed download.
+    """
+
+    def __init__(
+        self,
+        send: Callable[..., requests.Response],
+        url: str,
+        key: str,
+        destination: str,
+        logger: logging.Logger,
+        log_response: Callable[[requests.Response, str], None],
+    ) -> None:
+        self.send = send
+        self.url = url
+        self.destination = destination
+        self.logger = logger
+        self.log_response = log_response
+        self.partial = f"{destination}.part"
+        checkpoint = None
+        if os.path.exists(self.partial):
+            checkpoint = TransferCheckpoint.load(f"{self.partial}.json", key)
+        self.checkpoint = checkpoint or TransferCheckpoint(f"{self.partial}.json", key)
+
+    def run(self, n_workers: int, part_size: int, checksum: Optional[str]) -> bool:
+        """Download the missing parts of the file, and return True if it is complete
+        (and matches the `checksum`, if any)."""
+        from cytomine.models._utilities.parallel import generic_parallel_stream
+
+        checkpoint = self.checkpoint
+        fd = os.open(self.partial, os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        try:
+            parts = checkpoint.missing(part_size)
+            if parts:
+                # The first request gives the file size, and whether the server
+                # supports ranges and still serves the file of the checkpoint.
+                # A single worker streams the file from there to the end.
+                start = parts[0][0]
+                first_part = (
+                    (start, min(parts[0][1], start + CHUNK_SIZE))
+                    if n_workers > 1
+                    else (start, None)
+                )
+                if self._download_range(fd, first_part, True):
+                    results = generic_parallel_stream(
+                        checkpoint.missing(part_size),
+                        lambda part: self._download_range(fd, part),
+                        n_workers=n_workers,
+                    )
+                    for _ in results:
+                        pass
+        finally:
+            os.close(fd)
+            if checkpoint.size is None and checkpoint.transferred == 0:
+                # Nothing to resume (e.g. the file is not found)
+                checkpoint.remove()
+                os.remove(self.partial)
+            elif not checkpoint.is_complete:
+                checkpoint.save()
+
+        if not os.path.exists(self.partial):
+            return False
+
+        if not checkpoint.is_complete or os.path.getsize(self.partial) != checkpoint.size:
+            self.logger.error(
+                "[GET] %s | incomplete download, kept in %s",
+                self.url,
+                self.partial,
+            )
+            return False
+
+        if checksum is not None and not check_checksum(self.partial, checksum):
+            self.logger.error("[GET] %s | checksum mismatch", self.url)
+            checkpoint.remove()
+            os.remove(self.partial)
+            return False
+
+        os.replace(self.partial, self.destination)
+        checkpoint.remove()
+        return True
+
+    def _download_range(
+        self,
+        fd: int,
+        part: Tuple[int, Optional[int]],
+        probe: bool = False,
+        retries: int = 2,
+    ) -> bool:
+        """Download the bytes from `part[0]` (inclusive) to `part[1]` (exclusive, None
+        for the end of the file) into the file opened as `fd`. The part is resumed
+        from the last written byte when the transfer fails."""
+        checkpoint = self.checkpoint
+        offset, end = part
+        for _ in range(retries + 1):
+            # Offsets must be those of the file, not of a compressed representation
+            headers = {"Accept-Encoding": "identity"}
+            if offset > 0 or end is not None:
+                headers["Range"] = f"bytes={offset}-{'' if end is None else end - 1}"
+                if checkpoint.etag is not None:
+                    headers["If-Range"] = checkpoint.etag
+
+            try:
+                with self.send(headers, stream=True) as response:
+                    if response.status_code == requests.codes.ok and probe:
+                        # Ranges are not supported, or the file changed since the checkpoint
+                        offset = self._restart_body(response, fd)
+                        if offset >= cast(int, checkpoint.size):
+                            return True
+                        # urllib3 1.x does not raise on a body shorter than its
+                        # Content-Length, resume it from the offset reached
+                        continue
+
+                    if not self._accept_range(response, fd, offset, probe):
+                        return False
+
+                    offset = self._write_body(response, fd, offset)
+            except (requests.exceptions.RequestException, ConnectionError) as e:
+                self.logger.warning("[GET] %s | from byte %d: %s", self.url, offset, e)
+                if isinstance(e, CircuitOpenError):
+                    return False
+                offset = checkpoint.reached(offset)
+
+            size = checkpoint.size
+            if size is not None and offset >= (size if end is None else min(end, size)):
+                return True
+        return False
+
+    def _accept_range(
+        self,
+        response: requests.Response,
+        fd: int,
+        offset: int,
+        probe: bool,
+    ) -> bool:
+        """Check that `response` is the part of the file starting from `offset`, and
+        log the failure otherwise. The checkpoint is reset from the probe response."""
+        checkpoint = self.checkpoint
+        bounds = content_range(response.headers.get("Content-Range"))
+        if (
+            probe
+            and checkpoint.size is None
+            and response.status_code != requests.codes.partial_content
+        ):
+            # The file cannot be downloaded at all
+            self.log_response(response, self.url)
+            return False
+
+        if (
+            response.status_code != requests.codes.partial_content
+            or bounds is None
+            or bounds[0] != offset
+            or bounds[2] is None
+        ):
+            self.logger.error(
+                "[GET] %s | %s %s (unexpected response to a range request)",
+                self.url,
+                response.status_code,
+                response.reason,
+            )
+            if response.status_code == requests.codes.range_not_satisfiable:
+                # The checkpoint does not match the file, restart next time
+                checkpoint.reset(None, None)
+            return False
+
+        if probe and bounds[2] != checkpoint.size:
+            checkpoint.reset(bounds[2], response.headers.get("ETag"))
+            os.ftruncate(fd, bounds[2])
+        elif bounds[2] != checkpoint.size:
+            self.logger.error("[GET] %s | the file changed", self.url)
+            return False
+        return True
+
+    def _restart_body(self, response: requests.Response, fd: int) -> int:
+        """Write the whole file from the body of `response`, and return the offset reached."""
+        length = response.headers.get("Content-Length", "")
+        self.checkpoint.reset(
+            int(length) if length.isdigit() else None,
+            response.headers.get("ETag"),
+        )
+        os.ftruncate(fd, 0)
+        offset = self._write_body(response, fd, 0)
+        if self.checkpoint.size is None:
+            self.checkpoint.size = offset
+        return offset
+
+    def _write_body(self, response: requests.Response, fd: int, offset: int) -> int:
+        """Write the body of `response` from `offset`, and return the offset reached."""
+        for chunk in response.iter_content(CHUNK_SIZE):
+            write_at(fd, chunk, offset)
+            self.checkpoint.add(offset, offset + len(chunk))
+            offset += len(chunk)
+        return offset
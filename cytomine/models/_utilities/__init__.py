@@ -14,6 +14,12 @@
 # * See the License for the specific language governing permissions and
 # * limitations under the License.
 
-from .dump import DumpError, generic_image_dump
-from .parallel import generic_download, is_false, makedirs
+from .dump import DumpError, generic_image_content, generic_image_dump
+from .parallel import (
+    generic_download,
+    generic_parallel,
+    generic_parallel_stream,
+    is_false,
+    makedirs,
+)
 from .pattern_matching import is_iterable, resolve_pattern
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# pylint: disable=import-outside-toplevel
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from cytomine.models.model import attribute_name
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+
+class ColumnBuilder:
+    """Accumulate the JSON objects of a collection into one list per field,
+    without creating any model instance. Fields missing from an object are None."""
+
+    def __init__(self, fields: Optional[Sequence[str]] = None) -> None:
+        self._fixed = fields is not None
+        self._columns: Dict[str, List[Any]] = {field: [] for field in fields or []}
+        self._names: Dict[str, Optional[str]] = {}
+        self._n_rows = 0
+
+    def __len__(self) -> int:
+        return self._n_rows
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        columns, names = self._columns, self._names
+        for row in rows:
+            n_values = 0
+            for key, value in row.items():
+                if key not in names:
+                    names[key] = attribute_name(key)
+                name = names[key]
+                if name is None:
+                    continue
+                column = columns.get(name)
+                if column is None:
+                    if self._fixed:
+                        continue
+                    column = columns[name] = [None] * self._n_rows
+                elif len(column) > self._n_rows:
+                    # two keys mapped to the same field (e.g. "id_image" and "image")
+                    column[-1] = value
+                    continue
+                column.append(value)
+                n_values += 1
+
+            self._n_rows += 1
+            if n_values < len(columns):
+                for column in columns.values():
+                    if len(column) < self._n_rows:
+                        column.append(None)
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """One typed NumPy array per field (see `numpy_column`)."""
+        return {name: numpy_column(values) for name, values in self._columns.items()}
+
+    def to_arrow(self) -> Any:
+        """A `pyarrow.Table` with one column per field."""
+        try:
+            import pyarrow
+        except ImportError as e:
+            raise ImportError("Arrow columns require the 'pyarrow' package.") from e
+        return pyarrow.table(self._columns)
+
+    def build(self, backend: str = "numpy") -> Any:
+        if backend == "numpy":
+            return self.to_numpy()
+        if backend == "arrow":
+            return self.to_arrow()
+        raise ValueError(f"Unknown column backend '{backend}'.")
+
+
+def numpy_column(values: List[Any]) -> Any:
+    """
+    Convert the values of a field into a NumPy array. Booleans give a `bool` array
+    and integers an `int64` array. Numbers with missing values give a `float64`
+    array where missing values are NaN. Any other field (strings, lists, mixed
+    types) gives an `object` array.
+    """
+    if np is None:
+        raise ImportError("NumPy columns require the 'numpy' package.")
+
+    types = {type(value) for value in values}
+    if types == {bool}:
+        return np.array(values, dtype=bool)
+    if types == {int}:
+        return np.array(values, dtype=np.int64)
+    if types and types <= {int, float, type(None)} and types != {type(None)}:
+        return np.fromiter(
+            (np.nan if value is None else value for value in values),
+            dtype=np.float64,
+            count=len(values),
+        )
+    return np.fromiter(values, dtype=object, count=len(values))
@@ -16,11 +16,12 @@
 
 import os
 from shutil import copyfile
-from typing import Any, Callable, List, TypeVar
+from typing import Any, Callable, Dict, List, Optional, TypeVar
 
 from cytomine import Cytomine
 from cytomine.models.model import Model
 
+from .imaging import OUTPUTS, convert_content
 from .parallel import makedirs
 from .pattern_matching import resolve_pattern
 
@@ -37,6 +38,7 @@ def generic_image_dump(
     url_fn: Callable[[T, str], str],
     override: bool = True,
     check_extension: bool = True,
+    download_options: Optional[Dict[str, Any]] = None,
     **parameters: Any,
 ) -> List[str]:
     """A generic function for 'dumping' a model as an image (crop, windows,...).
@@ -55,6 +57,9 @@ def generic_image_dump(
         True for overriding the file. False
     check_extension: bool
         True if the extension must be internally validated
+    download_options: dict (optional)
+        Options of the file download (see `Cytomine.download_file`),
+        e.g. {"n_workers": 4, "checksum": "sha256:..."}
     parameters: dict
 
     Returns
@@ -88,7 +93,13 @@ def generic_image_dump(
     file_path = files_to_download[0]
     url = url_fn(model, file_path, **parameters)
 
-    if not Cytomine.get_instance().download_file(url, file_path, override, parameters):
+    if not Cytomine.get_instance().download_file(
+        url,
+        file_path,
+        override,
+        parameters,
+        **(download_options or {}),
+    ):
         raise DumpError("Could not dump the image.")
 
     # copy the file to the other paths (if any)
@@ -97,3 +108,39 @@ def generic_image_dump(
             copyfile(file_path, dest_file_path)
 
     return files_to_download
+
+
+def generic_image_content(
+    model: T,
+    url: str,
+    output: str = "bytes",
+    **parameters: Any,
+) -> Any:
+    """A generic function for downloading an image of a model (crop, window,...)
+    in memory, without going through the disk.
+    Parameters
+    ----------
+    model: Model
+        A Cytomine model
+    url: str
+        The url of the image.
+    output: str
+        "bytes" for the encoded image, "memoryview" for a memoryview of it, or
+        "array" for the image decoded into a NumPy array (requires Pillow).
+    parameters: dict
+        The query parameters.
+
+    Returns
+    -------
+    content: bytes|memoryview|ndarray (optional)
+        The image, None if the download failed.
+    """
+    if model.id is None:
+        raise ValueError("Cannot download the image of a model with no ID.")
+    if output not in OUTPUTS:
+        raise ValueError(f"Unknown output '{output}', expected one of {OUTPUTS}.")
+
+    content = Cytomine.get_instance().download_content(url, parameters)
+    if content is None:
+        return None
+    return convert_content(content, output)
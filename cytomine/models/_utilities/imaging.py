@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# pylint: disable=import-outside-toplevel
+
+from io import BytesIO
+from typing import Any, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+
+def decode_image(data: Union[bytes, memoryview]) -> Any:
+    """Decode an encoded image (JPEG, PNG, TIFF,...) into a NumPy array of shape
+    (height, width) or (height, width, channels). Requires NumPy and Pillow."""
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise ImportError("Decoding images requires the 'Pillow' package.") from e
+    if np is None:
+        raise ImportError("Decoding images requires the 'numpy' package.")
+
+    with Image.open(BytesIO(data)) as image:
+        return np.asarray(image)
+
+
+def pad_image(array: Any, shape: Tuple[int, int], value: float = 0) -> Any:
+    """Pad the bottom and right edges of an image array up to `shape` (height, width)."""
+    height, width = array.shape[:2]
+    if (height, width) == tuple(shape):
+        return array
+    padding = [(0, shape[0] - height), (0, shape[1] - width)]
+    padding += [(0, 0)] * (array.ndim - 2)
+    return np.pad(array, padding, constant_values=value)
+
+
+OUTPUTS = ("bytes", "memoryview", "array")
+
+
+def convert_content(content: bytes, output: str = "bytes") -> Any:
+    """Return a downloaded image as `bytes`, as a `memoryview` of them (without
+    copy) or as a decoded NumPy `array`."""
+    if output == "bytes":
+        return content
+    if output == "memoryview":
+        return memoryview(content)
+    if output == "array":
+        return decode_image(content)
+    raise ValueError(f"Unknown output '{output}', expected one of {OUTPUTS}.")
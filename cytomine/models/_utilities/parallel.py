@@ -15,85 +15,191 @@
 # * limitations under the License.
 
 import errno
+import itertools
+import logging
 import os
 import queue
-from multiprocessing import cpu_count
-from threading import Thread
-from typing import Any, Callable, Iterable, List, Optional, Tuple, TypeVar
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import requests  # type: ignore
+
+from cytomine.cytomine import Cytomine
 
 T = TypeVar("T")  # Type of elements in data
 R = TypeVar("R")  # Return type of worker_fn
 
+logger = logging.getLogger("cytomine.client")
+
+# Flags threads currently running a `worker_fn`, so that nested parallel calls
+# do not wait on the (possibly saturated) pool they are running in.
+_worker_state = threading.local()
+
 
 def is_false(v: Any) -> bool:
     """Check if v is 'False'"""
     return isinstance(v, bool) and not v
 
 
-def generic_parallel(
+def _get_client() -> Optional[Cytomine]:
+    try:
+        return Cytomine.get_instance()
+    except ConnectionError:
+        return None
+
+
+def _stream_in_executor(
+    executor: ThreadPoolExecutor,
+    data: Iterable[T],
+    worker_fn: Callable[[T], Optional[R]],
+    n_workers: int,
+    ordered: bool,
+) -> Generator[Tuple[T, Optional[R]], None, None]:
+    def worker(item: T) -> Tuple[T, Optional[R]]:
+        _worker_state.active = True
+        try:
+            return item, worker_fn(item)
+        finally:
+            _worker_state.active = False
+
+    # At most `n_workers` items are pulled from `data` and not yet handed back to
+    # the caller, so memory does not grow with the size of `data`.
+    in_flight: Deque[Future] = deque()
+    completed: queue.Queue = queue.Queue()
+    items = (item for item in data if item is not None)
+    try:
+        while True:
+            for item in itertools.islice(items, n_workers - len(in_flight)):
+                future = executor.submit(worker, item)
+                if not ordered:
+                    future.add_done_callback(completed.put)
+                in_flight.append(future)
+
+            if not in_flight:
+                return
+
+            if ordered:
+                future = in_flight.popleft()
+            else:
+                future = completed.get()
+                in_flight.remove(future)
+            yield future.result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def generic_parallel_stream(
     data: Iterable[T],
     worker_fn: Callable[[T], Optional[R]],
     n_workers: int = 0,
-) -> List[Tuple[T, Optional[R]]]:
-    """Run a function on a batch of data in parallel using a given processing function.
+    ordered: bool = False,
+) -> Generator[Tuple[T, Optional[R]], None, None]:
+    """Run a function on a stream of data in parallel and yield the results as they
+    are available.
+
+    Items are lazily pulled from `data` (which can be a generator) so that at most
+    `n_workers` of them are being processed or waiting to be consumed at any time.
+    The work is dispatched to the worker pool of the connected client, which is reused
+    from one call to another. A dedicated pool is only created when there is no
+    connected client or when more workers than the client pool size are requested.
 
     Parameters
     ----------
     data: iterable
-        The data to be downloaded with `download_instance_fn`
+        The data to be processed with `worker_fn`
     worker_fn: callable
         A functions that execute the operation on the given output.
         It has one parameter which must be the same type
         as the items of `data`. If needed it can return a value.
     n_workers: int
-        Number of workers to use (default: uses all the available processors)
+        Maximum number of items processed at once
+        (default: the size of the client worker pool)
+    ordered: bool
+        True for yielding the results in the order of `data`,
+        False for yielding them as soon as they are completed.
 
-    Returns
-    -------
-    results: iterable
-        List processed items as tuples. First element of the tuple is the item itself,
+    Yields
+    ------
+    result: tuple
+        Processed item as a tuple. First element of the tuple is the item itself,
         the second element of the tuple is the value returned by `worker_fn` for this item.
-    """
 
-    def worker(_in: Any, _out: Any) -> None:
-        while True:
-            item = _in.get()
-            if item is None:
-                break
-            _out.put((item, worker_fn(item)))
+    Raises
+    ------
+    Exception:
+        The first exception raised by `worker_fn`, after which the remaining items
+        are not processed. Worker functions that must not abort the whole batch
+        catch their errors and return a failure value instead.
+    """
+    if getattr(_worker_state, "active", False):
+        # Nested call from a worker: run sequentially rather than competing
+        # with the caller for the threads of the same pool.
+        yield from ((item, worker_fn(item)) for item in data if item is not None)
+        return
 
+    client = _get_client()
+    pool_size = client.max_workers if client is not None else (os.cpu_count() or 1)
     if n_workers <= 0:
-        n_workers = cpu_count()
+        n_workers = pool_size
 
-    # instantiate multiprocessing objects
-    in_queue: queue.Queue = queue.Queue()
-    out_queue: queue.Queue = queue.Queue()
-    threads = [
-        Thread(target=worker, args=[in_queue, out_queue]) for _ in range(n_workers)
-    ]
+    if client is not None and n_workers <= pool_size:
+        yield from _stream_in_executor(
+            client.executor, data, worker_fn, n_workers, ordered
+        )
+        return
 
-    for t in threads:
-        t.daemon = True
-        t.start()
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        yield from _stream_in_executor(executor, data, worker_fn, n_workers, ordered)
 
-    for item in data:
-        if item is None:
-            continue
-        in_queue.put(item)
 
-    # feed `n_workers` None values in the queue to stop the workers
-    for _ in range(n_workers):
-        in_queue.put(None)
+def generic_parallel(
+    data: Iterable[T],
+    worker_fn: Callable[[T], Optional[R]],
+    n_workers: int = 0,
+) -> List[Tuple[T, Optional[R]]]:
+    """Run a function on a batch of data in parallel using a given processing function.
+    See `generic_parallel_stream` for processing large inputs without keeping
+    all the results in memory.
 
-    # wait for the jobs to finish
-    for t in threads:
-        t.join()
+    Parameters
+    ----------
+    data: iterable
+        The data to be downloaded with `download_instance_fn`
+    worker_fn: callable
+        A functions that execute the operation on the given output.
+        It has one parameter which must be the same type
+        as the items of `data`. If needed it can return a value.
+    n_workers: int
+        Maximum number of items processed at once
+        (default: the size of the client worker pool)
 
-    results = []
-    while not out_queue.empty():
-        results.append(out_queue.get_nowait())
+    Returns
+    -------
+    results: iterable
+        List processed items as tuples. First element of the tuple is the item itself,
+        the second element of the tuple is the value returned by `worker_fn` for this item.
 
-    return results
+    Raises
+    ------
+    Exception:
+        The first exception raised by `worker_fn`, after which the remaining items
+        are not processed. Worker functions that must not abort the whole batch
+        catch their errors and return a failure value instead.
+    """
+    return list(generic_parallel_stream(data, worker_fn, n_workers=n_workers))
 
 
 def generic_chunk_parallel(
@@ -115,7 +221,8 @@ def generic_chunk_parallel(
     chunk_size: int
         Size of the chunk
     n_workers: int
-        Number of workers to use (default: uses all the available processors)
+        Maximum number of chunks processed at once
+        (default: the size of the client worker pool)
 
     Returns
     -------
@@ -124,13 +231,10 @@ def generic_chunk_parallel(
         (start,end) of the chunk (end excluded),
         the second element of the tuple is the value returned by `worker_fn` for this slice.
     """
-    nb_chunks = (len(data) + chunk_size) // chunk_size
-    chunk_limits = []
-
-    for i in range(nb_chunks):
-        start = i * chunk_size
-        end = start + chunk_size
-        chunk_limits.append([start, end])
+    chunk_limits = (
+        (start, min(start + chunk_size, len(data)))
+        for start in range(0, len(data), chunk_size)
+    )
 
     def worker_wrapper(startend: Tuple[int, int]) -> R:
         _start, _end = startend
@@ -154,8 +258,11 @@ def generic_download(
         A functions that downloads what needs to be downloaded.
         It has one parameter which must be the same type as the
         items of `data`. If needed it can return a value.
+        Items whose download raises a `requests` exception (e.g. once
+        the retries are exhausted) get None.
     n_workers: int
-        Number of workers to use (default: uses all the available processors)
+        Maximum number of items downloaded at once
+        (default: the size of the client worker pool)
 
     Returns
     -------
@@ -164,7 +271,15 @@ def generic_download(
         the second element of the tuple
         is the value returned by `download_instance_fn` for this item.
     """
-    return generic_parallel(data, download_instance_fn, n_workers=n_workers)
+
+    def download(item: T) -> Optional[R]:
+        try:
+            return download_instance_fn(item)
+        except requests.exceptions.RequestException as e:
+            logger.warning("Cannot download %r: %s", item, e)
+            return None
+
+    return generic_parallel(data, download, n_workers=n_workers)
 
 
 def makedirs(path: str, exist_ok: bool = True) -> None:
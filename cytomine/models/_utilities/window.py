@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+import math
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from cytomine.models.model import Model
+
+
+def window_scale(
+    image: Any,
+    w: int,
+    h: int,
+    magnification: Optional[float] = None,
+    resolution: Optional[float] = None,
+) -> Tuple[int, Optional[int]]:
+    """Output size and pyramid zoom of a window of an image at a target
+    magnification or resolution (see `ImageInstance.window_scale()`)."""
+    if (magnification is None) == (resolution is None):
+        raise ValueError("Give either a target magnification or a target resolution.")
+
+    if magnification is not None:
+        if not image.magnification:
+            raise ValueError("The magnification of the image is unknown.")
+        downsampling = image.magnification / magnification
+    else:
+        if not image.physicalSizeX:
+            raise ValueError("The resolution of the image is unknown.")
+        downsampling = resolution / image.physicalSizeX  # type: ignore
+    # No upsampling beyond the full resolution
+    downsampling = max(1.0, downsampling)
+
+    max_size = max(1, round(max(w, h) / downsampling))
+    if image.zoom is None:
+        return max_size, None
+
+    level = min(int(math.log2(downsampling) + 1e-9), image.zoom)
+    return max_size, image.zoom - level
+
+
+def scaled_window(
+    image: Any,
+    w: int,
+    h: int,
+    magnification: Optional[float],
+    resolution: Optional[float],
+    max_size: Optional[Union[int, Tuple[int, ...]]],
+    zoom: Optional[int],
+) -> Tuple[Optional[Union[int, Tuple[int, ...]]], Optional[int]]:
+    """The `max_size` and `zoom` of a window request, computed from the target
+    magnification or resolution if any."""
+    if magnification is None and resolution is None:
+        return max_size, zoom
+    if max_size is not None or zoom is not None:
+        raise ValueError(
+            "A target magnification or resolution cannot be combined with max_size or zoom."
+        )
+    return window_scale(image, w, h, magnification, resolution)
+
+
+def window_request(
+    model: Model,
+    x: int,
+    y: int,
+    w: int,
+    h: int,
+    extension: str = "jpg",
+    mask: Optional[bool] = None,
+    alpha: Optional[bool] = None,
+    bits: int = 8,
+    annotations: Optional[List[int]] = None,
+    terms: Optional[List[int]] = None,
+    users: Optional[List[int]] = None,
+    reviewed: Optional[bool] = None,
+    complete: bool = True,
+    projection: Optional[str] = None,
+    max_size: Optional[Union[int, Tuple[int, ...]]] = None,
+    zoom: Optional[int] = None,
+) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Build the request of a window (rectangle) of an image or slice instance.
+    The parameters are the ones of `ImageInstance.window()`.
+
+    Returns
+    -------
+    uri : str
+        The window URI.
+    extension : str
+        The format of the returned window, which is "png" when an alpha mask is
+        requested in JPEG.
+    parameters : dict
+        The query parameters of the request.
+    """
+    if model.id is None:
+        raise ValueError("Cannot extract a window from an image with no ID.")
+
+    if extension not in ("jpg", "png", "tif", "tiff"):
+        extension = "jpg"
+
+    if alpha is None:
+        alphamask = None
+    elif alpha:
+        mask = None
+        alphamask = True
+        if extension == "jpg":
+            extension = "png"
+    else:
+        alphamask = False
+
+    # Temporary fix due to Cytomine-core
+    if mask is not None:
+        mask = str(mask).lower()  # type: ignore
+
+    if alphamask is not None:
+        alphamask = str(alphamask).lower()  # type: ignore
+    # ===
+
+    parameters = {
+        "annotations": (
+            ",".join(str(item) for item in annotations) if annotations else None
+        ),
+        "terms": ",".join(str(item) for item in terms) if terms else None,
+        "users": ",".join(str(item) for item in users) if users else None,
+        "reviewed": reviewed,
+        "bits": bits,
+        "mask": mask,
+        "alphaMask": alphamask,
+        "complete": complete,
+        "projection": projection,
+        "zoom": zoom,
+        "maxSize": max(max_size) if isinstance(max_size, tuple) else max_size,
+    }
+
+    uri = f"{model.callback_identifier}/{model.id}/window-{x}-{y}-{w}-{h}.{extension}"
+    return uri, extension, parameters
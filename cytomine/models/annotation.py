@@ -19,11 +19,19 @@
 import os
 from typing import Any, Dict, List, Optional, Union
 
+import requests  # type: ignore
+
 from cytomine.cytomine import Cytomine
 from cytomine.models.collection import Collection
 from cytomine.models.model import Model
 
-from ._utilities import generic_download, generic_image_dump, is_false
+from ._utilities import (
+    DumpError,
+    generic_image_content,
+    generic_image_dump,
+    generic_parallel_stream,
+    is_false,
+)
 
 
 class Annotation(Model):
@@ -153,25 +161,7 @@ class Annotation(Model):
             **kwargs: Any,  # pylint: disable=unused-argument
         ) -> str:
             extension = os.path.basename(file_path).split(".")[-1]
-            if mask and alpha:
-                image = "alphamask"
-                if extension == "jpg":
-                    extension = "png"
-            elif mask:
-                image = "mask"
-            else:
-                image = "crop"
-
-            if model.cropURL is None:
-                raise ValueError("cropURL is None")
-
-            return model.cropURL.replace(
-                "crop.png",
-                f"{image}.{extension}",
-            ).replace(
-                "crop.jpg",
-                f"{image}.{extension}",
-            )
+            return model._crop_url(extension, mask, alpha)  # pylint: disable=protected-access
 
         files = generic_image_dump(
             dest_pattern,
@@ -189,6 +179,82 @@ class Annotation(Model):
 
         return True
 
+    def dump_content(
+        self,
+        format: str = "jpg",
+        output: str = "bytes",
+        mask: bool = False,
+        alpha: bool = False,
+        bits: int = 8,
+        zoom: Optional[int] = None,
+        max_size: Optional[int] = None,
+        increase_area: Optional[float] = None,
+        contrast: Optional[float] = None,
+        gamma: Optional[float] = None,
+        colormap: Optional[int] = None,
+        inverse: Optional[bool] = None,
+        complete: bool = True,
+    ) -> Any:
+        """
+        Download the annotation crop in memory, with optional image modifications.
+        The other parameters are the ones of `dump()`.
+
+        Parameters
+        ----------
+        format : str, optional
+            The crop format: jpg, png or tif. An alpha mask is returned in png.
+        output : str, optional
+            "bytes" for the encoded image, "memoryview" for a memoryview of it, or
+            "array" for the image decoded into a NumPy array (requires Pillow).
+
+        Returns
+        -------
+        crop : bytes, memoryview or numpy.ndarray
+            The crop, None if the download failed.
+        """
+        if self.id is None:
+            raise ValueError("Cannot dump an annotation with no ID.")
+
+        parameters: Dict[str, Any] = {
+            "zoom": zoom,
+            "maxSize": max_size,
+            "increaseArea": increase_area,
+            "contrast": contrast,
+            "gamma": gamma,
+            "colormap": colormap,
+            "inverse": inverse,
+            "bits": bits,
+            "complete": complete,
+        }
+
+        return generic_image_content(
+            self,
+            self._crop_url(format, mask, alpha),
+            output,
+            **parameters,
+        )
+
+    def _crop_url(self, extension: str, mask: bool, alpha: bool) -> str:
+        if mask and alpha:
+            image = "alphamask"
+            if extension == "jpg":
+                extension = "png"
+        elif mask:
+            image = "mask"
+        else:
+            image = "crop"
+
+        if self.cropURL is None:
+            raise ValueError("cropURL is None")
+
+        return self.cropURL.replace(
+            "crop.png",
+            f"{image}.{extension}",
+        ).replace(
+            "crop.jpg",
+            f"{image}.{extension}",
+        )
+
 
 class AnnotationCollection(Collection):
     def __init__(
@@ -263,7 +329,8 @@ class AnnotationCollection(Collection):
         override: bool = True,
         **dump_params: Any,
     ) -> "AnnotationCollection":
-        """Download the crops of the annotations
+        """Download the crops of the annotations. See `cytomine.utilities.crops.CropStream`
+        for consuming the crops in memory as soon as they are downloaded.
 
         Parameters
         ----------
@@ -273,38 +340,50 @@ class AnnotationCollection(Collection):
         override : bool, optional
             True if a file with same name can be overrided by the new file.
         n_workers: int
-            Number of workers to use (default: uses all the available processors)
+            Maximum number of crops downloaded at once
+            (default: the size of the client worker pool)
         dump_params: dict
             Parameters for dumping the annotations (see Annotation.dump)
 
         Returns
         -------
         annotations: AnnotationCollection
-            Annotations that have been successfully downloaded (containing a `filenames` attribute)
+            Annotations that have been successfully downloaded (containing a `filenames` attribute).
+            The annotations whose crop could not be downloaded are left out,
+            and counted in a log message.
         """
 
         def dump_crop(an: Annotation) -> Union[bool, Annotation]:
-            if is_false(
-                an.dump(dest_pattern=dest_pattern, override=override, **dump_params)
-            ):
+            try:
+                if is_false(
+                    an.dump(dest_pattern=dest_pattern, override=override, **dump_params)
+                ):
+                    return False
+            except DumpError:
+                return False
+            except requests.exceptions.RequestException as e:
+                # Retries exhausted or host suspended by the circuit breaker
+                Cytomine.get_instance().logger.warning(
+                    "Cannot download the crop of annotation %s: %s", an.id, e
+                )
                 return False
 
             return an
 
-        results = generic_download(
+        collection = AnnotationCollection()
+        failed = []
+        for in_annot, out_annot in generic_parallel_stream(
             self,
-            download_instance_fn=dump_crop,
+            worker_fn=dump_crop,
             n_workers=n_workers,
-        )
-
-        # check errors
-        count_fail = 0
-        failed = []
-        for in_annot, out_annot in results:
+        ):
             if is_false(out_annot):
-                count_fail += 1
                 failed.append(in_annot.id)
+            else:
+                collection.append(out_annot)
 
+        # check errors
+        count_fail = len(failed)
         logger = Cytomine.get_instance().logger
         if count_fail > 0:
             n_annots = len(self)
@@ -315,8 +394,6 @@ class AnnotationCollection(Collection):
             )
             logger.debug("Annotation with crop download failure: %s", failed)
 
-        collection = AnnotationCollection()
-        collection.extend([an for _, an in results if not isinstance(an, bool) or an])
         return collection
 
 
@@ -18,12 +18,32 @@
 
 import copy
 from collections.abc import MutableSequence
-from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar, Union
-
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+)
+
+import requests  # type: ignore
+
+from cytomine import codec
+from cytomine.aio import AsyncCytomine
 from cytomine.cytomine import Cytomine
-from cytomine.models.model import Model
+from cytomine.models.model import Model, compact_models
 
-from ._utilities.parallel import generic_chunk_parallel
+from ._utilities.columns import ColumnBuilder
+from ._utilities.parallel import (
+    generic_chunk_parallel,
+    generic_parallel_stream,
+    is_false,
+)
 
 T = TypeVar("T")
 
@@ -64,6 +84,29 @@ class CollectionPartialUploadException(Exception):
         return self._failed
 
 
+class CollectionPartialFetchException(Exception):
+    """To be thrown when a page of a collection cannot be fetched
+    while streaming it.
+    """
+
+    def __init__(self, desc: str, offset: int) -> None:
+        """
+        Parameters
+        ----------
+        desc: str
+            Description of the exception
+        offset: int
+            Offset of the page that could not be fetched. Streaming can be
+            resumed from this offset.
+        """
+        super().__init__(desc)
+        self._offset = offset
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+
 class Collection(MutableSequence):
     def __init__(
         self,
@@ -78,44 +121,291 @@ class Collection(MutableSequence):
         self._allowed_filters: List[Optional[str]] = []
         self._filters = filters if filters is not None else {}
 
+        self._compact: bool = False  # populate with compact read-only models
+        self._raw: bool = False  # populate with the JSON objects, for columns
         self._total: int = 0  # total number of resources
         self._total_pages: Optional[int] = None  # total number of pages
 
         self.max: int = max
         self.offset: int = offset
 
-    def _fetch(self, append_mode: bool = False) -> Union[bool, "Collection"]:
+    def _check_fetchable(self) -> None:
         if len(self._filters) == 0 and None not in self._allowed_filters:
             raise ValueError("This collection cannot be fetched without a filter.")
 
+    def _fetch(self, append_mode: bool = False) -> Union[bool, "Collection"]:
+        self._check_fetchable()
         return Cytomine.get_instance().get_collection(
             self,
             self.parameters,
             append_mode,
         )
 
-    def fetch(self, max: Optional[int] = None) -> Union[bool, "Collection"]:
+    async def _fetch_async(self, append_mode: bool = False) -> Union[bool, "Collection"]:
+        self._check_fetchable()
+        return await AsyncCytomine.get_instance().get_collection(
+            self,
+            self.parameters,
+            append_mode,
+        )
+
+    def fetch(
+        self,
+        max: Optional[int] = None,
+        prefetch: int = 0,
+        compact: bool = False,
+    ) -> Union[bool, "Collection"]:
         """
         Fetch all collection by pages of `max` items.
         Parameters
         ----------
         max : int, None (optional)
             The number of item per page. If None, retrieve all collection.
+        prefetch : int
+            Maximum number of pages requested at once, once the collection size
+            is known (see `iter_pages`). Ignored if `max` is None.
+        compact : bool
+            True for populating the collection with compact read-only models
+            (see `CompactModel`), that use much less memory.
 
         Returns
         -------
         self    Collection, the fetched collection
+
+        Raises
+        ------
+        CollectionPartialFetchException
+            When a page cannot be fetched.
         """
+        self._compact = compact
+        if max:
+            for page in self.iter_pages(max, prefetch=prefetch, compact=compact):
+                self._append_page(page)
+            return self
+
+        return self._fetch()
+
+    async def fetch_async(self, max: Optional[int] = None) -> Union[bool, "Collection"]:
+        """Same as `fetch`, using the open `AsyncCytomine` client."""
         if max:
             self.max = max
-            n_pages = 0
-            while not self._total_pages or n_pages < self._total_pages:
-                self.fetch_next_page(True)
-                n_pages += 1
+            offset: Optional[int] = self.offset
+            while offset is not None:
+                page = self._new_page(offset)
+                if is_false(await page._fetch_async()):  # pylint: disable=protected-access
+                    raise CollectionPartialFetchException(
+                        f"Could not fetch page at offset {offset}",
+                        offset,
+                    )
+                self._append_page(page)
+                offset = self._next_offset(page)
 
             return self
 
-        return self._fetch()
+        return await self._fetch_async()
+
+    def _new_page(self, offset: int) -> "Collection":
+        page = copy.copy(self)
+        page._data = []  # pylint: disable=protected-access
+        page.offset = offset
+        return page
+
+    def _append_page(self, page: "Collection") -> None:
+        self._data += page.data()
+        self._total = page._total  # pylint: disable=protected-access
+        self._total_pages = page._total_pages  # pylint: disable=protected-access
+        self.offset = page.offset
+
+    def _next_offset(self, page: "Collection") -> Optional[int]:
+        """Offset of the page following `page`, None if `page` is the last one."""
+        offset = page.offset + len(page)
+        total = page._total  # pylint: disable=protected-access
+        if not self.max or len(page) == 0 or offset >= total:
+            return None
+        return offset
+
+    def _fetch_page(self, offset: int, retries: int = 0) -> "Collection":
+        page = self._new_page(offset)
+        error: Optional[requests.exceptions.RequestException] = None
+        for _ in range(retries + 1):
+            try:
+                if not is_false(page._fetch()):  # pylint: disable=protected-access
+                    return page
+            except requests.exceptions.RequestException as e:
+                # Retries of the client exhausted, or host suspended by the circuit breaker
+                error = e
+
+        raise CollectionPartialFetchException(
+            f"Could not fetch page at offset {offset}",
+            offset,
+        ) from error
+
+    def iter_pages(
+        self,
+        max: Optional[int] = None,
+        prefetch: int = 0,
+        retries: int = 0,
+        compact: bool = False,
+    ) -> Iterator["Collection"]:
+        """
+        Lazily fetch the collection by pages of `max` items, starting at the current
+        offset. Each page is a new collection of the same type, so that previous
+        pages can be garbage collected once consumed.
+
+        The first page gives the collection size: exactly ceil(size / max) pages are
+        requested, and iteration stops early on an empty page.
+
+        Parameters
+        ----------
+        max : int, None (optional)
+            The number of item per page. If None, use the collection `max`
+            (the whole collection is fetched at once if it is not set either).
+        prefetch : int
+            Maximum number of pages requested at once. Once the first page gives
+            the collection size, the following pages are requested concurrently
+            and yielded in order. 0 or 1 for requesting pages one after another.
+        retries : int
+            Number of additional attempts for a page that cannot be fetched, on top
+            of the retries of the client retry policy (see `RetryPolicy`).
+        compact : bool
+            True for populating the pages with compact read-only models.
+
+        Yields
+        ------
+        page : Collection
+            A fetched page.
+
+        Raises
+        ------
+        CollectionPartialFetchException
+            When a page cannot be fetched.
+        """
+        if max:
+            self.max = max
+        self._compact = compact
+
+        page = self._fetch_page(self.offset, retries)
+        yield page
+
+        offset = self._next_offset(page)
+        if offset is None:
+            return
+
+        if prefetch > 1:
+            pages = generic_parallel_stream(
+                range(offset, page._total, self.max),  # pylint: disable=protected-access
+                lambda _offset: self._fetch_page(_offset, retries),
+                n_workers=prefetch,
+                ordered=True,
+            )
+            for _, prefetched in pages:
+                if prefetched is None or len(prefetched) == 0:
+                    return
+                yield prefetched
+            return
+
+        while offset is not None:
+            page = self._fetch_page(offset, retries)
+            if len(page) == 0:
+                return
+            yield page
+            offset = self._next_offset(page)
+
+    def stream(
+        self,
+        max: Optional[int] = None,
+        prefetch: int = 0,
+        compact: bool = False,
+    ) -> Iterator[Any]:
+        """
+        Lazily fetch the collection by pages of `max` items and yield its items
+        one by one. Only the current page (and the prefetched ones) are kept in memory.
+
+        Parameters
+        ----------
+        max : int, None (optional)
+            The number of item per page. If None, use the collection `max`
+            (the whole collection is fetched at once if it is not set either).
+        prefetch : int
+            Maximum number of pages requested at once (see `iter_pages`).
+        compact : bool
+            True for yielding compact read-only models.
+
+        Yields
+        ------
+        item : Model
+            The items of the collection.
+        """
+        for page in self.iter_pages(max, prefetch=prefetch, compact=compact):
+            yield from page
+
+    def fetch_columnar(
+        self,
+        max: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+        backend: str = "numpy",
+        prefetch: int = 0,
+        retries: int = 0,
+    ) -> Any:
+        """
+        Fetch the collection as columns, with one typed array per field. The JSON
+        objects are decoded straight into columns, so that no model instance is
+        ever created. The collection itself is left empty. The pages are fetched
+        like `iter_pages()` does.
+
+        Parameters
+        ----------
+        max : int, None (optional)
+            The number of item per page. If None, retrieve all collection at once.
+        fields : list of str (optional)
+            The fields to keep, named like the model attributes. All by default.
+        backend : str
+            "numpy" for a dict of NumPy arrays (see `numpy_column` for the column
+            types), "arrow" for a `pyarrow.Table`.
+        prefetch : int
+            Maximum number of pages requested at once (see `iter_pages`).
+        retries : int
+            Number of additional attempts for a page that cannot be fetched.
+
+        Returns
+        -------
+        columns : dict|pyarrow.Table
+            The columns of the collection.
+
+        Raises
+        ------
+        CollectionPartialFetchException
+            When a page cannot be fetched.
+
+        Examples
+        --------
+        >>> columns = AnnotationCollection(project=1).fetch_columnar(fields=["image", "area"])
+        >>> images, inverse = numpy.unique(columns["image"], return_inverse=True)
+        >>> area_per_image = numpy.bincount(inverse, weights=columns["area"])
+        """
+        self._check_fetchable()
+        columns = ColumnBuilder(fields)
+        self._raw = True
+        try:
+            for page in self.iter_pages(max, prefetch=prefetch, retries=retries):
+                columns.extend(page.data())
+        finally:
+            self._raw = False
+
+        return columns.build(backend)
+
+    def to_columns(
+        self,
+        fields: Optional[Sequence[str]] = None,
+        backend: str = "numpy",
+    ) -> Any:
+        """
+        Columns of the fetched items, with one typed array per field.
+        See `fetch_columnar` for fetching a collection without creating its items.
+        """
+        columns = ColumnBuilder(fields)
+        columns.extend(item._to_dict() for item in self._data)  # pylint: disable=protected-access
+        return columns.build(backend)
 
     def fetch_with_filter(
         self,
@@ -126,8 +416,20 @@ class Collection(MutableSequence):
         self._filters[key] = value
         return self.fetch(max)
 
+    async def fetch_with_filter_async(
+        self,
+        key: str,
+        value: Any,
+        max: Optional[int] = None,
+    ) -> Union[bool, "Collection"]:
+        self._filters[key] = value
+        return await self.fetch_async(max)
+
     def fetch_next_page(self, append_mode: bool = False) -> Union[bool, "Collection"]:
-        self.offset = min(self._total, self.offset + self.max)
+        """Fetch the page following the last fetched one
+        (the page at the current offset if nothing has been fetched yet)."""
+        if self._total_pages is not None:
+            self.offset = min(self._total, self.offset + self.max)
         return self._fetch(append_mode)
 
     def fetch_previous_page(self) -> Union[bool, "Collection"]:
@@ -139,7 +441,21 @@ class Collection(MutableSequence):
             _tmp = self.__class__(model=self._model)
             _tmp.extend(collection)
             collection = _tmp
-        return Cytomine.get_instance().post_collection(collection)
+        return self._post_chunk(collection)
+
+    @staticmethod
+    def _post_chunk(collection: "Collection") -> bool:
+        try:
+            return Cytomine.get_instance().post_collection(collection)
+        except requests.exceptions.RequestException as e:
+            # Host suspended by the circuit breaker, or connection error (not retried)
+            Cytomine.get_instance().logger.warning(
+                "Cannot upload %d items to %s: %s",
+                len(collection),
+                collection.uri(without_filters=True),
+                e,
+            )
+            return False
 
     def save(self, chunk: int = 15, n_workers: int = 0) -> Union[bool, "Collection"]:
         """
@@ -147,8 +463,8 @@ class Collection(MutableSequence):
             Maximum number of object to send at once in a single HTTP request.
             None for sending them all at once.
         n_workers: int
-            Number of threads to use for sending chunked requests (ignored if chunk is None).
-            Value 0 for using as many threads as cpus on the machine.
+            Maximum number of chunked requests sent at once (ignored if chunk is None).
+            Value 0 for using the size of the client worker pool.
         """
         if chunk is None:
             return Cytomine.get_instance().post_collection(self)
@@ -179,27 +495,40 @@ class Collection(MutableSequence):
         raise ValueError(f"Invalid value '{chunk}' for chunk parameter.")
 
     def to_json(self, **dump_parameters: Dict[str, Any]) -> str:
-        return f"[{','.join([d.to_json(**dump_parameters) for d in self._data])}]"
+        return codec.dumps(
+            [d._to_dict() for d in self._data],  # pylint: disable=protected-access
+            **dump_parameters,
+        )
 
     def populate(
         self,
         attributes: Dict[str, Any],
         append_mode: bool = False,
     ) -> "Collection":
-        data = [
-            self._model().populate(instance) for instance in attributes["collection"]
-        ]
+        data: List[Any]
+        if self._raw:
+            data = list(attributes["collection"])
+        elif self._compact:
+            data = self._compact_models(attributes["collection"])
+        else:
+            data = [self._new_model().populate(i) for i in attributes["collection"]]
         if append_mode:
             self._data += data
         else:
             self._data = data
-        self._total = attributes["size"]
+        self._total = attributes.get("size", len(data))
         if self.max is None or self.max == 0:
             self._total_pages = 1
         else:
-            self._total_pages = self._total // self.max
+            self._total_pages = -(-self._total // self.max)  # ceil
         return self
 
+    def _new_model(self) -> Model:
+        return self._model()
+
+    def _compact_models(self, instances: List[Dict[str, Any]]) -> List[Any]:
+        return compact_models(self._new_model(), instances)
+
     @property
     def filters(self) -> Dict[str, Any]:
         return self._filters
@@ -352,20 +681,12 @@ class DomainCollection(Collection):
             f"{super().uri(without_filters)}"
         )
 
-    def populate(
-        self,
-        attributes: Any,
-        append_mode: bool = False,
-    ) -> "DomainCollection":
-        data = [
-            self._model(self._object).populate(instance)
-            for instance in attributes["collection"]
-        ]
-        if append_mode:
-            self._data += data
-        else:
-            self._data = data
-        return self
+    def _new_model(self) -> Model:
+        return self._model(self._object)
+
+    def _compact_models(self, instances: List[Dict[str, Any]]) -> List[Any]:
+        # Bound to the domain object shared by the pages, so that they share a class
+        return compact_models(self._new_model(), instances, self._object)
 
     @property
     def _obj(self) -> Model:
@@ -382,4 +703,4 @@ class DomainCollection(Collection):
             _tmp = self.__class__(model=self._model, object=self._obj)
             _tmp.extend(collection)
             collection = _tmp
-        return Cytomine.get_instance().post_collection(collection)
+        return self._post_chunk(collection)
@@ -21,10 +21,12 @@ import re
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 from cytomine.cytomine import Cytomine, deprecated
+from cytomine.download import DEFAULT_PART_SIZE
 from cytomine.models.collection import Collection
 from cytomine.models.model import Model
 
-from ._utilities import generic_image_dump
+from ._utilities import generic_image_content, generic_image_dump
+from ._utilities.window import scaled_window, window_request, window_scale
 
 
 class ImageServer(Model):
@@ -105,6 +107,9 @@ class AbstractImage(Model):
         self,
         dest_pattern: str = "{originalFilename}",
         override: bool = True,
+        n_workers: int = 1,
+        part_size: int = DEFAULT_PART_SIZE,
+        checksum: Optional[str] = None,
         **kwargs: Any,
     ) -> bool:
         """
@@ -117,6 +122,13 @@ class AbstractImage(Model):
             "{X}" patterns are replaced by the value of X attribute if it exists.
         override : bool, optional
             True if a file with same name can be overrided by the new file.
+        n_workers : int, optional
+            Number of parts of the image downloaded at once with HTTP range requests.
+            An interrupted download is resumed by the next call.
+        part_size : int, optional
+            Size in bytes of the parts downloaded by the workers.
+        checksum : str, optional
+            Expected checksum of the image, as "<algorithm>:<hex digest>".
 
         Returns
         -------
@@ -135,6 +147,11 @@ class AbstractImage(Model):
             dump_url_fn,
             override=override,
             check_extension=False,
+            download_options={
+                "n_workers": n_workers,
+                "part_size": part_size,
+                "checksum": checksum,
+            },
         )
         return len(files) > 0
 
@@ -341,10 +358,57 @@ class ImageInstance(Model):
 
         return True
 
+    def dump_content(
+        self,
+        format: str = "jpg",
+        output: str = "bytes",
+        max_size: Optional[Union[int, Tuple[int, ...]]] = None,
+        bits: int = 8,
+        contrast: Optional[float] = None,
+        gamma: Optional[float] = None,
+        colormap: Optional[int] = None,
+        inverse: Optional[bool] = None,
+    ) -> Any:
+        """
+        Download the *reference* slice image in memory, with optional image
+        modifications. The other parameters are the ones of `dump()`.
+
+        Parameters
+        ----------
+        format : str, optional
+            The image format: jpg, png or tif.
+        output : str, optional
+            "bytes" for the encoded image, "memoryview" for a memoryview of it, or
+            "array" for the image decoded into a NumPy array (requires Pillow).
+
+        Returns
+        -------
+        image : bytes, memoryview or numpy.ndarray
+            The image, None if the download failed.
+        """
+        parameters: Dict[str, Any] = {
+            "maxSize": max(max_size) if isinstance(max_size, tuple) else max_size,
+            "contrast": contrast,
+            "gamma": gamma,
+            "colormap": colormap,
+            "inverse": inverse,
+            "bits": bits,
+        }
+
+        return generic_image_content(
+            self,
+            f"{self.callback_identifier}/{self.id}/thumb.{format}",
+            output,
+            **parameters,
+        )
+
     def download(
         self,
         dest_pattern: str = "{originalFilename}",
         override: bool = True,
+        n_workers: int = 1,
+        part_size: int = DEFAULT_PART_SIZE,
+        checksum: Optional[str] = None,
         **kwargs: Any,
     ) -> bool:
         """
@@ -357,6 +421,13 @@ class ImageInstance(Model):
             "{X}" patterns are replaced by the value of X attribute if it exists.
         override : bool, optional
             True if a file with same name can be overrided by the new file.
+        n_workers : int, optional
+            Number of parts of the image downloaded at once with HTTP range requests.
+            An interrupted download is resumed by the next call.
+        part_size : int, optional
+            Size in bytes of the parts downloaded by the workers.
+        checksum : str, optional
+            Expected checksum of the image, as "<algorithm>:<hex digest>".
 
         Returns
         -------
@@ -375,12 +446,55 @@ class ImageInstance(Model):
             dump_url_fn,
             override=override,
             check_extension=False,
+            download_options={
+                "n_workers": n_workers,
+                "part_size": part_size,
+                "checksum": checksum,
+            },
         )
         return len(files) > 0
 
     def __str__(self) -> str:
         return f"[{self.callback_identifier}] {self.id} : {self.instanceFilename}"
 
+    def window_scale(
+        self,
+        w: int,
+        h: int,
+        magnification: Optional[float] = None,
+        resolution: Optional[float] = None,
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Output size and pyramid zoom of a window of this image at a target
+        magnification or resolution.
+
+        The zoom is the one of the lowest resolution pyramid level that is still at
+        least as resolved as the target, so that the image server reads the fewest
+        pixels, and the output size is the size of the window at the target.
+        The zoom levels of the image (`zoom` attribute) are assumed to halve the
+        resolution from one to the next, the highest zoom being the full resolution.
+
+        Parameters
+        ----------
+        w : int
+            The window width at full resolution.
+        h : int
+            The window height at full resolution.
+        magnification : float, optional
+            The target objective magnification (e.g. 10 for 10x).
+        resolution : float, optional
+            The target resolution, in micrometers per pixel.
+
+        Returns
+        -------
+        max_size : int
+            The size (largest side) of the window at the target.
+        zoom : int
+            The zoom of the pyramid level to read, None if the zoom levels of the
+            image are unknown.
+        """
+        return window_scale(self, w, h, magnification, resolution)
+
     def window(
         self,
         x: int,
@@ -400,6 +514,8 @@ class ImageInstance(Model):
         projection: Optional[str] = None,
         max_size: Optional[Union[int, Tuple[int, ...]]] = None,
         zoom: Optional[int] = None,
+        magnification: Optional[float] = None,
+        resolution: Optional[float] = None,
     ) -> bool:
         """
         Extract a window (rectangle) from an image and download it.
@@ -446,6 +562,13 @@ class ImageInstance(Model):
             Maximum size (width or height) of returned image. None to get original size.
         zoom : int, optional
             Optional image zoom number
+        magnification : float, optional
+            Target objective magnification of the window (e.g. 10 for 10x), instead of
+            max_size and zoom: the window is read from the cheapest pyramid level and
+            returned at this magnification (see `window_scale()`).
+        resolution : float, optional
+            Target resolution of the window in micrometers per pixel, instead of
+            max_size and zoom.
 
         Returns
         -------
@@ -471,55 +594,99 @@ class ImageInstance(Model):
         filename, extension = os.path.splitext(os.path.basename(dest_pattern))
         extension = extension[1:]
 
-        if extension not in ("jpg", "png", "tif", "tiff"):
-            extension = "jpg"
-
         if destination and not os.path.exists(destination):
             os.makedirs(destination)
 
-        if alpha is None:
-            alphamask = None
-        elif alpha:
-            mask = None
-            alphamask = True
-            if extension == "jpg":
-                extension = "png"
-        else:
-            alphamask = False
-
-        # Temporary fix due to Cytomine-core
-        if mask is not None:
-            mask = str(mask).lower()  # type: ignore
+        max_size, zoom = scaled_window(self, w, h, magnification, resolution, max_size, zoom)
+        uri, extension, parameters = window_request(
+            self,
+            x,
+            y,
+            w,
+            h,
+            extension,
+            mask=mask,
+            alpha=alpha,
+            bits=bits,
+            annotations=annotations,
+            terms=terms,
+            users=users,
+            reviewed=reviewed,
+            complete=complete,
+            projection=projection,
+            max_size=max_size,
+            zoom=zoom,
+        )
+        file_path = os.path.join(destination, f"{filename}.{extension}")
 
-        if alphamask is not None:
-            alphamask = str(alphamask).lower()  # type: ignore
-        # ===
+        return Cytomine.get_instance().download_file(uri, file_path, override, parameters)
 
-        parameters = {
-            "annotations": (
-                ",".join(str(item) for item in annotations) if annotations else None
-            ),
-            "terms": ",".join(str(item) for item in terms) if terms else None,
-            "users": ",".join(str(item) for item in users) if users else None,
-            "reviewed": reviewed,
-            "bits": bits,
-            "mask": mask,
-            "alphaMask": alphamask,
-            "complete": complete,
-            "projection": projection,
-            "zoom": zoom,
-            "maxSize": max(max_size) if isinstance(max_size, tuple) else max_size,
-        }
+    def window_content(
+        self,
+        x: int,
+        y: int,
+        w: int,
+        h: int,
+        format: str = "jpg",
+        output: str = "bytes",
+        mask: Optional[bool] = None,
+        alpha: Optional[bool] = None,
+        bits: int = 8,
+        annotations: Optional[List[int]] = None,
+        terms: Optional[List[int]] = None,
+        users: Optional[List[int]] = None,
+        reviewed: Optional[bool] = None,
+        complete: bool = True,
+        projection: Optional[str] = None,
+        max_size: Optional[Union[int, Tuple[int, ...]]] = None,
+        zoom: Optional[int] = None,
+        magnification: Optional[float] = None,
+        resolution: Optional[float] = None,
+    ) -> Any:
+        """
+        Extract a window (rectangle) from an image in memory, without going
+        through the disk. The other parameters are the ones of `window()`.
 
-        file_path = os.path.join(destination, f"{filename}.{extension}")
+        Parameters
+        ----------
+        format : str, optional
+            The window format: jpg, png or tif. An alpha mask is returned in png.
+        output : str, optional
+            "bytes" for the encoded image, "memoryview" for a memoryview of it, or
+            "array" for the image decoded into a NumPy array (requires Pillow).
+        magnification : float, optional
+            Target objective magnification of the window.
+        resolution : float, optional
+            Target resolution of the window in micrometers per pixel.
 
-        return Cytomine.get_instance().download_file(
-            f"{self.callback_identifier}/{self.id}/window-{x}-{y}-{w}-{h}.{extension}",
-            file_path,
-            override,
-            parameters,
+        Returns
+        -------
+        window : bytes, memoryview or numpy.ndarray
+            The window, None if the download failed.
+        """
+        max_size, zoom = scaled_window(self, w, h, magnification, resolution, max_size, zoom)
+        uri, _, parameters = window_request(
+            self,
+            x,
+            y,
+            w,
+            h,
+            format,
+            mask=mask,
+            alpha=alpha,
+            bits=bits,
+            annotations=annotations,
+            terms=terms,
+            users=users,
+            reviewed=reviewed,
+            complete=complete,
+            projection=projection,
+            max_size=max_size,
+            zoom=zoom,
         )
 
+        return generic_image_content(self, uri, output, **parameters)
+
 
 class ImageInstanceCollection(Collection):
     def __init__(
@@ -728,54 +895,88 @@ class SliceInstance(Model):
         filename, extension = os.path.splitext(os.path.basename(dest_pattern))
         extension = extension[1:]
 
-        if extension not in ("jpg", "png", "tif", "tiff"):
-            extension = "jpg"
-
         if destination and not os.path.exists(destination):
             os.makedirs(destination)
 
-        if alpha is None:
-            alphamask = None
-        elif alpha:
-            mask = None
-            alphamask = True
-            if extension == "jpg":
-                extension = "png"
-        else:
-            alphamask = False
-
-        # Temporary fix due to Cytomine-core
-        if mask is not None:
-            mask = str(mask).lower()  # type: ignore
+        uri, extension, parameters = window_request(
+            self,
+            x,
+            y,
+            w,
+            h,
+            extension,
+            mask=mask,
+            alpha=alpha,
+            bits=bits,
+            annotations=annotations,
+            terms=terms,
+            users=users,
+            reviewed=reviewed,
+            complete=complete,
+            max_size=max_size,
+            zoom=zoom,
+        )
+        file_path = os.path.join(destination, f"{filename}.{extension}")
 
-        if alphamask is not None:
-            alphamask = str(alphamask).lower()  # type: ignore
-        # ===
+        return Cytomine.get_instance().download_file(uri, file_path, override, parameters)
 
-        parameters = {
-            "annotations": (
-                ",".join(str(item) for item in annotations) if annotations else None
-            ),
-            "terms": ",".join(str(item) for item in terms) if terms else None,
-            "users": ",".join(str(item) for item in users) if users else None,
-            "reviewed": reviewed,
-            "bits": bits,
-            "mask": mask,
-            "alphaMask": alphamask,
-            "complete": complete,
-            "zoom": zoom,
-            "maxSize": max(max_size) if isinstance(max_size, tuple) else max_size,
-        }
+    def window_content(
+        self,
+        x: int,
+        y: int,
+        w: int,
+        h: int,
+        format: str = "jpg",
+        output: str = "bytes",
+        mask: Optional[bool] = None,
+        alpha: Optional[bool] = None,
+        bits: int = 8,
+        annotations: Optional[List[int]] = None,
+        terms: Optional[List[int]] = None,
+        users: Optional[List[int]] = None,
+        reviewed: Optional[bool] = None,
+        complete: bool = True,
+        max_size: Optional[Union[int, Tuple[int, ...]]] = None,
+        zoom: Optional[int] = None,
+    ) -> Any:
+        """
+        Extract a window (rectangle) from an image in memory, without going
+        through the disk. The other parameters are the ones of `window()`.
 
-        file_path = os.path.join(destination, f"{filename}.{extension}")
+        Parameters
+        ----------
+        format : str, optional
+            The window format: jpg, png or tif. An alpha mask is returned in png.
+        output : str, optional
+            "bytes" for the encoded image, "memoryview" for a memoryview of it, or
+            "array" for the image decoded into a NumPy array (requires Pillow).
 
-        return Cytomine.get_instance().download_file(
-            f"{self.callback_identifier}/{self.id}/window-{x}-{y}-{w}-{h}.{extension}",
-            file_path,
-            override,
-            parameters,
+        Returns
+        -------
+        window : bytes, memoryview or numpy.ndarray
+            The window, None if the download failed.
+        """
+        uri, _, parameters = window_request(
+            self,
+            x,
+            y,
+            w,
+            h,
+            format,
+            mask=mask,
+            alpha=alpha,
+            bits=bits,
+            annotations=annotations,
+            terms=terms,
+            users=users,
+            reviewed=reviewed,
+            complete=complete,
+            max_size=max_size,
+            zoom=zoom,
         )
 
+        return generic_image_content(self, uri, output, **parameters)
+
 
 class SliceInstanceCollection(Collection):
     def __init__(
@@ -16,12 +16,30 @@
 
 # pylint: disable=invalid-name,unused-argument
 
-import json
-from typing import Any, Dict, Optional, Union
+import functools
+from collections import namedtuple
+from keyword import iskeyword
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
 
+from cytomine import codec
+from cytomine.aio import AsyncCytomine
 from cytomine.cytomine import Cytomine
 
 
+def attribute_name(key: str) -> Optional[str]:
+    """Name of the model attribute storing the value of a server key,
+    None if the key must be ignored."""
+    if key.startswith("id_"):
+        key = key[3:]
+    if key == "uri":
+        key = "uri_"
+    if key.startswith("_"):
+        return None
+    if key == "class":
+        key += "_"
+    return key
+
+
 class Model:
     def __init__(self, **attributes: Any) -> None:
         # In some cases, a model can have some request parameters.
@@ -42,6 +60,18 @@ class Model:
 
         return Cytomine.get_instance().get_model(self, self.query_parameters)
 
+    async def fetch_async(self, id: Optional[int] = None) -> Union[bool, "Model"]:
+        """Same as `fetch`, using the open `AsyncCytomine` client."""
+        if self.id is None and id is None:
+            raise ValueError("Cannot fetch a model with no ID.")
+        if id is not None:
+            self.id = id
+
+        return await AsyncCytomine.get_instance().get_model(
+            self,
+            self.query_parameters,
+        )
+
     def save(self) -> Union[bool, "Model"]:
         if self.id is None:
             return Cytomine.get_instance().post_model(self)
@@ -76,25 +106,23 @@ class Model:
     def populate(self, attributes: Dict[Any, Any]) -> "Model":
         if attributes:
             for key, value in attributes.items():
-                if key.startswith("id_"):
-                    key = key[3:]
-                if key == "uri":
-                    key = "uri_"
-                if not key.startswith("_"):
-                    if key == "class":
-                        key += "_"
-                    setattr(self, key, value)
+                name = attribute_name(key)
+                if name is not None:
+                    setattr(self, name, value)
         return self
 
-    def to_json(self, **dump_parameters: Any) -> str:
-        d = dict(
-            (k, v)
+    def _to_dict(self) -> Dict[str, Any]:
+        d = {
+            k: v
             for k, v in self.__dict__.items()
             if v is not None and not k.startswith("_")
-        )
+        }
         if "uri_" in d:
             d["uri"] = d.pop("uri_")
-        return json.dumps(d, **dump_parameters)
+        return d
+
+    def to_json(self, **dump_parameters: Any) -> str:
+        return codec.dumps(self._to_dict(), **dump_parameters)
 
     def uri(self) -> str:
         if self.is_new():
@@ -114,6 +142,104 @@ class Model:
         return f"[{self.callback_identifier}] {self.id} : {self.name}"
 
 
+class CompactModel:
+    """Base class of compact, read-only representations of models, used for bulk
+    fetches (see `Collection.fetch(compact=True)`). Attribute values are stored in
+    a tuple instead of an instance dictionary. Use `to_model()` to get a full model.
+    """
+
+    __slots__ = ()
+    _fields: Tuple[str, ...]  # provided by the generated namedtuple base
+    _model: Type[Model] = Model
+    # Builds the empty model populated by `to_model()`, e.g. bound to the domain
+    # object of the collection for domain models. Defaults to `_model()`.
+    _factory: Optional[Callable[[], Model]] = None
+
+    def _to_dict(self) -> Dict[str, Any]:
+        d = {
+            k: v
+            for k, v in zip(self._fields, self)  # type: ignore
+            if v is not None
+        }
+        if "uri_" in d:
+            d["uri"] = d.pop("uri_")
+        return d
+
+    def to_json(self, **dump_parameters: Any) -> str:
+        return codec.dumps(self._to_dict(), **dump_parameters)
+
+    def to_model(self) -> Model:
+        model = self._factory() if self._factory is not None else self._model()
+        return model.populate(self._to_dict())
+
+    @property
+    def callback_identifier(self) -> str:
+        return self._model.__name__.lower()
+
+    def __str__(self) -> str:
+        return str(self.to_model())
+
+
+_compact_model_classes: Dict[Tuple[Type[Model], Tuple[str, ...]], Type[CompactModel]] = {}
+
+
+def compact_model_class(model: Type[Model], fields: Tuple[str, ...]) -> Type[CompactModel]:
+    """Get the compact class of a model for the given attributes."""
+    key = (model, fields)
+    if key not in _compact_model_classes:
+        name = f"Compact{model.__name__}"
+        _compact_model_classes[key] = type(
+            name,
+            (CompactModel, namedtuple(name, fields)),  # type: ignore
+            {"__slots__": (), "_model": model},
+        )
+    return _compact_model_classes[key]
+
+
+@functools.lru_cache(maxsize=256)
+def domain_compact_model_class(
+    compact_class: Type[CompactModel],
+    object: Model,
+) -> Type[CompactModel]:
+    """Get the compact class of a domain model, bound to its domain `object`."""
+    model: Any = compact_class._model  # pylint: disable=protected-access
+    factory = functools.partial(model, object)
+    return type(
+        compact_class.__name__,
+        (compact_class,),
+        {"__slots__": (), "_factory": staticmethod(factory)},
+    )
+
+
+def compact_models(
+    template: Model,
+    instances: List[Dict[str, Any]],
+    object: Optional[Model] = None,
+) -> List[CompactModel]:
+    """Build the compact representation of a list of server responses
+    for the model of `template`, an empty model of the expected type.
+    `object` is the domain object of domain models, that cannot be created
+    without it by `CompactModel.to_model()`."""
+    defaults = {k: v for k, v in template.__dict__.items() if not k.startswith("_")}
+    names = {key: attribute_name(key) for instance in instances for key in instance}
+    keys = {
+        name: key
+        for key, name in names.items()
+        if name and name.isidentifier() and not iskeyword(name)
+    }
+
+    fields = tuple(dict.fromkeys([*defaults, *keys]))
+    compact_class = compact_model_class(type(template), fields)
+    if object is not None:
+        compact_class = domain_compact_model_class(compact_class, object)  # type: ignore
+    make = compact_class._make  # type: ignore
+    lookups = [(keys.get(field), defaults.get(field)) for field in fields]
+    return [
+        make([instance.get(key, default) if key else default for key, default in lookups])
+        for instance in instances
+    ]
+
+
 class DomainModel(Model):
     def __init__(self, object: "Model", **attributes: Any) -> None:
         super().__init__(**attributes)
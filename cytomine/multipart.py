@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+# pylint: disable=import-outside-toplevel
+
+import hashlib
+import io
+import logging
+import mmap
+import os
+import threading
+import uuid
+from typing import Callable, Iterator, Optional, Tuple, Union
+
+import requests  # type: ignore
+from urllib3.fields import RequestField
+
+from cytomine.download import TransferCheckpoint
+
+DEFAULT_BUFFER_SIZE = 2**20
+# Reads start at multiples of the memory mapping granularity (a multiple of the
+# page size), so that they map to whole pages of the page cache.
+ALIGNMENT = mmap.ALLOCATIONGRANULARITY
+
+
+class MultipartFileStream:
+    """
+    Body of a `multipart/form-data` request with a single file field, streamed from
+    the file in large blocks. It replaces `MultipartEncoder` for uploads: the file is
+    memory-mapped and sent by page-aligned slices of the mapping, which the socket
+    sends without copying them into Python objects. When the file cannot be mapped,
+    it is read with unbuffered aligned reads into a reused buffer.
+
+    The body is iterable several times, so that a request can be sent again, and
+    it has a length, so that it is sent with a `Content-Length` header.
+
+    Parameters
+    ----------
+    field : str
+        The name of the form field.
+    path : str
+        The path of the file.
+    filename : str (optional)
+        The file name sent in the form (default: the base name of `path`).
+    content_type : str (optional)
+        The content type of the file part.
+    start : int
+        Offset of the first byte of the file to send.
+    end : int (optional)
+        Offset of the byte after the last byte to send (default: the file size).
+    buffer_size : int
+        Size of the blocks sent, rounded up to the alignment of the reads.
+    use_mmap : bool
+        False for always reading the file into a buffer.
+    progress : callable (optional)
+        Called as `progress(sent, total)` with the number of bytes of the body
+        sent so far.
+    """
+
+    def __init__(
+        self,
+        field: str,
+        path: str,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        start: int = 0,
+        end: Optional[int] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        use_mmap: bool = True,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        self.path = path
+        self.start = start
+        self.end = os.path.getsize(path) if end is None else end
+        self.buffer_size = max(ALIGNMENT, -(-buffer_size // ALIGNMENT) * ALIGNMENT)
+        self.use_mmap = use_mmap
+        self.progress = progress
+
+        self.boundary = uuid.uuid4().hex
+        part = RequestField(
+            name=field,
+            data=b"",
+            filename=os.path.basename(path) if filename is None else filename,
+        )
+        part.make_multipart(content_type=content_type)
+        self._head = f"--{self.boundary}\r\n{part.render_headers()}".encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return len(self._head) + self.end - self.start + len(self._tail)
+
+    def __iter__(self) -> Iterator[Union[bytes, memoryview]]:
+        total, sent = len(self), 0
+        for block in self._blocks():
+            yield block
+            sent += len(block)
+            if self.progress is not None:
+                self.progress(sent, total)
+
+    def _blocks(self) -> Iterator[Union[bytes, memoryview]]:
+        yield self._head
+        if self.end > self.start:
+            with open(self.path, "rb", buffering=0) as file:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(
+                        file.fileno(),
+                        self.start,
+                        self.end - self.start,
+                        os.POSIX_FADV_SEQUENTIAL,
+                    )
+                if self.use_mmap:
+                    try:
+                        yield from self._mapped_blocks(file.fileno())
+                    except (OSError, ValueError):  # pragma: no cover
+                        # Not mappable (e.g. a pipe or a special file system)
+                        yield from self._read_blocks(file)
+                else:
+                    yield from self._read_blocks(file)
+        yield self._tail
+
+    def _aligned_ranges(self) -> Iterator[range]:
+        """Ranges of the file sent in one block each: every block but the first
+        starts at an aligned offset."""
+        offset = self.start
+        while offset < self.end:
+            block_end = min((offset // self.buffer_size + 1) * self.buffer_size, self.end)
+            yield range(offset, block_end)
+            offset = block_end
+
+    def _mapped_blocks(self, fd: int) -> Iterator[memoryview]:
+        origin = self.start - self.start % ALIGNMENT
+        with mmap.mmap(
+            fd,
+            self.end - origin,
+            access=mmap.ACCESS_READ,
+            offset=origin,
+        ) as mapping:
+            for block in self._aligned_ranges():
+                view = memoryview(mapping)[block.start - origin : block.stop - origin]
+                try:
+                    yield view
+                finally:
+                    # The mapping cannot be closed while slices of it are referenced
+                    view.release()
+
+    def _read_blocks(self, file: io.FileIO) -> Iterator[memoryview]:
+        buffer = bytearray(self.buffer_size)
+        view = memoryview(buffer)
+        file.seek(self.start)
+        for block in self._aligned_ranges():
+            size = len(block)
+            read = 0
+            while read < size:
+                n = file.readinto(view[read:size])
+                if not n:
+                    raise EOFError(f"{self.path} is shorter than expected.")
+                read += n
+            yield view[:size]
+
+
+class ChunkedUpload:
+    """
+    Upload of a file in chunks, each sent with a `Content-Range` header and retried
+    on failure. The acknowledged chunks are recorded in a checkpoint saved in
+    `checkpoints`, so that an interrupted upload is resumed by the next one. The
+    server completes the upload when it receives the last chunk, which is always
+    sent once all the others are acknowledged.
+
+    `send(headers, content_type, data, retries)` sends the POST request of a chunk
+    with the given headers added to the client ones, with the client
+    authentication, retry policy and image limiter.
+    """
+
+    def __init__(
+        self,
+        send: Callable[..., requests.Response],
+        url: str,
+        key: str,
+        filename: str,
+        checkpoints: str,
+        logger: logging.Logger,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ) -> None:
+        self.send = send
+        self.url = url
+        self.filename = filename
+        self.logger = logger
+        self.buffer_size = buffer_size
+        stat = os.stat(filename)
+        self.size = stat.st_size
+        key = "|".join((key, os.path.abspath(filename), str(self.size), str(stat.st_mtime_ns)))
+        path = os.path.join(checkpoints, f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json")
+        os.makedirs(checkpoints, exist_ok=True)
+        self.checkpoint = TransferCheckpoint.load(path, key) or TransferCheckpoint(
+            path,
+            key,
+            self.size,
+        )
+
+    def run(
+        self,
+        chunk_size: int,
+        n_workers: int = 1,
+        progress: Optional[Callable[[int, int], None]] = None,
+        retries: int = 3,
+    ) -> Optional[requests.Response]:
+        """Send the missing chunks of the file, and return the response to the last
+        one (None if a chunk failed)."""
+        from cytomine.models._utilities.parallel import generic_parallel_stream
+
+        checkpoint, size = self.checkpoint, self.size
+        chunks = checkpoint.missing(chunk_size)
+        if not chunks or chunks[-1][1] != size:
+            # The last chunk was acknowledged but the checkpoint not removed:
+            # the upload may not be recorded, upload the file again
+            checkpoint.reset(size, None)
+            chunks = checkpoint.missing(chunk_size)
+        last = chunks.pop()
+
+        lock = threading.Lock()
+
+        def send(chunk: Tuple[int, int]) -> Optional[requests.Response]:
+            response = self._send_chunk(chunk, retries)
+            if response is None:
+                return None
+            checkpoint.add(*chunk)
+            if progress is not None:
+                with lock:
+                    progress(checkpoint.transferred, size)
+            return response
+
+        if progress is not None:
+            progress(checkpoint.transferred, size)
+        try:
+            results = [
+                response
+                for _, response in generic_parallel_stream(chunks, send, n_workers=n_workers)
+            ]
+            response = send(last) if all(r is not None for r in results) else None
+        finally:
+            checkpoint.save()
+
+        if response is not None:
+            checkpoint.remove()
+        return response
+
+    def _send_chunk(self, chunk: Tuple[int, int], retries: int) -> Optional[requests.Response]:
+        start, end = chunk
+        body = MultipartFileStream(
+            "files[]",
+            self.filename,
+            content_type="application/octet-stream",
+            start=start,
+            end=end,
+            buffer_size=self.buffer_size,
+        )
+        headers = {"Content-Range": f"bytes {start}-{end - 1}/{self.size}"}
+
+        try:
+            # A chunk is written at its offset, so that it can be sent again
+            response = self.send(headers, body.content_type, body, retries)
+        except (requests.exceptions.RequestException, ConnectionError) as e:
+            self.logger.error("[POST] %s | bytes %d-%d: %s", self.url, start, end - 1, e)
+            return None
+
+        if response.status_code not in (requests.codes.ok, requests.codes.created):
+            self.logger.error(
+                "[POST] %s | bytes %d-%d: %s %s",
+                self.url,
+                start,
+                end - 1,
+                response.status_code,
+                response.reason,
+            )
+            return None
+        return response
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Optional
+
+import requests  # type: ignore
+
+DEFAULT_METHOD_RETRIES = {
+    "GET": 3,
+    "HEAD": 3,
+    "OPTIONS": 3,
+    "PUT": 0,
+    "POST": 0,
+    "DELETE": 0,
+}
+DEFAULT_RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Responses of a host (or of its gateway) that is down or overloaded
+HOST_FAILURE_STATUSES = frozenset((502, 503, 504))
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host considered as down."""
+
+    def __init__(self, host: str) -> None:
+        super().__init__(f"Too many failures for {host}: requests are suspended.")
+        self.host = host
+
+
+class RetryBudget:
+    """
+    Limit the retries to a fraction of the requests, shared by all the threads of a
+    client. When a host fails, the workers of a parallel operation would otherwise
+    multiply the load by the number of attempts, at the worst moment.
+
+    Each request deposits `ratio` token, each retry withdraws one. `min_per_second`
+    tokens are also granted every second, so that a few requests can still be retried
+    after a quiet period.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_per_second: float = 1.0,
+        max_tokens: float = 10.0,
+    ) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, tokens: float) -> None:
+        self._tokens = min(self.max_tokens, self._tokens + tokens)
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        """Consume a token for a retry, False if the budget is exhausted."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill((now - self._last) * self.min_per_second)
+            self._last = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    Suspend the requests to a host after `failure_threshold` consecutive failures
+    (connection errors, timeouts, or 502, 503 and 504 responses). Other errors
+    come from a host that responds, e.g. a 500 of a single resource. After
+    `reset_timeout` seconds, a single request is let through: the circuit is
+    closed again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """True if a request can be sent."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_timeout:
+                return False
+            # Let a single request through per period, until one succeeds.
+            self._opened_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_response(self, status_code: int) -> None:
+        if status_code in HOST_FAILURE_STATUSES:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if 0 < self.failure_threshold <= self._failures:
+                self._opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """
+    Retry policy of a `Cytomine` client, for requests that fail with a connection
+    error or a transient server error.
+
+    Parameters
+    ----------
+    method_retries : dict (optional)
+        Maximum number of retries by HTTP method, that override the defaults:
+        3 for GET, HEAD and OPTIONS, 0 for the other methods as they are not
+        idempotent or may have a request body that cannot be sent twice.
+    statuses : iterable of int
+        Response status codes for which the request is retried.
+    backoff_factor : float
+        Base delay in seconds: the n-th retry waits up to `backoff_factor * 2 ** n`.
+    backoff_max : float
+        Maximum delay in seconds between two attempts.
+    jitter : bool
+        True for waiting a random delay between 0 and the exponential backoff, so that
+        the requests of parallel workers are not retried all at once.
+    retry_after_max : float
+        Maximum delay in seconds accepted from a `Retry-After` response header. The
+        request is not retried if the server asks for a longer delay.
+    budget : RetryBudget (optional)
+        Budget shared by all the requests of the client (see `RetryBudget`).
+    failure_threshold : int
+        Number of consecutive failures for a host after which its requests are
+        suspended (see `CircuitBreaker`). 0 to disable the circuit breaker.
+    reset_timeout : float
+        Delay in seconds before trying again a suspended host.
+    """
+
+    def __init__(
+        self,
+        method_retries: Optional[Dict[str, int]] = None,
+        statuses: Iterable[int] = DEFAULT_RETRY_STATUSES,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 30.0,
+        jitter: bool = True,
+        retry_after_max: float = 120.0,
+        budget: Optional[RetryBudget] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ) -> None:
+        self.method_retries = dict(DEFAULT_METHOD_RETRIES)
+        if method_retries:
+            self.method_retries.update({k.upper(): v for k, v in method_retries.items()})
+        self.statuses = frozenset(statuses)
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_after_max = retry_after_max
+        self.budget = budget if budget is not None else RetryBudget()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+    @classmethod
+    def disabled(cls) -> "RetryPolicy":
+        """A policy that never retries nor suspends requests."""
+        return cls(
+            method_retries={method: 0 for method in DEFAULT_METHOD_RETRIES},
+            failure_threshold=0,
+        )
+
+    def retries(self, method: str) -> int:
+        return self.method_retries.get(method.upper(), 0)
+
+    def new_circuit_breaker(self) -> CircuitBreaker:
+        return CircuitBreaker(self.failure_threshold, self.reset_timeout)
+
+    def backoff(self, attempt: int) -> float:
+        """Delay in seconds before the retry following the `attempt`-th failure (from 0)."""
+        delay = min(self.backoff_max, self.backoff_factor * 2**attempt)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def retry_after(self, response: requests.Response) -> Optional[float]:
+        """Delay in seconds requested by the `Retry-After` header of `response`."""
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
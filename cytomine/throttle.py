@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+import threading
+import time
+from types import TracebackType
+from typing import Optional, Type
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` requests per second on average, and bursts of up
+    to `burst` requests. Waiting requests reserve their token in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("The rate of a token bucket must be positive.")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, and return the delay in seconds before it is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class RequestLimiter:
+    """
+    Limit the requests sent to a service, with a rate limit (`rate` requests per
+    second on average, bursts of `burst` requests) and a maximum number of requests
+    in flight. Both limits are optional. Used as a context manager around a request.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> None:
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self._bucket = TokenBucket(rate, burst) if rate else None
+        self._slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def __enter__(self) -> "RequestLimiter":
+        if self._slots is not None:
+            self._slots.acquire()  # pylint: disable=consider-using-with
+        if self._bucket is not None:
+            try:
+                self._bucket.acquire()
+            except BaseException:
+                if self._slots is not None:
+                    self._slots.release()
+                raise
+        with self._lock:
+            self._in_flight += 1
+        return self
+
+    def __exit__(
+        self,
+        type: Optional[Type[BaseException]],
+        value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        if self._slots is not None:
+            self._slots.release()
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+logger = logging.getLogger("cytomine.client")
+
+# Images whose content only depends on their URL and parameters: windows,
+# thumbnails and annotation crops.
+CACHEABLE_PATH = re.compile(
+    r"/(window-\d+-\d+-\d+-\d+|thumb|crop|mask|alphamask)\.(jpg|png|tif|tiff|webp)$"
+)
+KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+# Images drawn from annotations, which change when the annotations are edited:
+# annotation crops and masks, and windows with annotations drawn.
+ANNOTATION_IMAGES = ("crop", "mask", "alphamask")
+ANNOTATION_PARAMETERS = ("annotations", "terms", "users", "reviewed", "mask", "alphaMask")
+
+
+def cacheable(url: str) -> bool:
+    """True if the image at this URL can be cached."""
+    return CACHEABLE_PATH.search(urlsplit(url).path) is not None
+
+
+def persistent(url: str, parameters: Optional[Dict[str, Any]] = None) -> bool:
+    """True if the image at this URL can be kept on disk across runs: its content
+    only depends on the image, and not on annotations that can be edited."""
+    match = CACHEABLE_PATH.search(urlsplit(url).path)
+    if match is None or match.group(1) in ANNOTATION_IMAGES:
+        return False
+    return all((parameters or {}).get(name) is None for name in ANNOTATION_PARAMETERS)
+
+
+class TileCache:
+    """
+    Two-level LRU cache of image windows, thumbnails and crops: a memory tier of
+    at most `memory_size` bytes in front of an optional disk tier of at most
+    `disk_size` bytes in `directory`. The least recently used images are evicted
+    first. An image found on disk is promoted to memory. Images drawn from
+    annotations are only kept in memory (see `persistent()`), as the cache keys
+    do not follow the edits of the annotations.
+
+    The disk tier is kept across runs: the images already in `directory` are
+    indexed on creation, by last use. It can be shared by several processes,
+    each one enforcing the size limit for the images it knows about.
+
+    Examples
+    --------
+    >>> cache = TileCache(memory_size=2**28, directory="/data/tiles", disk_size=2**34)
+    >>> with Cytomine(host, public_key, private_key, tile_cache=cache):
+    ...     image.window_content(0, 0, 512, 512)
+    """
+
+    def __init__(
+        self,
+        memory_size: int = 2**28,
+        directory: Optional[str] = None,
+        disk_size: int = 2**32,
+    ) -> None:
+        self.memory_size = memory_size
+        self.directory = directory
+        self.disk_size = disk_size if directory is not None else 0
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._load()
+
+    @staticmethod
+    def key(url: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+        """The key of an image: a digest of its URL (image, region and format)
+        and of its query parameters (zoom, bits, mask, alpha mask,...)."""
+        split = urlsplit(url)
+        query = sorted((k, str(v)) for k, v in (parameters or {}).items() if v is not None)
+        canonical = f"{split.netloc}{split.path}?{split.query}&{urlencode(query)}"
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """The cached image, None if it is not cached."""
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self._memory.move_to_end(key)
+                self._counts["memory_hits"] += 1
+                return content
+            on_disk = key in self._disk
+            if on_disk:
+                self._disk.move_to_end(key)
+
+        content = self._read(key) if on_disk else None
+        with self._lock:
+            if content is None:
+                self._counts["misses"] += 1
+                if on_disk:
+                    self._forget(key)
+                return None
+            self._counts["disk_hits"] += 1
+            self._keep_in_memory(key, content)
+        return content
+
+    def put(self, key: str, content: bytes, on_disk: bool = True) -> None:
+        """Add an image to the cache, only in memory if not `on_disk`."""
+        written = (
+            self._write(key, content)
+            if on_disk and self.directory is not None and len(content) <= self.disk_size
+            else False
+        )
+
+        with self._lock:
+            self._keep_in_memory(key, content)
+            if not written:
+                return
+            self._forget(key)
+            self._disk[key] = len(content)
+            self._disk_bytes += len(content)
+            evicted = self._evict_from_disk()
+        self._remove(evicted)
+
+    def clear(self) -> None:
+        """Empty the memory tier. The disk tier is left untouched."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self._counts["memory_hits"] + self._counts["disk_hits"]
+        total = hits + self._counts["misses"]
+        return hits / total if total > 0 else 0.0
+
+    def statistics(self) -> Dict[str, float]:
+        """
+        Usage statistics of the cache.
+
+        Returns
+        -------
+        statistics : dict
+            The number of `memory_hits`, `disk_hits` and `misses` of the lookups,
+            the `hit_rate`, the number of `evictions` from either tier, and the
+            number of `memory_items`, `memory_bytes`, `disk_items` and `disk_bytes`
+            currently cached.
+        """
+        with self._lock:
+            return {
+                **self._counts,
+                "hit_rate": self.hit_rate,
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_items": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory or "", key)
+
+    def _load(self) -> None:
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if KEY_PATTERN.match(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, entry.name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._remove(self._evict_from_disk())
+
+    def _remove(self, keys: List[str]) -> None:
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass  # evicted by another process sharing the directory
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            os.utime(path)  # last use, for the order of the next runs
+        except OSError:
+            return None
+        return content
+
+    def _write(self, key: str, content: bytes) -> bool:
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning("Cannot write the tile cache in %s: %s", self.directory, e)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        return True
+
+    def _keep_in_memory(self, key: str, content: bytes) -> None:
+        if len(content) > self.memory_size:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = content
+        self._memory_bytes += len(content)
+        while self._memory_bytes > self.memory_size:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._counts["evictions"] += 1
+
+    def _forget(self, key: str) -> None:
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _evict_from_disk(self) -> List[str]:
+        evicted = []
+        while self._disk_bytes > self.disk_size:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._counts["evictions"] += 1
+            evicted.append(key)
+        return evicted
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from cytomine.models import Annotation
+from cytomine.models._utilities.parallel import generic_parallel_stream
+
+logger = logging.getLogger("cytomine.client")
+
+
+class CropManifest:
+    """
+    Ids of the annotations whose crop has been consumed, kept in a file with one
+    id per line. Ids are appended as they are added, so that the manifest survives
+    an interruption and costs one small write per crop.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._ids: Set[int] = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "rb+") as f:
+                content = f.read()
+                # Drop the last line if it was truncated by an interruption
+                f.truncate(content.rfind(b"\n") + 1)
+            for line in content.splitlines(keepends=True):
+                if line.endswith(b"\n") and line.strip().isdigit():
+                    self._ids.add(int(line))
+
+    def __contains__(self, id: object) -> bool:
+        return id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, id: int) -> None:
+        with self._lock:
+            if id in self._ids:
+                return
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(f"{id}\n")
+            self._ids.add(id)
+
+
+class CropStream:
+    """
+    Download the crops of annotations in parallel, and iterate over them as
+    `(annotation, crop)` tuples as soon as they are downloaded, in memory.
+
+    At most `n_workers` crops are downloaded or waiting to be consumed at once.
+    The crops are retried according to the retry policy of the client (see
+    `RetryPolicy`). A failed crop is reported in `errors` (annotation id to error
+    message) and skipped. With a manifest, the annotations whose crop has been
+    consumed are recorded, and skipped by the next streams with the same manifest.
+
+    Examples
+    --------
+    >>> stream = CropStream(annotations, output="array", manifest="crops.txt")
+    >>> for annotation, crop in stream:
+    ...     train(annotation.term, crop)
+    >>> stream.errors
+    {}
+    """
+
+    def __init__(
+        self,
+        annotations: Iterable[Annotation],
+        n_workers: int = 8,
+        ordered: bool = False,
+        format: str = "jpg",
+        output: str = "bytes",
+        manifest: Optional[str] = None,
+        **dump_parameters: Any,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        annotations : iterable of Annotation
+            The annotations, with their `cropURL` (e.g. an `AnnotationCollection`).
+        n_workers : int
+            Maximum number of crops downloaded or waiting to be consumed at once.
+        ordered : bool
+            True for yielding the crops in the order of `annotations`, False for
+            yielding them as soon as they are downloaded.
+        format : str
+            The crop format: jpg, png or tif.
+        output : str
+            "bytes" for the encoded crops, "memoryview" for memoryviews of them,
+            or "array" for crops decoded into NumPy arrays (requires Pillow).
+        manifest : str (optional)
+            Path of the manifest of consumed crops, for resuming an interrupted stream.
+        dump_parameters : dict
+            Parameters of the crops (mask, alpha, zoom, max_size,...),
+            see `Annotation.dump_content()`.
+        """
+        self.annotations = annotations
+        self.n_workers = n_workers
+        self.ordered = ordered
+        self.format = format
+        self.output = output
+        self.manifest = CropManifest(manifest) if manifest is not None else None
+        self.dump_parameters = dump_parameters
+        self.errors: Dict[int, str] = {}
+        self.skipped = 0
+
+    def _pending(self) -> Iterator[Annotation]:
+        for annotation in self.annotations:
+            if self.manifest is not None and annotation.id in self.manifest:
+                self.skipped += 1
+                continue
+            yield annotation
+
+    def _download(self, annotation: Annotation) -> Any:
+        # Connection errors and transient server errors are retried by the client,
+        # according to its retry policy: the other failures are final.
+        try:
+            crop = annotation.dump_content(
+                self.format,
+                self.output,
+                **self.dump_parameters,
+            )
+        except (ValueError, OSError) as e:
+            # No crop for the annotation (no ID, no crop URL,...), connection errors
+            # once retried, and crops that cannot be decoded
+            self.errors[annotation.id] = str(e)  # type: ignore
+            return None
+        if crop is None:
+            self.errors[annotation.id] = "download failed"  # type: ignore
+        return crop
+
+    def __iter__(self) -> Iterator[Tuple[Annotation, Any]]:
+        for annotation, crop in generic_parallel_stream(
+            self._pending(),
+            self._download,
+            self.n_workers,
+            self.ordered,
+        ):
+            if crop is None:
+                logger.warning(
+                    "Cannot download the crop of annotation %s: %s",
+                    annotation.id,
+                    self.errors.get(annotation.id),  # type: ignore
+                )
+                continue
+            yield annotation, crop
+            # Consumed: the caller asked for the next crop
+            if self.manifest is not None:
+                self.manifest.add(annotation.id)  # type: ignore
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import requests  # type: ignore
+
+from cytomine.cytomine import Cytomine
+from cytomine.dedup import UploadIndex
+from cytomine.models import UploadedFile, UploadedFileCollection
+from cytomine.models.collection import CollectionPartialFetchException
+from cytomine.models._utilities.parallel import generic_parallel_stream
+
+ERROR_STATUSES = frozenset(
+    (
+        UploadedFile.ERROR_FORMAT,
+        UploadedFile.ERROR_EXTRACTION,
+        UploadedFile.ERROR_CONVERSION,
+        UploadedFile.ERROR_DEPLOYMENT,
+    )
+)
+
+logger = logging.getLogger("cytomine.client")
+
+
+def is_processed(status: Optional[int]) -> bool:
+    """True if an uploaded file with this status is done (deployed, extracted or
+    converted) or failed."""
+    return status is not None and (status >= UploadedFile.DEPLOYED or status in ERROR_STATUSES)
+
+
+class IngestResult:
+    """Outcome of the ingestion of one file."""
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.size = 0
+        self.uploaded_file: Optional[UploadedFile] = None
+        self.status: Optional[int] = None
+        self.error: Optional[str] = None
+        self.deduplicated = False  # already uploaded, found in the upload index
+        self.upload_seconds = 0.0
+        self.processing_seconds: Optional[float] = None
+        self.uploaded_at = 0.0  # time.monotonic() at the end of the upload
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.uploaded_file is not None
+
+    def __repr__(self) -> str:
+        return f"IngestResult({self.filename!r}, status={self.status}, error={self.error!r})"
+
+
+class StageMetrics:
+    """Wall time, volume and request count of an ingestion stage. The requests are
+    all the HTTP requests sent by the client during the stage, retries included."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.files = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.requests = 0
+        self.seconds = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name:10} {self.files:6d} files {self.bytes / 2 ** 20:10.1f} MiB "
+            f"{self.seconds:8.1f} s {self.files_per_second:8.2f} files/s "
+            f"{self.bytes_per_second / 2 ** 20:8.1f} MiB/s {self.requests:6d} requests "
+            f"{self.skipped:6d} skipped"
+        )
+
+
+class IngestReport:
+    """Results of an ingestion, in the order of the files, and metrics of its
+    "upload" and "processing" stages."""
+
+    def __init__(self, results: List[IngestResult]) -> None:
+        self.results = results
+        self.stages: Dict[str, StageMetrics] = {
+            name: StageMetrics(name) for name in ("upload", "processing")
+        }
+
+    @property
+    def succeeded(self) -> List[IngestResult]:
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> List[IngestResult]:
+        return [result for result in self.results if not result.ok]
+
+    def __str__(self) -> str:
+        lines = [str(stage) for stage in self.stages.values()]
+        lines += [f"{result.filename}: {result.error}" for result in self.failed]
+        return "\n".join(lines)
+
+
+def ingest_images(
+    filenames: Iterable[str],
+    id_storage: int,
+    id_project: Optional[int] = None,
+    properties: Optional[Dict[str, Any]] = None,
+    n_workers: int = 4,
+    chunk_size: Optional[int] = None,
+    wait: bool = True,
+    poll_interval: float = 1.0,
+    max_poll_interval: float = 30.0,
+    timeout: Optional[float] = 3600.0,
+    page_size: int = 100,
+    dedup_index: Optional[UploadIndex] = None,
+) -> IngestReport:
+    """Upload images to a storage, at most `n_workers` at once, then wait until the
+    server has processed all of them.
+
+    The processing is followed with one query of the uploaded files of the user
+    per polling round, instead of one request per file. The polling interval starts
+    at `poll_interval`, doubles (up to `max_poll_interval`) after each round
+    without any status change, and goes back to `poll_interval` when a status changes.
+
+    Parameters
+    ----------
+    filenames: iterable
+        Paths of the image files.
+    id_storage: int
+        The storage where the images are uploaded.
+    id_project: int (optional)
+        A project where the images are added.
+    properties: dict (optional)
+        Properties added to the images.
+    n_workers: int
+        Maximum number of files uploaded at once.
+    chunk_size: int (optional)
+        Upload the files in chunks of `chunk_size` bytes (see `Cytomine.upload_image`).
+    wait: bool
+        False for returning once the files are uploaded, without waiting for
+        their processing.
+    poll_interval: float
+        Initial interval between two polling rounds, in seconds.
+    max_poll_interval: float
+        Maximum interval between two polling rounds, in seconds.
+    timeout: float (optional)
+        Maximum time waiting for the processing, in seconds. The files that are
+        still processed are reported as failed. None for no limit.
+    page_size: int
+        Number of uploaded files per page of the polling query.
+    dedup_index: UploadIndex (optional)
+        Index of the files uploaded by content hash. The files already uploaded to
+        the storage are skipped, and reported with their existing uploaded file,
+        unless a project or properties are given (see `Cytomine.upload_image`).
+
+    Returns
+    -------
+    report: IngestReport
+        The result of each file and the metrics of the upload and processing stages.
+    """
+    client = Cytomine.get_instance()
+    results = [IngestResult(filename) for filename in filenames]
+    report = IngestReport(results)
+
+    def upload(result: IngestResult) -> None:
+        start = time.monotonic()
+        try:
+            result.size = os.path.getsize(result.filename)
+            uploaded: Union[bool, UploadedFile, None] = None
+            if dedup_index is not None and not id_project and not properties:
+                uploaded = dedup_index.find(result.filename, id_storage)
+                result.deduplicated = uploaded is not None
+            if uploaded is None:
+                uploaded = client.upload_image(
+                    result.filename,
+                    id_storage,
+                    id_project,
+                    properties,
+                    chunk_size=chunk_size,
+                )
+                if dedup_index is not None and isinstance(uploaded, UploadedFile):
+                    dedup_index.add(result.filename, id_storage, uploaded)
+        except (OSError, requests.exceptions.RequestException) as e:
+            result.error = f"upload failed: {e}"
+            return
+        finally:
+            result.uploaded_at = time.monotonic()
+            result.upload_seconds = result.uploaded_at - start
+
+        if not isinstance(uploaded, UploadedFile):
+            result.error = "upload failed"
+            return
+        result.uploaded_file = uploaded
+        result.status = uploaded.status
+
+    stage = report.stages["upload"]
+    start = time.monotonic()
+    sent_requests = _sent_requests(client)
+    for _ in generic_parallel_stream(results, upload, n_workers=n_workers):
+        pass
+    stage.seconds = time.monotonic() - start
+    stage.requests = _sent_requests(client) - sent_requests
+    uploaded = [result for result in results if result.uploaded_file is not None]
+    sent = [result for result in uploaded if not result.deduplicated]
+    stage.files = len(sent)
+    stage.skipped = len(uploaded) - len(sent)
+    stage.bytes = sum(result.size for result in sent)
+
+    if wait:
+        _wait_processing(
+            client,
+            uploaded,
+            report.stages["processing"],
+            poll_interval,
+            max_poll_interval,
+            timeout,
+            page_size,
+        )
+    return report
+
+
+def _sent_requests(client: Cytomine) -> int:
+    return sum(pool["requests"] for pool in client.pool_statistics().values())
+
+
+def _wait_processing(
+    client: Cytomine,
+    results: List[IngestResult],
+    stage: StageMetrics,
+    poll_interval: float,
+    max_poll_interval: float,
+    timeout: Optional[float],
+    page_size: int,
+) -> None:
+    start = time.monotonic()
+    sent_requests = _sent_requests(client)
+    pending: Dict[int, IngestResult] = {}
+    for result in results:
+        if is_processed(result.status):
+            _set_processed(result, result.status, start)  # type: ignore
+        else:
+            pending[result.uploaded_file.id] = result  # type: ignore
+
+    interval = poll_interval
+    while pending:
+        changed = False
+        try:
+            changed = _poll(pending, page_size)
+        except CollectionPartialFetchException as e:
+            # Polled again in the next round, until the timeout
+            logger.warning("Cannot poll the uploaded files: %s", e)
+
+        if not pending:
+            break
+        elapsed = time.monotonic() - start
+        if timeout is not None and elapsed >= timeout:
+            for result in pending.values():
+                result.error = f"still processed after {timeout} s (status {result.status})"
+            break
+        interval = poll_interval if changed else min(2 * interval, max_poll_interval)
+        logger.debug(
+            "%d uploaded files still processed, next poll in %.1f s",
+            len(pending),
+            interval,
+        )
+        time.sleep(interval if timeout is None else min(interval, timeout - elapsed))
+
+    stage.seconds = time.monotonic() - start
+    stage.requests = _sent_requests(client) - sent_requests
+    processed = [result for result in results if result.processing_seconds is not None]
+    stage.files = len(processed)
+    stage.bytes = sum(result.size for result in processed)
+
+
+def _poll(pending: Dict[int, IngestResult], page_size: int) -> bool:
+    """Update the pending results from a listing of the uploaded files, and return
+    True if a status changed. The processed results are removed from `pending`."""
+    changed = False
+    remaining = set(pending)
+    for page in UploadedFileCollection(onlyRoots=True).iter_pages(max=page_size):
+        for uploaded_file in page:
+            polled = pending.get(uploaded_file.id)
+            if polled is None or uploaded_file.status == polled.status:
+                continue
+            changed = True
+            polled.uploaded_file = uploaded_file
+            polled.status = uploaded_file.status
+            if is_processed(uploaded_file.status):
+                _set_processed(polled, uploaded_file.status, time.monotonic())
+                del pending[uploaded_file.id]
+        remaining.difference_update(uploaded_file.id for uploaded_file in page)
+        if not remaining:
+            break
+    return changed
+
+
+def _set_processed(result: IngestResult, status: int, now: float) -> None:
+    result.processing_seconds = now - result.uploaded_at
+    if status in ERROR_STATUSES:
+        result.error = f"processing failed (status {status})"
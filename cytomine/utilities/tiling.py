@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+import logging
+import math
+from typing import Any, Iterator, List, Optional, Tuple
+
+import requests  # type: ignore
+
+from cytomine.models._utilities.imaging import pad_image
+from cytomine.models._utilities.parallel import generic_parallel_stream
+from cytomine.models.image import ImageInstance
+
+logger = logging.getLogger("cytomine.client")
+
+# A region (x, y, width, height) of an image, at full resolution.
+Region = Tuple[int, int, int, int]
+
+
+class Tile:
+    """A tile of a tiling. Its position and size are given at full resolution,
+    the size of the returned image being divided by `2 ** zoom`."""
+
+    def __init__(
+        self,
+        col: int,
+        row: int,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        zoom: int = 0,
+    ) -> None:
+        self.col = col
+        self.row = row
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.zoom = zoom
+        # Encoded image (bytes) or decoded array, None if the download failed.
+        self.data: Any = None
+
+    @property
+    def region(self) -> Region:
+        return self.x, self.y, self.width, self.height
+
+    @property
+    def output_size(self) -> Tuple[int, int]:
+        """Width and height of the tile image."""
+        scale = 2**self.zoom
+        return math.ceil(self.width / scale), math.ceil(self.height / scale)
+
+    def __repr__(self) -> str:
+        return (
+            f"Tile(col={self.col}, row={self.row}, x={self.x}, y={self.y}, "
+            f"width={self.width}, height={self.height}, zoom={self.zoom})"
+        )
+
+
+def _positions(start: int, extent: int, span: int, stride: int) -> List[Tuple[int, int]]:
+    count = 1 if extent <= span else math.ceil((extent - span) / stride) + 1
+    return [
+        (start + i * stride, min(span, extent - i * stride)) for i in range(count)
+    ]
+
+
+def tile_grid(
+    width: int,
+    height: int,
+    tile_size: int = 512,
+    overlap: int = 0,
+    zoom: int = 0,
+    roi: Optional[Region] = None,
+) -> List[Tile]:
+    """
+    Cut an image (or a region of it) in tiles, in row-major order.
+
+    Tiles are `tile_size` pixels wide at the given zoom, i.e. `tile_size * 2 ** zoom`
+    pixels at full resolution, and consecutive tiles share `overlap` pixels.
+    The tiles of the last column and row are clipped to the image (or region),
+    which they always reach.
+
+    Parameters
+    ----------
+    width : int
+        The image width.
+    height : int
+        The image height.
+    tile_size : int
+        The size of the tiles, in pixels at the given zoom.
+    overlap : int
+        The number of pixels (at the given zoom) shared by two consecutive tiles.
+    zoom : int
+        The downsampling level: the image is divided by `2 ** zoom`, 0 being the
+        full resolution.
+    roi : tuple (optional)
+        The region to tile (x, y, width, height) at full resolution. It is clipped
+        to the image. None to tile the whole image.
+
+    Returns
+    -------
+    tiles : list of Tile
+        The tiles, row by row.
+    """
+    if tile_size <= 0:
+        raise ValueError("The tile size must be positive.")
+    if not 0 <= overlap < tile_size:
+        raise ValueError("The overlap must be non-negative and smaller than the tile size.")
+    if zoom < 0:
+        raise ValueError("The zoom must be non-negative.")
+
+    x, y, w, h = roi if roi is not None else (0, 0, width, height)
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, width), min(y + h, height)
+    if x1 <= x0 or y1 <= y0:
+        return []
+
+    scale = 2**zoom
+    span, stride = tile_size * scale, (tile_size - overlap) * scale
+    columns = _positions(x0, x1 - x0, span, stride)
+    rows = _positions(y0, y1 - y0, span, stride)
+    return [
+        Tile(col, row, tx, ty, tw, th, zoom)
+        for row, (ty, th) in enumerate(rows)
+        for col, (tx, tw) in enumerate(columns)
+    ]
+
+
+def iter_tiles(
+    image: ImageInstance,
+    tile_size: int = 512,
+    overlap: int = 0,
+    zoom: int = 0,
+    roi: Optional[Region] = None,
+    n_workers: int = 8,
+    ordered: bool = True,
+    format: str = "jpg",
+    decode: bool = False,
+    pad: bool = False,
+    pad_value: float = 0,
+    **window_parameters: Any,
+) -> Iterator[Tile]:
+    """
+    Fetch the tiles of an image (or a region of it) with concurrent window requests.
+
+    At most `n_workers` tiles are requested or waiting to be consumed at once, so
+    that memory stays bounded whatever the size of the image. The tiles are kept
+    in memory, without going through the disk.
+
+    Parameters
+    ----------
+    image : ImageInstance
+        The image, with its width and height.
+    tile_size, overlap, zoom, roi
+        The tiling (see `tile_grid()`).
+    n_workers : int
+        Maximum number of tiles requested at once.
+    ordered : bool
+        True for yielding the tiles in scan order (row-major), False for yielding
+        them as soon as they are downloaded.
+    format : str
+        The tile format: "jpg", "png" or "tif".
+    decode : bool
+        True for decoding the tiles into NumPy arrays (requires NumPy and Pillow),
+        False for the encoded bytes.
+    pad : bool
+        True for padding the decoded edge tiles on their bottom and right sides
+        with `pad_value`, so that all tiles are `tile_size` pixels wide.
+    pad_value : float
+        The value of the padding pixels.
+    window_parameters
+        Other parameters of the windows (mask, alpha, bits, annotations,...),
+        see `ImageInstance.window()`.
+
+    Yields
+    ------
+    tile : Tile
+        The tile, with its image in `data` (None if it could not be downloaded).
+    """
+    if image.width is None or image.height is None:
+        raise ValueError("Cannot tile an image with unknown dimensions.")
+    if pad and not decode:
+        raise ValueError("Only decoded tiles can be padded.")
+
+    tiles = tile_grid(image.width, image.height, tile_size, overlap, zoom, roi)
+
+    def fetch(tile: Tile) -> Any:
+        try:
+            data = image.window_content(
+                *tile.region,
+                format=format,
+                output="array" if decode else "bytes",
+                # The server zoom levels depend on the image pyramid: ask for the
+                # tile size instead, which only downsamples the window.
+                max_size=max(tile.output_size) if zoom > 0 else None,
+                **window_parameters,
+            )
+        except requests.exceptions.RequestException as e:
+            logger.warning("Cannot download %r: %s", tile, e)
+            return None
+
+        if data is None or not pad:
+            return data
+        return pad_image(data, (tile_size, tile_size), pad_value)
+
+    for tile, data in generic_parallel_stream(tiles, fetch, n_workers, ordered):
+        tile.data = data
+        yield tile
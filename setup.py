@@ -47,6 +47,13 @@ setup(
         "requests>=2.27.1",
         "urllib3>=1.25.2",
     ],
+    extras_require={
+        "async": ["aiohttp>=3.8"],
+        "orjson": ["orjson>=3.6"],
+        "numpy": ["numpy>=1.23"],
+        "image": ["numpy>=1.23", "Pillow"],
+        "arrow": ["pyarrow"],
+    },
     setup_requires=["pytest-runner"],
     extra_requires={"test": ["pytest"]},
     test_suite="cytomine.tests",
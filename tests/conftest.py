@@ -14,10 +14,14 @@
 # * See the License for the specific language governing permissions and
 # * limitations under the License.
 
+import json
 import logging
 import random
 import string
-from typing import Any, Dict
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
 
 import pytest
 
@@ -43,6 +47,153 @@ def random_string(length: int = 10) -> str:
     return "".join(random.choice(string.ascii_letters) for _ in range(length))
 
 
+# A route handler receives the query parameters and the request handler, and returns
+# (status code, headers, body).
+Route = Callable[
+    [Dict[str, str], BaseHTTPRequestHandler],
+    Tuple[int, Dict[str, str], bytes],
+]
+
+
+def file_response(
+    content: bytes,
+    handler: BaseHTTPRequestHandler,
+    etag: Optional[str] = None,
+    ranges: bool = True,
+) -> Tuple[int, Dict[str, str], bytes]:
+    """Serve `content`, or the single byte range requested with a Range header
+    (honouring If-Range), like a static file server."""
+    headers = {"Content-Type": "application/octet-stream"}
+    if etag is not None:
+        headers["ETag"] = etag
+    if not ranges:
+        return 200, headers, content
+    headers["Accept-Ranges"] = "bytes"
+
+    requested = handler.headers.get("Range")
+    if_range = handler.headers.get("If-Range")
+    if requested is None or (if_range is not None and if_range != etag):
+        return 200, headers, content
+
+    first, last = requested.split("=", 1)[1].split("-")
+    start, end = int(first), min(int(last or len(content) - 1), len(content) - 1)
+    if start >= len(content):
+        headers["Content-Range"] = f"bytes */{len(content)}"
+        return 416, headers, b""
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+    return 206, headers, content[start : end + 1]
+
+
+class StandInServer:
+    """Minimal local HTTP server standing in for Cytomine in offline tests.
+    Every request is recorded as a (method, path, query parameters) tuple."""
+
+    def __init__(self) -> None:
+        self.routes: Dict[Tuple[str, str], Route] = {}
+        self.requests: List[Tuple[str, str, Dict[str, str]]] = []
+        self.route("GET", "/server/ping", lambda query, handler: (200, {}, b""))
+        self.route_json("GET", "/api/user/current.json", {"id": 1, "username": "test"})
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            wbufsize = -1  # send headers and body at once
+
+            def handle_any(self) -> None:
+                url = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                server.requests.append((self.command, url.path, query))
+                route = server.routes.get((self.command, url.path))
+                status, headers, body = (
+                    route(query, self) if route else (404, {}, b"")
+                )
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                if "Content-Length" not in headers:
+                    self.send_header("Content-Length", str(len(body)))
+                if self.close_connection:
+                    self.send_header("Connection", "close")
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = handle_any
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={"poll_interval": 0.01},
+            daemon=True,
+        )
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def route(self, method: str, path: str, fn: Route) -> None:
+        self.routes[(method, path)] = fn
+
+    def route_json(self, method: str, path: str, content: Any) -> None:
+        body = json.dumps(content).encode("utf-8")
+        self.route(
+            method,
+            path,
+            lambda query, handler: (200, {"Content-Type": "application/json"}, body),
+        )
+
+    def route_file(
+        self,
+        path: str,
+        content: bytes,
+        etag: Optional[str] = None,
+        ranges: bool = True,
+    ) -> None:
+        self.route(
+            "GET",
+            path,
+            lambda query, handler: file_response(content, handler, etag, ranges),
+        )
+
+    def count(self, method: str, path: Optional[str] = None) -> int:
+        return len(
+            [r for r in self.requests if r[0] == method and path in (None, r[1])]
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture(name="stand_in")
+def fixture_stand_in() -> Iterator[StandInServer]:
+    server = StandInServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(name="client_options")
+def fixture_client_options() -> Dict[str, Any]:
+    """Options of `stand_in_client`, e.g. a `retry_policy` or a `tile_cache`. Test
+    modules and classes override this fixture, or parametrize it."""
+    return {}
+
+
+@pytest.fixture
+def stand_in_client(stand_in: StandInServer, client_options: Dict[str, Any]) -> Iterator[Cytomine]:
+    options = {"use_cache": False, "configure_logging": False, **client_options}
+    with Cytomine(stand_in.url, "public", "private", **options) as client:
+        stand_in.requests.clear()
+        yield client
+
+
 def pytest_addoption(parser: pytest.Parser) -> None:
     parser.addoption("--host", action="store")
     parser.addoption("--public_key", action="store")
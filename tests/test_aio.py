@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+# pylint: disable=unused-argument
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, List
+
+import pytest
+
+from cytomine.cytomine import CytomineAuth
+from cytomine.models import Project, ProjectCollection
+
+aiohttp = pytest.importorskip("aiohttp")
+web = pytest.importorskip("aiohttp.web")
+
+from cytomine.aio import AsyncCytomine  # pylint: disable=wrong-import-position
+
+
+async def serve(
+    handler: Callable[[Any], Awaitable[Any]],
+    test: Callable[[AsyncCytomine], Awaitable[None]],
+) -> None:
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+    try:
+        async with AsyncCytomine(f"http://127.0.0.1:{port}", "pub", "priv") as client:
+            await test(client)
+    finally:
+        await runner.cleanup()
+
+
+def check_signature(request: Any) -> None:
+    base_url = f"http://{request.host}/api/"
+    auth = CytomineAuth("pub", "priv", base_url, "/api/")
+    expected = auth.authorization(
+        request.method,
+        request.headers.get("content-type", ""),
+        request.headers["date"],
+        str(request.url),
+    )
+    assert request.headers["authorization"] == expected
+
+
+class TestAsyncCytomine:
+    def test_get_model(self) -> None:
+        async def handler(request: Any) -> Any:
+            check_signature(request)
+            assert request.path == "/api/project/12.json"
+            return web.json_response({"id": 12, "name": "p"})
+
+        async def test(client: AsyncCytomine) -> None:
+            project = await Project().fetch_async(12)
+            assert isinstance(project, Project)
+            assert project.name == "p"
+
+        asyncio.run(serve(handler, test))
+
+    def test_get_collection_concurrently(self) -> None:
+        offsets: List[str] = []
+
+        async def handler(request: Any) -> Any:
+            check_signature(request)
+            offsets.append(request.query["offset"])
+            return web.json_response(
+                {"collection": [{"id": int(request.query["offset"])}], "size": 1}
+            )
+
+        async def test(client: AsyncCytomine) -> None:
+            collections = [ProjectCollection(offset=i) for i in range(20)]
+            await asyncio.gather(*[c.fetch_async() for c in collections])
+            assert [c[0].id for c in collections] == list(range(20))
+
+        asyncio.run(serve(handler, test))
+        assert len(offsets) == 20
+
+    def test_download_file(self, tmp_path: Any) -> None:
+        async def handler(request: Any) -> Any:
+            check_signature(request)
+            return web.Response(body=b"x" * 5000)
+
+        async def test(client: AsyncCytomine) -> None:
+            destination = os.path.join(tmp_path, "file.bin")
+            assert await client.download_file("imageinstance/1/download", destination)
+            assert os.path.getsize(destination) == 5000
+
+        asyncio.run(serve(handler, test))
+
+    def test_interrupted_download_leaves_no_file(self, tmp_path: Any) -> None:
+        async def handler(request: Any) -> Any:
+            response = web.StreamResponse(headers={"Content-Length": "10000"})
+            await response.prepare(request)
+            await response.write(b"x" * 5000)
+            request.transport.close()
+            return response
+
+        async def test(client: AsyncCytomine) -> None:
+            destination = os.path.join(tmp_path, "file.bin")
+            with pytest.raises(aiohttp.ClientError):
+                await client.download_file("imageinstance/1/download", destination)
+            assert not os.listdir(tmp_path)
+
+        asyncio.run(serve(handler, test))
+
+    def test_close_clears_the_instance(self) -> None:
+        async def handler(request: Any) -> Any:
+            return web.json_response({})
+
+        async def test(client: AsyncCytomine) -> None:
+            assert AsyncCytomine.get_instance() is client
+            await client.close()
+            with pytest.raises(ConnectionError):
+                AsyncCytomine.get_instance()
+
+        asyncio.run(serve(handler, test))
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# pylint: disable=unused-argument,protected-access
+
+import base64
+import hashlib
+import hmac
+import re
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from cytomine.cytomine import Cytomine, CytomineAuth, _http_date
+from tests.conftest import StandInServer
+
+
+def expected_authorization(public_key: str, private_key: str, token: str) -> str:
+    digest = hmac.new(private_key.encode("utf-8"), token.encode("utf-8"), hashlib.sha1)
+    return f"CYTOMINE {public_key}:{base64.b64encode(digest.digest()).decode('utf-8')}"
+
+
+class TestCytomineAuth:
+    def test_authorization(self) -> None:
+        auth = CytomineAuth("pub", "priv", "http://host/api/", "/api/")
+        date = "Mon, 01 Jan 2024 00:00:00 +0000"
+
+        for path in ("project.json", "user/current.json?max=10"):
+            token = f"GET\n\napplication/json\n{date}\n/api/{path}"
+            assert auth.authorization(
+                "GET", "application/json", date, f"http://host/api/{path}"
+            ) == expected_authorization("pub", "priv", token)
+
+    def test_private_key_update(self) -> None:
+        auth = CytomineAuth("pub", "priv", "http://host/api/", "/api/")
+        auth.private_key = "other"
+
+        token = "GET\n\n\ndate\n/api/project.json"
+        assert auth.authorization(
+            "GET", "", "date", "http://host/api/project.json"
+        ) == expected_authorization("pub", "other", token)
+
+    def test_http_date(self) -> None:
+        assert _http_date(0) == "Thu, 01 Jan 1970 00:00:00 +0000"
+        assert _http_date(86400) == "Fri, 02 Jan 1970 00:00:00 +0000"
+
+
+class TestClientAuth:
+    def test_session_auth(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        headers: List[Dict[str, str]] = []
+
+        def projects(query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+            headers.append(dict(handler.headers))
+            return 200, {"Content-Type": "application/json"}, b'{"collection": []}'
+
+        stand_in.route("GET", "/api/project.json", projects)
+
+        def unexpected(*args: Any, **kwargs: Any) -> None:
+            raise AssertionError("The keyed HMAC must not be recomputed.")
+
+        monkeypatch.setattr(hmac, "new", unexpected)
+        auth = stand_in_client._auth
+        stand_in_client.get("project.json")
+        stand_in_client.get("project.json", {"max": 10})
+
+        monkeypatch.undo()
+        assert stand_in_client._auth is auth
+        assert len(headers) == 2
+        for request_headers, query in zip(headers, ("", "?max=10")):
+            assert re.match(r"\w{3}, \d{2} \w{3} \d{4} [\d:]{8} \+0000", request_headers["date"])
+            token = (
+                f"GET\n\n{request_headers.get('content-type', '')}\n"
+                f"{request_headers['date']}\n/api/project.json{query}"
+            )
+            assert request_headers["authorization"] == expected_authorization(
+                "public", "private", token
+            )
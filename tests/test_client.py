@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# pylint: disable=unused-argument
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+import pytest
+import urllib3
+
+from cytomine import cytomine
+from cytomine.connections import ConnectionCounter
+from cytomine.cytomine import Cytomine
+from cytomine.models import Project
+from tests.conftest import StandInServer
+
+
+class TestConnectionPools:
+    @pytest.mark.parametrize("use_cache", [False, True])
+    def test_pool_reuse(self, stand_in: StandInServer, use_cache: bool) -> None:
+        stand_in.route_json("GET", "/api/project.json", {"collection": []})
+
+        with Cytomine(
+            stand_in.url,
+            "public",
+            "private",
+            use_cache=use_cache,
+            configure_logging=False,
+            pool_size=4,
+            pool_block=True,
+        ) as client:
+            with ThreadPoolExecutor(8) as executor:
+                list(executor.map(lambda _: client.get("project.json"), range(50)))
+            statistics = client.pool_statistics()
+
+        # the current user is fetched when the client starts
+        assert statistics["api"]["requests"] == 51
+        assert statistics["api"]["connections"] <= 4
+        assert statistics["api"]["reused"] == 51 - statistics["api"]["connections"]
+        assert statistics["api"]["idle"] == statistics["api"]["connections"]
+        # the server is pinged at its root
+        assert statistics["upload"]["requests"] == 1
+
+    def test_keep_alive(self, stand_in: StandInServer) -> None:
+        connections = []
+
+        def projects(query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+            connections.append(handler.headers.get("Connection"))
+            return 200, {"Content-Type": "application/json"}, b'{"collection": []}'
+
+        stand_in.route("GET", "/api/project.json", projects)
+
+        with Cytomine(
+            stand_in.url,
+            "public",
+            "private",
+            use_cache=False,
+            configure_logging=False,
+            keep_alive=False,
+        ) as client:
+            client.get("project.json")
+            client.get("project.json")
+            statistics = client.pool_statistics()
+
+        assert connections == ["close", "close"]
+        assert statistics["api"]["connections"] == statistics["api"]["requests"]
+
+    def test_counts_survive_pool_eviction(self, stand_in: StandInServer) -> None:
+        stand_in.route_json("GET", "/api/project.json", {"collection": []})
+        other_host = stand_in.url.replace("127.0.0.1", "localhost")
+        counter = ConnectionCounter()
+        manager = urllib3.PoolManager(num_pools=1)
+        counter.install(manager)
+
+        for url in (stand_in.url, other_host, stand_in.url):
+            manager.request("GET", f"{url}/api/project.json")
+
+        assert len(manager.pools) == 1
+        assert counter.requests == 3
+        assert counter.connections == 3
+
+
+@pytest.fixture(name="set_level")
+def fixture_set_level(stand_in_client: Cytomine) -> Iterator[Callable[[int], None]]:
+    level = stand_in_client.logger.level
+    yield stand_in_client.logger.setLevel
+    stand_in_client.logger.setLevel(level)
+
+
+class TestResponseLogging:
+    @pytest.fixture(name="project_route")
+    def fixture_project_route(self, stand_in: StandInServer) -> None:
+        stand_in.route_json("GET", "/api/project/1.json", {"id": 1, "name": "p"})
+        stand_in.route("GET", "/api/project/2.json", lambda query, handler: (
+            404, {"Content-Type": "application/json"}, b'{"errors": "not found"}'
+        ))
+
+    def test_disabled_levels(
+        self,
+        stand_in_client: Cytomine,
+        project_route: None,
+        set_level: Callable[[int], None],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        def unexpected(*args: Any) -> str:
+            raise AssertionError("Nothing must be formatted.")
+
+        monkeypatch.setattr(cytomine.dump, "dump_all", unexpected)
+        monkeypatch.setattr(cytomine, "read_response_message", unexpected)
+        monkeypatch.setattr(Project, "__str__", unexpected)
+        set_level(logging.CRITICAL)
+
+        project = Project().fetch(1)
+        assert isinstance(project, Project) and project.name == "p"
+        assert Project().fetch(2) is False
+
+    def test_enabled_levels(
+        self,
+        stand_in_client: Cytomine,
+        project_route: None,
+        set_level: Callable[[int], None],
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        set_level(logging.DEBUG)
+
+        with caplog.at_level(logging.DEBUG, logger="cytomine.client"):
+            Project().fetch(1)
+            Project().fetch(2)
+
+        messages = [record.getMessage() for record in caplog.records]
+        assert messages[0] == "[GET] [project] 1 : p | 200 OK"
+        assert messages[1].startswith("DUMP:\n< GET /api/project/1.json")
+        assert messages[2] == "[GET] project/2.json | 404 Not Found (not found)"
+        assert caplog.records[2].levelno == logging.ERROR
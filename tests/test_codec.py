@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+# pylint: disable=unused-argument
+
+import json
+from typing import Any, Dict, Iterator, Tuple
+
+import pytest
+
+from cytomine import codec
+from cytomine.cytomine import Cytomine
+from cytomine.models import Annotation, AnnotationCollection, Project
+from tests.conftest import StandInServer
+
+
+@pytest.fixture(name="codec_name", params=list(codec.CODECS))
+def fixture_codec_name(request: pytest.FixtureRequest) -> Iterator[str]:
+    previous = codec.get_codec()
+    try:
+        codec.set_codec(request.param)
+    except ImportError:
+        pytest.skip(f"{request.param} is not installed")
+    yield request.param
+    codec.set_codec(previous)
+
+
+class TestCodec:
+    def test_model_to_json(self, codec_name: str) -> None:
+        annotation = Annotation("POINT (1 2)", 3, [4, 5], uri_="x", name="é")
+
+        assert json.loads(annotation.to_json()) == {
+            "location": "POINT (1 2)",
+            "image": 3,
+            "term": [4, 5],
+            "uri": "x",
+            "name": "é",
+        }
+
+    def test_collection_to_json(self, codec_name: str) -> None:
+        annotations = AnnotationCollection()
+        annotations.extend([Annotation(f"POINT ({i} {i})", i) for i in range(3)])
+
+        assert json.loads(annotations.to_json()) == [
+            json.loads(annotation.to_json()) for annotation in annotations
+        ]
+
+    def test_loads_error(self, codec_name: str) -> None:
+        with pytest.raises(json.JSONDecodeError):
+            codec.loads(b"{not json")
+
+    def test_unknown_codec(self) -> None:
+        with pytest.raises(ValueError):
+            codec.set_codec("unknown")
+
+    def test_unicode_body(
+        self,
+        codec_name: str,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+    ) -> None:
+        def echo(query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+            body = handler.rfile.read(int(handler.headers["Content-Length"]))
+            project = json.loads(body.decode("utf-8"))
+            return 200, {}, json.dumps({"project": dict(project, id=1)}).encode()
+
+        stand_in.route("POST", "/api/project.json", echo)
+
+        project = Project("Projet à l'échelle", 1).save()
+
+        assert isinstance(project, Project)
+        assert project.id == 1
+        assert project.name == "Projet à l'échelle"
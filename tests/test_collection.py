@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+# pylint: disable=unused-argument
+
+import json
+import math
+from typing import Any, Dict, List, Tuple
+
+import pytest
+import requests  # type: ignore
+
+from cytomine.cytomine import Cytomine
+from cytomine.models import (
+    Annotation,
+    AnnotationCollection,
+    Project,
+    ProjectCollection,
+    Property,
+    PropertyCollection,
+)
+from cytomine.models._utilities.columns import ColumnBuilder
+from cytomine.models.collection import (
+    Collection,
+    CollectionPartialFetchException,
+    CollectionPartialUploadException,
+)
+from tests.conftest import StandInServer
+
+
+def serve_projects(server: StandInServer, size: int) -> None:
+    def projects(query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+        offset, max = int(query.get("offset", 0)), int(query.get("max", 0))
+        end = size if max == 0 else min(size, offset + max)
+        content = {
+            "collection": [{"id": i, "name": f"p{i}"} for i in range(offset, end)],
+            "size": size,
+        }
+        return 200, {"Content-Type": "application/json"}, json.dumps(content).encode()
+
+    server.route("GET", "/api/project.json", projects)
+
+
+class TestCollectionPagination:
+    @pytest.mark.parametrize("size", [0, 5, 10, 25, 30])
+    @pytest.mark.parametrize("prefetch", [0, 3])
+    def test_fetch_request_count(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        size: int,
+        prefetch: int,
+    ) -> None:
+        serve_projects(stand_in, size)
+
+        projects = ProjectCollection().fetch(max=10, prefetch=prefetch)
+
+        assert isinstance(projects, ProjectCollection)
+        assert [project.id for project in projects] == list(range(size))
+        assert stand_in.count("GET", "/api/project.json") == max(1, math.ceil(size / 10))
+
+    def test_total_pages(self, stand_in: StandInServer, stand_in_client: Cytomine) -> None:
+        serve_projects(stand_in, 25)
+
+        projects = ProjectCollection(max=10)
+        projects.fetch_next_page()
+
+        assert projects._total_pages == 3  # pylint: disable=protected-access
+        assert [p.id for p in projects] == list(range(10))
+
+        projects.fetch_next_page()
+        projects.fetch_next_page()
+
+        assert [p.id for p in projects] == list(range(20, 25))
+
+
+class TestCollectionStream:
+    def test_stream(self, stand_in: StandInServer, stand_in_client: Cytomine) -> None:
+        serve_projects(stand_in, 25)
+
+        ids = [project.id for project in ProjectCollection().stream(max=10)]
+
+        assert ids == list(range(25))
+        assert stand_in.count("GET", "/api/project.json") == 3
+
+    def test_iter_pages(self, stand_in: StandInServer, stand_in_client: Cytomine) -> None:
+        serve_projects(stand_in, 20)
+
+        pages = list(ProjectCollection().iter_pages(max=10))
+
+        assert [len(page) for page in pages] == [10, 10]
+        assert all(isinstance(p, Project) for page in pages for p in page)
+        assert stand_in.count("GET", "/api/project.json") == 2
+
+    def test_stream_failure(self, stand_in: StandInServer, stand_in_client: Cytomine) -> None:
+        with pytest.raises(CollectionPartialFetchException) as error:
+            list(ProjectCollection(offset=5).stream(max=10))
+
+        assert error.value.offset == 5
+
+    def test_stream_connection_error(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        serve_projects(stand_in, 25)
+        fetch = ProjectCollection._fetch  # pylint: disable=protected-access
+
+        def fail_at_10(collection: ProjectCollection, *args: Any) -> Any:
+            if collection.offset == 10:
+                raise requests.exceptions.ConnectionError("connection reset")
+            return fetch(collection, *args)
+
+        monkeypatch.setattr(ProjectCollection, "_fetch", fail_at_10)
+        ids: List[int] = []
+
+        with pytest.raises(CollectionPartialFetchException) as error:
+            ids.extend(project.id for project in ProjectCollection().stream(max=10))
+
+        assert ids == list(range(10))
+        assert error.value.offset == 10
+        assert isinstance(error.value.__cause__, requests.exceptions.ConnectionError)
+
+
+class TestCollectionSave:
+    @pytest.mark.parametrize("domain", [False, True])
+    def test_save_connection_error(
+        self,
+        stand_in_client: Cytomine,
+        monkeypatch: pytest.MonkeyPatch,
+        domain: bool,
+    ) -> None:
+        collection: Collection
+        if domain:
+            collection = PropertyCollection(Project(id=1))
+            collection.extend(Property(Project(id=1), f"k{i}", i) for i in range(6))
+        else:
+            collection = AnnotationCollection()
+            collection.extend(Annotation(location=f"POINT({i} 0)") for i in range(6))
+        posted: List[int] = []
+
+        def post_collection(chunk: Collection, *args: Any) -> bool:
+            if chunk[0] is collection[2]:
+                raise requests.exceptions.ConnectionError("connection reset")
+            posted.extend(collection.index(item) for item in chunk)
+            return True
+
+        monkeypatch.setattr(stand_in_client, "post_collection", post_collection)
+
+        with pytest.raises(CollectionPartialUploadException) as error:
+            collection.save(chunk=2)
+
+        assert sorted(posted) == [0, 1, 4, 5]
+        created, failed = error.value.created, error.value.failed
+        assert created is not None and failed is not None
+        assert sorted(collection.index(item) for item in created) == [0, 1, 4, 5]
+        assert sorted(collection.index(item) for item in failed) == [2, 3]
+
+
+class TestCollectionPrefetch:
+    def test_fetch(self, stand_in: StandInServer, stand_in_client: Cytomine) -> None:
+        serve_projects(stand_in, 95)
+
+        projects = ProjectCollection().fetch(max=10, prefetch=4)
+
+        assert isinstance(projects, ProjectCollection)
+        assert [project.id for project in projects] == list(range(95))
+        assert stand_in.count("GET", "/api/project.json") == 10
+
+    def test_retry(self, stand_in: StandInServer, stand_in_client: Cytomine) -> None:
+        serve_projects(stand_in, 30)
+        serve = stand_in.routes[("GET", "/api/project.json")]
+        failures = {"10": 1}
+
+        def flaky(query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+            if failures.get(query["offset"], 0) > 0:
+                failures[query["offset"]] -= 1
+                return 500, {}, b""
+            return serve(query, handler)
+
+        stand_in.route("GET", "/api/project.json", flaky)
+
+        ids = [project.id for project in ProjectCollection().stream(max=10, prefetch=3)]
+
+        assert ids == list(range(30))
+        assert stand_in.count("GET", "/api/project.json") == 4
+
+
+class TestCollectionCompact:
+    def test_fetch_compact(self, stand_in: StandInServer, stand_in_client: Cytomine) -> None:
+        serve_projects(stand_in, 25)
+
+        full = ProjectCollection().fetch(max=10)
+        compact = ProjectCollection().fetch(max=10, compact=True)
+
+        assert isinstance(full, ProjectCollection)
+        assert isinstance(compact, ProjectCollection)
+        for project, record in zip(full, compact):
+            assert not hasattr(record, "__dict__")
+            assert record.id == project.id
+            assert record.name == project.name
+            assert record.ontology is None
+            assert json.loads(record.to_json()) == json.loads(project.to_json())
+            assert isinstance(record.to_model(), Project)
+        assert json.loads(compact.to_json()) == json.loads(full.to_json())
+
+    def test_populate_compact(self) -> None:
+        annotations = AnnotationCollection()
+        annotations._compact = True  # pylint: disable=protected-access
+        annotations.populate(
+            {
+                "collection": [
+                    {"id": 1, "uri": "u", "class": "c", "id_image": 2},
+                    {"id": 2, "area": 3.0, "_private": 1},
+                ],
+                "size": 2,
+            }
+        )
+
+        assert annotations[0].uri_ == "u"
+        assert annotations[0].class_ == "c"
+        assert annotations[0].image == 2
+        assert annotations[0].area is None
+        assert annotations[1].area == 3.0
+        assert not hasattr(annotations[1], "_private")
+
+    def test_populate_compact_domain_collection(self) -> None:
+        project = Project(id=5)
+        properties = PropertyCollection(project)
+        properties._compact = True  # pylint: disable=protected-access
+        properties.populate(
+            {
+                "collection": [
+                    {"id": 1, "key": "a", "value": "1", "domainIdent": 5},
+                    {"id": 2, "key": "b", "value": "2", "domainIdent": 5},
+                ],
+                "size": 2,
+            }
+        )
+
+        model = properties[1].to_model()
+        assert isinstance(model, Property)
+        assert model.obj is project
+        assert (model.key, model.value, model.domainIdent) == ("b", "2", 5)
+        assert str(properties[0]) == str(properties[0].to_model())
+
+        # The pages of the collection share their compact class
+        page = properties._new_page(2)  # pylint: disable=protected-access
+        page.populate({"collection": [{"id": 3, "key": "c", "value": "3"}], "size": 3})
+        assert type(page[0]) is type(properties[0])
+
+
+def serve_annotations(server: StandInServer, size: int) -> None:
+    def annotations(query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+        offset, max = int(query.get("offset", 0)), int(query.get("max", 0))
+        end = size if max == 0 else min(size, offset + max)
+        content = {
+            "collection": [
+                {
+                    "id": i,
+                    "image": 100 + i % 2,
+                    "area": float(i),
+                    "term": [i % 3],
+                    "class": "be.cytomine.Annotation",
+                    **({"user": 7} if i % 2 else {}),
+                }
+                for i in range(offset, end)
+            ],
+            "size": size,
+        }
+        return 200, {"Content-Type": "application/json"}, json.dumps(content).encode()
+
+    server.route("GET", "/api/annotation.json", annotations)
+
+
+class TestCollectionColumnar:
+    def test_fetch_columnar(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        np = pytest.importorskip("numpy")
+        serve_annotations(stand_in, 25)
+
+        def populate(*args: Any) -> None:
+            raise AssertionError("No model must be created.")
+
+        monkeypatch.setattr(Annotation, "populate", populate)
+
+        annotations = AnnotationCollection(project=1)
+        columns = annotations.fetch_columnar(max=10)
+
+        assert len(annotations) == 0
+        assert stand_in.count("GET", "/api/annotation.json") == 3
+        assert list(columns) == ["id", "image", "area", "term", "class_", "user"]
+        assert columns["id"].dtype == np.int64
+        assert columns["id"].tolist() == list(range(25))
+        assert columns["area"].dtype == np.float64
+        assert columns["term"].dtype == object
+        assert columns["term"][4] == [1]
+        assert columns["user"].dtype == np.float64
+        assert np.isnan(columns["user"][0]) and columns["user"][1] == 7
+
+        _, counts = np.unique(columns["image"], return_counts=True)
+        assert counts.tolist() == [13, 12]
+
+    def test_fetch_columnar_prefetch(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+    ) -> None:
+        pytest.importorskip("numpy")
+        serve_annotations(stand_in, 25)
+
+        columns = AnnotationCollection(project=1).fetch_columnar(max=5, prefetch=3)
+
+        assert columns["id"].tolist() == list(range(25))
+        assert stand_in.count("GET", "/api/annotation.json") == 5
+
+    def test_fetch_columnar_fields(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+    ) -> None:
+        pytest.importorskip("numpy")
+        serve_annotations(stand_in, 5)
+
+        columns = AnnotationCollection(project=1).fetch_columnar(fields=["area", "project"])
+
+        assert list(columns) == ["area", "project"]
+        assert columns["area"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert columns["project"].dtype == object
+        assert columns["project"].tolist() == [None] * 5
+
+    def test_to_columns(self, stand_in: StandInServer, stand_in_client: Cytomine) -> None:
+        pytest.importorskip("numpy")
+        serve_projects(stand_in, 5)
+
+        for compact in (False, True):
+            projects = ProjectCollection().fetch(compact=compact)
+            assert isinstance(projects, ProjectCollection)
+            columns = projects.to_columns(fields=["id", "name"])
+            assert columns["id"].tolist() == list(range(5))
+            assert columns["name"].tolist() == [f"p{i}" for i in range(5)]
+
+    def test_column_builder(self) -> None:
+        np = pytest.importorskip("numpy")
+        columns = ColumnBuilder()
+        columns.extend([{"id_image": 1, "image": 2, "_private": 0}, {"flag": True}])
+
+        arrays = columns.build()
+        assert list(arrays) == ["image", "flag"]
+        assert arrays["image"].tolist()[0] == 2 and np.isnan(arrays["image"][1])
+        assert arrays["flag"].tolist() == [None, True]
+        with pytest.raises(ValueError):
+            columns.build("unknown")
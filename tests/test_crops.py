@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# pylint: disable=unused-argument
+
+import os
+import threading
+from io import BytesIO
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from cytomine.cytomine import Cytomine
+from cytomine.models import Annotation
+from cytomine.retry import RetryPolicy
+from cytomine.utilities.crops import CropManifest, CropStream
+from tests.conftest import StandInServer
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+@pytest.fixture(name="client_options")
+def fixture_client_options() -> Dict[str, Any]:
+    return {"retry_policy": RetryPolicy.disabled()}
+
+
+def crop_path(id: int, image: str = "crop", extension: str = "jpg") -> str:
+    return f"/api/userannotation/{id}/{image}.{extension}"
+
+
+def annotations(stand_in: StandInServer, count: int) -> List[Annotation]:
+    return [
+        Annotation(id=id, cropURL=f"{stand_in.url}{crop_path(id)}")
+        for id in range(1, count + 1)
+    ]
+
+
+def route_crops(stand_in: StandInServer, count: int, delays: Dict[int, float]) -> None:
+    def route(id: int) -> None:
+        def fn(query: Dict[str, str], handler: Any) -> Response:
+            threading.Event().wait(delays.get(id, 0))
+            return 200, {}, f"crop {id}".encode("utf-8")
+
+        stand_in.route("GET", crop_path(id), fn)
+
+    for id in range(1, count + 1):
+        route(id)
+
+
+def test_crops_as_completed(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    route_crops(stand_in, 6, {1: 0.3})
+
+    crops = list(CropStream(annotations(stand_in, 6), n_workers=4))
+
+    assert {annotation.id for annotation, _ in crops} == {1, 2, 3, 4, 5, 6}
+    assert crops[-1][0].id == 1
+    assert all(crop == f"crop {annotation.id}".encode("utf-8") for annotation, crop in crops)
+
+
+def test_crops_in_order(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    route_crops(stand_in, 6, {1: 0.2, 2: 0.1})
+
+    crops = list(CropStream(annotations(stand_in, 6), n_workers=4, ordered=True))
+
+    assert [annotation.id for annotation, _ in crops] == [1, 2, 3, 4, 5, 6]
+
+
+@pytest.mark.parametrize(
+    "client_options",
+    [{"retry_policy": RetryPolicy(backoff_factor=0, jitter=False)}],
+)
+def test_crop_errors_and_retries(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    route_crops(stand_in, 2, {})
+    calls: List[int] = []
+
+    def flaky(query: Dict[str, str], handler: Any) -> Response:
+        calls.append(1)
+        return (503, {}, b"") if len(calls) < 2 else (200, {}, b"crop 3")
+
+    stand_in.route("GET", crop_path(3), flaky)
+    items = annotations(stand_in, 4) + [Annotation(id=5)]
+    stream = CropStream(items)
+
+    crops = dict((annotation.id, crop) for annotation, crop in stream)
+
+    assert crops == {1: b"crop 1", 2: b"crop 2", 3: b"crop 3"}
+    assert len(calls) == 2
+    assert stream.errors == {4: "download failed", 5: "cropURL is None"}
+    assert stand_in.count("GET", crop_path(4)) == 1  # not retried: not found
+
+
+def test_crop_parameters(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    stand_in.route_file(crop_path(1, "alphamask", "png"), b"alphamask")
+
+    crops = list(CropStream(annotations(stand_in, 1), mask=True, alpha=True, max_size=64))
+
+    assert crops[0][1] == b"alphamask"
+    assert stand_in.requests[-1][2]["maxSize"] == "64"
+
+
+def test_decoded_crops(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    pytest.importorskip("numpy")
+    image_module = pytest.importorskip("PIL.Image")
+    buffer = BytesIO()
+    image_module.new("RGB", (20, 10), color=(1, 2, 3)).save(buffer, format="PNG")
+    stand_in.route_file(crop_path(1, extension="png"), buffer.getvalue())
+
+    crops = list(CropStream(annotations(stand_in, 1), format="png", output="array"))
+
+    assert crops[0][1].shape == (10, 20, 3)
+
+
+def test_resume_from_manifest(
+    stand_in_client: Cytomine,
+    stand_in: StandInServer,
+    tmp_path: str,
+) -> None:
+    route_crops(stand_in, 5, {})
+    manifest = os.path.join(tmp_path, "crops.txt")
+
+    for annotation, _ in CropStream(annotations(stand_in, 5), ordered=True, manifest=manifest):
+        if annotation.id == 3:
+            break  # interrupted while processing crop 3
+    stand_in.requests.clear()
+    stream = CropStream(annotations(stand_in, 5), ordered=True, manifest=manifest)
+
+    assert [annotation.id for annotation, _ in stream] == [3, 4, 5]
+    assert stream.skipped == 2
+    assert {path for _, path, _ in stand_in.requests} == {crop_path(id) for id in (3, 4, 5)}
+    assert len(CropManifest(manifest)) == 5
+
+
+def test_manifest_ignores_truncated_lines(tmp_path: str) -> None:
+    path = os.path.join(tmp_path, "crops.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("1\n2\n3")
+
+    manifest = CropManifest(path)
+    manifest.add(2)
+    manifest.add(4)
+
+    assert 3 not in manifest and len(manifest) == 3
+    reopened = CropManifest(path)
+    assert [id in reopened for id in (1, 2, 3, 4, 34)] == [True, True, False, True, False]
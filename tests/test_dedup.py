@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+
+# pylint: disable=unused-argument
+
+import itertools
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from cytomine import dedup
+from cytomine.cytomine import Cytomine
+from cytomine.dedup import UploadIndex
+from cytomine.models import UploadedFile
+from cytomine.utilities.ingest import ingest_images
+from tests.conftest import StandInServer
+
+CONTENT = os.urandom(5000)
+
+
+@pytest.fixture(name="slide")
+def fixture_slide(tmp_path: Any) -> str:
+    path = os.path.join(tmp_path, "slide.tif")
+    with open(path, "wb") as f:
+        f.write(CONTENT)
+    return path
+
+
+@pytest.fixture(name="index")
+def fixture_index(tmp_path: Any) -> UploadIndex:
+    return UploadIndex(os.path.join(tmp_path, "uploads.json"))
+
+
+@pytest.fixture(name="storage")
+def fixture_storage(stand_in: StandInServer) -> Dict[int, Dict[str, Any]]:
+    """Upload endpoint and uploaded files of the stand-in server."""
+    files: Dict[int, Dict[str, Any]] = {}
+    ids = itertools.count(1)
+
+    def upload(query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+        body = handler.rfile.read(int(handler.headers["Content-Length"]))
+        id = next(ids)
+        files[id] = {
+            "id": id,
+            "storage": int(query["storage"]),
+            "size": len(CONTENT) if len(body) > len(CONTENT) else 0,
+            "status": UploadedFile.DEPLOYED,
+        }
+        response = [{"uploadedFile": files[id], "images": [{"image": {"id": 100 + id}}]}]
+        return 200, {}, json.dumps(response).encode("utf-8")
+
+    def uploaded_file(query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+        id = int(handler.path.split("/")[-1].split(".")[0])
+        if id not in files:
+            return 404, {}, b"{}"
+        return 200, {"Content-Type": "application/json"}, json.dumps(files[id]).encode()
+
+    stand_in.route("POST", "/upload", upload)
+    for id in range(1, 4):
+        stand_in.route("GET", f"/api/uploadedfile/{id}.json", uploaded_file)
+    return files
+
+
+class TestUploadIndex:
+    def test_skip_known_file(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        storage: Dict[int, Dict[str, Any]],
+        slide: str,
+        index: UploadIndex,
+    ) -> None:
+        uploaded = stand_in_client.upload_image(slide, 1, dedup_index=index)
+        assert isinstance(uploaded, UploadedFile)
+
+        again = stand_in_client.upload_image(slide, 1, dedup_index=UploadIndex(index.path))
+
+        assert isinstance(again, UploadedFile)
+        assert again.id == uploaded.id
+        assert [image["abstractImage"].id for image in again.images] == [101]  # type: ignore
+        assert stand_in.count("POST", "/upload") == 1
+
+    def test_other_storage(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        storage: Dict[int, Dict[str, Any]],
+        slide: str,
+        index: UploadIndex,
+    ) -> None:
+        stand_in_client.upload_image(slide, 1, dedup_index=index)
+        uploaded = stand_in_client.upload_image(slide, 2, dedup_index=index)
+
+        assert isinstance(uploaded, UploadedFile)
+        assert uploaded.id == 2
+        assert stand_in.count("POST", "/upload") == 2
+
+    def test_project_or_properties(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        storage: Dict[int, Dict[str, Any]],
+        slide: str,
+        index: UploadIndex,
+    ) -> None:
+        stand_in_client.upload_image(slide, 1, dedup_index=index)
+
+        in_project = stand_in_client.upload_image(slide, 1, id_project=5, dedup_index=index)
+        with_properties = stand_in_client.upload_image(
+            slide,
+            1,
+            properties={"key": "value"},
+            dedup_index=index,
+        )
+
+        assert isinstance(in_project, UploadedFile) and in_project.id == 2
+        assert isinstance(with_properties, UploadedFile) and with_properties.id == 3
+        assert stand_in.count("POST", "/upload") == 3
+        assert stand_in.count("GET", "/api/uploadedfile/1.json") == 0
+
+    def test_deleted_upload(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        storage: Dict[int, Dict[str, Any]],
+        slide: str,
+        index: UploadIndex,
+    ) -> None:
+        stand_in_client.upload_image(slide, 1, dedup_index=index)
+        del storage[1]
+
+        uploaded = stand_in_client.upload_image(slide, 1, dedup_index=index)
+
+        assert isinstance(uploaded, UploadedFile)
+        assert uploaded.id == 2
+        assert stand_in.count("POST", "/upload") == 2
+
+    def test_digest_cache(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        slide: str,
+        index: UploadIndex,
+    ) -> None:
+        hashed: List[str] = []
+        file_digest = dedup.file_digest
+
+        def counted_digest(path: str, algorithm: str) -> str:
+            hashed.append(path)
+            return file_digest(path, algorithm)
+
+        monkeypatch.setattr(dedup, "file_digest", counted_digest)
+
+        digest = index.digest(slide)
+        assert index.digest(slide) == digest
+        index.save()
+        assert UploadIndex(index.path).digest(slide) == digest
+        assert len(hashed) == 1
+
+        with open(slide, "ab") as f:
+            f.write(b"more")
+        assert index.digest(slide) != digest
+        assert len(hashed) == 2
+
+    def test_ingest(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        storage: Dict[int, Dict[str, Any]],
+        slide: str,
+        index: UploadIndex,
+        tmp_path: Any,
+    ) -> None:
+        stand_in.route_json("GET", "/api/uploadedfile.json", {"collection": [], "size": 0})
+        stand_in_client.upload_image(slide, 1, dedup_index=index)
+        other = os.path.join(tmp_path, "other.tif")
+        with open(other, "wb") as f:
+            f.write(os.urandom(100))
+
+        report = ingest_images([slide, other], 1, dedup_index=index)
+
+        assert [result.deduplicated for result in report.results] == [True, False]
+        assert all(result.ok for result in report.results)
+        assert report.stages["upload"].skipped == 1
+        assert report.stages["upload"].bytes == 100
+        assert stand_in.count("POST", "/upload") == 2
+        # The deduplicated file is looked up once
+        assert stand_in.count("GET", "/api/uploadedfile/1.json") == 1
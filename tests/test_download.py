@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+
+# pylint: disable=unused-argument
+
+import hashlib
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from cytomine.cytomine import Cytomine
+from cytomine.download import CHUNK_SIZE, TransferCheckpoint, check_checksum, content_range
+from cytomine.retry import RetryPolicy
+from tests.conftest import StandInServer, file_response
+
+CONTENT = os.urandom(300_000)
+SHA256 = f"sha256:{hashlib.sha256(CONTENT).hexdigest()}"
+PATH = "/api/abstractimage/1/download"
+# Larger than the chunks written to the partial file
+LARGE_CONTENT = os.urandom(5 * 2**19)
+
+
+@pytest.fixture(name="client_options")
+def fixture_client_options() -> Dict[str, Any]:
+    return {"retry_policy": RetryPolicy.disabled()}
+
+
+class RangeRecorder:
+    """Serve CONTENT by ranges and record the requested ranges. Ranges starting
+    from `broken_from` fail while `broken` is set."""
+
+    def __init__(self, etag: str = '"v1"', broken_from: int = -1) -> None:
+        self.etag = etag
+        self.broken_from = broken_from
+        self.broken = broken_from >= 0
+        self.ranges: List[str] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+        requested = handler.headers.get("Range", "")
+        with self._lock:
+            self.ranges.append(requested)
+        start = int(requested[len("bytes=") :].split("-")[0] or 0)
+        if self.broken and start >= self.broken_from:
+            return 503, {}, b""
+        return file_response(CONTENT, handler, self.etag)
+
+
+class Interruptions:
+    """Serve LARGE_CONTENT, sending only half of the body of the `failures` next responses
+    before closing the connection."""
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.ranges: List[str] = []
+
+    def __call__(self, query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+        self.ranges.append(handler.headers.get("Range", ""))
+        status, headers, body = file_response(LARGE_CONTENT, handler, '"v1"')
+        if self.failures > 0:
+            self.failures -= 1
+            handler.close_connection = True
+            headers["Content-Length"] = str(len(body))
+            body = body[: len(body) // 2]
+        return status, headers, body
+
+
+class TestContentRange:
+    def test_parse(self) -> None:
+        assert content_range("bytes 0-99/1000") == (0, 99, 1000)
+        assert content_range("bytes 10-19/*") == (10, 19, None)
+        assert content_range(None) is None
+        assert content_range("bytes */1000") is None
+
+
+class TestTransferCheckpoint:
+    def test_missing(self, tmp_path: Any) -> None:
+        checkpoint = TransferCheckpoint(os.path.join(tmp_path, "c.json"), "key", 100)
+        checkpoint.add(10, 20)
+        checkpoint.add(20, 30)
+        checkpoint.add(50, 60)
+
+        assert checkpoint.completed == [(10, 30), (50, 60)]
+        assert checkpoint.missing(15) == [
+            (0, 10), (30, 45), (45, 50), (60, 75), (75, 90), (90, 100)
+        ]
+        assert not checkpoint.is_complete
+
+        checkpoint.add(0, 100)
+        assert checkpoint.missing(15) == []
+        assert checkpoint.is_complete
+
+    def test_save_load(self, tmp_path: Any) -> None:
+        path = os.path.join(tmp_path, "c.json")
+        checkpoint = TransferCheckpoint(path, "key", 100, '"v1"')
+        checkpoint.add(0, 40)
+        checkpoint.save()
+
+        loaded = TransferCheckpoint.load(path, "key")
+        assert loaded is not None
+        assert (loaded.size, loaded.etag, loaded.completed) == (100, '"v1"', [(0, 40)])
+        assert TransferCheckpoint.load(path, "other") is None
+
+        checkpoint.remove()
+        assert TransferCheckpoint.load(path, "key") is None
+
+    def test_reached(self, tmp_path: Any) -> None:
+        checkpoint = TransferCheckpoint(os.path.join(tmp_path, "c.json"), "key", 100)
+        checkpoint.add(0, 30)
+
+        assert checkpoint.reached(0) == 30
+        assert checkpoint.reached(10) == 30
+        assert checkpoint.reached(30) == 30
+        assert checkpoint.reached(50) == 50
+
+    def test_periodic_save(self, tmp_path: Any) -> None:
+        path = os.path.join(tmp_path, "c.json")
+        checkpoint = TransferCheckpoint(path, "key", 100, save_interval=0)
+        checkpoint.add(0, 30)
+
+        loaded = TransferCheckpoint.load(path, "key")
+        assert loaded is not None
+        assert loaded.completed == [(0, 30)]
+
+    def test_checksum(self, tmp_path: Any) -> None:
+        path = os.path.join(tmp_path, "file")
+        with open(path, "wb") as f:
+            f.write(CONTENT)
+
+        assert check_checksum(path, SHA256)
+        assert not check_checksum(path, "sha256:00")
+        with pytest.raises(ValueError):
+            check_checksum(path, "00")
+
+
+class TestRangedDownload:
+    def test_parallel(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        tmp_path: Any,
+    ) -> None:
+        recorder = RangeRecorder()
+        stand_in.route("GET", PATH, recorder)
+        destination = os.path.join(tmp_path, "image.tif")
+
+        assert stand_in_client.download_file(
+            "abstractimage/1/download",
+            destination,
+            n_workers=4,
+            part_size=2**16,
+            checksum=SHA256,
+        )
+
+        with open(destination, "rb") as f:
+            assert f.read() == CONTENT
+        assert sorted(os.listdir(tmp_path)) == ["image.tif"]
+        assert len(recorder.ranges) == 5
+
+    def test_resume(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        tmp_path: Any,
+    ) -> None:
+        recorder = RangeRecorder(broken_from=2**17)
+        stand_in.route("GET", PATH, recorder)
+        destination = os.path.join(tmp_path, "image.tif")
+
+        assert not stand_in_client.download_file(
+            "abstractimage/1/download",
+            destination,
+            n_workers=2,
+            part_size=2**16,
+        )
+        assert not os.path.exists(destination)
+        assert os.path.exists(f"{destination}.part.json")
+
+        recorder.broken = False
+        recorder.ranges.clear()
+        assert stand_in_client.download_file(
+            "abstractimage/1/download",
+            destination,
+            n_workers=2,
+            part_size=2**16,
+            checksum=SHA256,
+        )
+
+        with open(destination, "rb") as f:
+            assert f.read() == CONTENT
+        assert not os.path.exists(f"{destination}.part.json")
+        assert sorted(recorder.ranges) == [
+            "bytes=131072-196607",
+            "bytes=196608-262143",
+            "bytes=262144-299999",
+        ]
+
+    def test_resume_changed_file(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        tmp_path: Any,
+    ) -> None:
+        destination = os.path.join(tmp_path, "image.tif")
+        checkpoint = TransferCheckpoint(
+            f"{destination}.part.json",
+            f"{stand_in.url}{PATH}",
+            len(CONTENT),
+            '"v0"',
+        )
+        checkpoint.add(0, 2**16)
+        checkpoint.save()
+        with open(f"{destination}.part", "wb") as f:
+            f.write(b"\0" * len(CONTENT))
+
+        stand_in.route("GET", PATH, RangeRecorder(etag='"v1"'))
+        assert stand_in_client.download_file(
+            "abstractimage/1/download",
+            destination,
+            n_workers=2,
+            part_size=2**16,
+        )
+
+        with open(destination, "rb") as f:
+            assert f.read() == CONTENT
+
+    def test_no_range_support(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        tmp_path: Any,
+    ) -> None:
+        stand_in.route_file(PATH, CONTENT, ranges=False)
+        destination = os.path.join(tmp_path, "image.tif")
+
+        assert stand_in_client.download_file(
+            "abstractimage/1/download",
+            destination,
+            n_workers=4,
+            part_size=2**16,
+        )
+
+        with open(destination, "rb") as f:
+            assert f.read() == CONTENT
+        assert stand_in.count("GET", PATH) == 1
+
+    @pytest.mark.parametrize("n_workers", (1, 4))
+    def test_checksum_mismatch(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        tmp_path: Any,
+        n_workers: int,
+    ) -> None:
+        stand_in.route_file(PATH, CONTENT)
+        destination = os.path.join(tmp_path, "image.tif")
+
+        assert not stand_in_client.download_file(
+            "abstractimage/1/download",
+            destination,
+            n_workers=n_workers,
+            checksum="sha256:00",
+        )
+        assert os.listdir(tmp_path) == []
+
+    @pytest.mark.parametrize("status", (404, 500))
+    @pytest.mark.parametrize("n_workers", (1, 4))
+    def test_failed_download(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        tmp_path: Any,
+        status: int,
+        n_workers: int,
+    ) -> None:
+        stand_in.route("GET", PATH, lambda query, handler: (status, {}, b""))
+        destination = os.path.join(tmp_path, "image.tif")
+
+        assert not stand_in_client.download_file(
+            "abstractimage/1/download",
+            destination,
+            n_workers=n_workers,
+        )
+        assert os.listdir(tmp_path) == []
+
+
+class TestResumableDownload:
+    def test_resume_in_call(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        tmp_path: Any,
+    ) -> None:
+        route = Interruptions(failures=1)
+        stand_in.route("GET", PATH, route)
+        destination = os.path.join(tmp_path, "image.tif")
+
+        assert stand_in_client.download_file("abstractimage/1/download", destination)
+
+        with open(destination, "rb") as f:
+            assert f.read() == LARGE_CONTENT
+        # urllib3 2.x drops the chunk cut by the failure, urllib3 1.x keeps its bytes
+        assert route.ranges in (
+            ["", f"bytes={CHUNK_SIZE}-"],
+            ["", f"bytes={len(LARGE_CONTENT) // 2}-"],
+        )
+        assert os.listdir(tmp_path) == ["image.tif"]
+
+    def test_resume_next_call(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        tmp_path: Any,
+    ) -> None:
+        route = Interruptions(failures=3)
+        stand_in.route("GET", PATH, route)
+        destination = os.path.join(tmp_path, "image.tif")
+
+        assert not stand_in_client.download_file(
+            "abstractimage/1/download",
+            destination,
+            override=False,
+        )
+        assert not os.path.exists(destination)
+        checkpoint = TransferCheckpoint.load(
+            f"{destination}.part.json",
+            f"{stand_in.url}{PATH}",
+        )
+        assert checkpoint is not None
+        reached = checkpoint.reached(0)
+        assert 0 < reached < len(LARGE_CONTENT)
+
+        # The partial file is not mistaken for the downloaded file
+        route.ranges.clear()
+        assert stand_in_client.download_file(
+            "abstractimage/1/download",
+            destination,
+            override=False,
+        )
+
+        with open(destination, "rb") as f:
+            assert f.read() == LARGE_CONTENT
+        assert route.ranges == [f"bytes={reached}-"]
+        assert os.listdir(tmp_path) == ["image.tif"]
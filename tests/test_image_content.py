@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# pylint: disable=unused-argument
+
+from io import BytesIO
+from typing import Any, Dict
+
+import pytest
+
+from cytomine.cytomine import Cytomine
+from cytomine.models import Annotation, ImageInstance, SliceInstance
+from cytomine.models._utilities import generic_parallel_stream
+from cytomine.retry import RetryPolicy
+from tests.conftest import StandInServer
+
+
+@pytest.fixture(name="client_options")
+def fixture_client_options() -> Dict[str, Any]:
+    return {"retry_policy": RetryPolicy.disabled()}
+
+
+def png(width: int, height: int, value: int) -> bytes:
+    image_module = pytest.importorskip("PIL.Image")
+    buffer = BytesIO()
+    image_module.new("L", (width, height), color=value).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_window_content(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    stand_in.route_file("/api/imageinstance/1/window-10-20-30-40.png", b"window")
+    image = ImageInstance(id=1)
+
+    content = image.window_content(10, 20, 30, 40, alpha=True, annotations=[1, 2])
+    view = image.window_content(10, 20, 30, 40, format="png", output="memoryview")
+
+    assert content == b"window"
+    assert isinstance(view, memoryview) and view == b"window"
+    _, _, query = stand_in.requests[0]
+    assert query == {"annotations": "1,2", "alphaMask": "true", "bits": "8", "complete": "True"}
+
+
+def test_window_content_decoded(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    pytest.importorskip("numpy")
+    stand_in.route_file("/api/sliceinstance/2/window-0-0-30-40.png", png(30, 40, 7))
+
+    array = SliceInstance(id=2).window_content(0, 0, 30, 40, format="png", output="array")
+
+    assert array.shape == (40, 30) and (array == 7).all()
+
+
+def test_window_content_failure(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    image = ImageInstance(id=1)
+
+    assert image.window_content(0, 0, 10, 10) is None
+    with pytest.raises(ValueError):
+        image.window_content(0, 0, 10, 10, output="file")
+    assert stand_in.count("GET") == 1
+
+
+def test_dump_content(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    stand_in.route_file("/api/imageinstance/1/thumb.png", b"thumb")
+
+    assert ImageInstance(id=1).dump_content("png", max_size=(256, 512)) == b"thumb"
+    assert stand_in.requests[0][2]["maxSize"] == "512"
+
+
+def test_annotation_dump_content(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    stand_in.route_file("/api/userannotation/3/mask.png", b"mask")
+    stand_in.route_file("/api/userannotation/3/alphamask.png", b"alphamask")
+    annotation = Annotation(id=3, cropURL=f"{stand_in.url}/api/userannotation/3/crop.jpg")
+
+    assert annotation.dump_content("png", mask=True) == b"mask"
+    assert annotation.dump_content(mask=True, alpha=True) == b"alphamask"
+
+
+def test_content_from_parallel_helpers(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    for id in range(1, 9):
+        stand_in.route_file(f"/api/imageinstance/{id}/thumb.jpg", str(id).encode("utf-8"))
+    images = [ImageInstance(id=id) for id in range(1, 9)]
+
+    results = list(
+        generic_parallel_stream(images, lambda image: image.dump_content(), 4, ordered=True)
+    )
+
+    assert [content for _, content in results] == [str(id).encode("utf-8") for id in range(1, 9)]
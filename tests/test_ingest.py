@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+
+# pylint: disable=unused-argument
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from requests_toolbelt.multipart.decoder import MultipartDecoder
+
+from cytomine.cytomine import Cytomine
+from cytomine.models import UploadedFile
+from cytomine.utilities.ingest import ingest_images
+from tests.conftest import StandInServer
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+@pytest.fixture(name="sleeps")
+def fixture_sleeps(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    delays: List[float] = []
+    monkeypatch.setattr(time, "sleep", delays.append)
+    return delays
+
+
+class StandInStorage:
+    """Upload endpoint and listing of the uploaded files, where the status of each
+    uploaded file follows its timeline (one status per listing). The `failures` first
+    listings fail."""
+
+    def __init__(
+        self,
+        server: StandInServer,
+        timelines: Dict[str, List[int]],
+        failures: int = 0,
+    ) -> None:
+        self.timelines = timelines
+        self.failures = failures
+        self.files: Dict[int, str] = {}
+        self.listings = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        server.route("POST", "/upload", self.upload)
+        server.route("GET", "/api/uploadedfile.json", self.list)
+
+    def upload(self, query: Dict[str, str], handler: Any) -> Response:
+        body = handler.rfile.read(int(handler.headers["Content-Length"]))
+        part = MultipartDecoder(body, handler.headers["Content-Type"]).parts[0]
+        disposition = part.headers[b"Content-Disposition"].decode("utf-8")
+        filename = re.search(r'filename="([^"]+)"', disposition).group(1)  # type: ignore
+
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        threading.Event().wait(0.05)
+        with self._lock:
+            self.in_flight -= 1
+            id = len(self.files) + 1
+            self.files[id] = filename
+
+        uploaded = {"id": id, "originalFilename": filename, "status": UploadedFile.DETECTING_FORMAT}
+        return 200, {}, json.dumps([{"uploadedFile": uploaded}]).encode("utf-8")
+
+    def list(self, query: Dict[str, str], handler: Any) -> Response:
+        if self.failures > 0:
+            self.failures -= 1
+            return 400, {"Content-Type": "application/json"}, b"{}"
+        listing = self.listings
+        self.listings += 1
+        collection = [
+            {"id": id, "status": self.timelines[name][min(listing, len(self.timelines[name]) - 1)]}
+            for id, name in self.files.items()
+        ]
+        body = json.dumps({"collection": collection, "size": len(collection)})
+        return 200, {"Content-Type": "application/json"}, body.encode("utf-8")
+
+
+def create_slides(directory: str, names: List[str]) -> List[str]:
+    paths = []
+    for i, name in enumerate(names):
+        path = os.path.join(directory, name)
+        with open(path, "wb") as f:
+            f.write(os.urandom(1000 * (i + 1)))
+        paths.append(path)
+    return paths
+
+
+class TestIngest:
+    def test_ingest(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        sleeps: List[float],
+        tmp_path: Any,
+    ) -> None:
+        converting, deployed = UploadedFile.CONVERTING, UploadedFile.DEPLOYED
+        storage = StandInStorage(
+            stand_in,
+            {
+                "a.tif": [converting] * 5 + [deployed],
+                "b.tif": [converting, UploadedFile.ERROR_CONVERSION],
+                "c.tif": [deployed],
+            },
+        )
+        slides = create_slides(tmp_path, ["a.tif", "b.tif", "c.tif"])
+
+        report = ingest_images(slides, 1, n_workers=2, poll_interval=1, max_poll_interval=3)
+
+        assert [result.ok for result in report.results] == [True, False, True]
+        assert [result.status for result in report.results] == [
+            deployed,
+            UploadedFile.ERROR_CONVERSION,
+            deployed,
+        ]
+        assert report.failed[0].error == "processing failed (status 31)"
+        assert storage.max_in_flight == 2
+        assert storage.listings == 6
+        # Back to the initial interval after a change, doubled otherwise
+        assert sleeps == [1, 1, 2, 3, 3]
+
+        upload, processing = report.stages["upload"], report.stages["processing"]
+        assert (upload.files, upload.bytes, upload.requests) == (3, 6000, 3)
+        assert upload.files_per_second > 0
+        assert (processing.files, processing.requests) == (3, 6)
+
+    def test_polling_failure(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        sleeps: List[float],
+        tmp_path: Any,
+    ) -> None:
+        deployed = UploadedFile.DEPLOYED
+        StandInStorage(stand_in, {"a.tif": [UploadedFile.CONVERTING, deployed]}, failures=2)
+        slides = create_slides(tmp_path, ["a.tif"])
+
+        report = ingest_images(slides, 1, poll_interval=1, max_poll_interval=3)
+
+        assert report.results[0].ok
+        assert report.results[0].status == deployed
+        assert sleeps == [2, 3, 1]
+        assert report.stages["processing"].requests == 4
+
+    def test_timeout(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        sleeps: List[float],
+        tmp_path: Any,
+    ) -> None:
+        StandInStorage(stand_in, {"a.tif": [UploadedFile.CONVERTING]})
+        slides = create_slides(tmp_path, ["a.tif"])
+
+        report = ingest_images(slides, 1, timeout=0)
+
+        assert not report.results[0].ok
+        assert "still processed" in report.results[0].error  # type: ignore
+
+    def test_upload_failure(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        tmp_path: Any,
+    ) -> None:
+        StandInStorage(stand_in, {})
+        report = ingest_images([os.path.join(tmp_path, "missing.tif")], 1)
+
+        assert report.results[0].error.startswith("upload failed")  # type: ignore
+        assert report.stages["upload"].files == 0
+        assert stand_in.count("GET", "/api/uploadedfile.json") == 0
+
+    def test_no_wait(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        tmp_path: Any,
+    ) -> None:
+        StandInStorage(stand_in, {"a.tif": [UploadedFile.CONVERTING]})
+        report = ingest_images(create_slides(tmp_path, ["a.tif"]), 1, wait=False)
+
+        assert report.results[0].ok
+        assert report.results[0].status == UploadedFile.DETECTING_FORMAT
+        assert stand_in.count("GET", "/api/uploadedfile.json") == 0
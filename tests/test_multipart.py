@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+
+import os
+from typing import Any, List, Tuple
+
+import pytest
+from requests_toolbelt import MultipartEncoder
+from requests_toolbelt.multipart.decoder import MultipartDecoder
+
+from cytomine.multipart import ALIGNMENT, MultipartFileStream
+
+CONTENT = os.urandom(3 * ALIGNMENT + 1234)
+
+
+@pytest.fixture(name="path")
+def fixture_path(tmp_path: Any) -> str:
+    path = os.path.join(tmp_path, "slide.tif")
+    with open(path, "wb") as f:
+        f.write(CONTENT)
+    return path
+
+
+def decode(stream: MultipartFileStream) -> Tuple[bytes, Any]:
+    body = b"".join(bytes(block) for block in stream)
+    assert len(body) == len(stream)
+    part = MultipartDecoder(body, stream.content_type).parts[0]
+    return part.content, part.headers
+
+
+class TestMultipartFileStream:
+    @pytest.mark.parametrize("use_mmap", (True, False))
+    @pytest.mark.parametrize("start, end", ((0, None), (100, 2 * ALIGNMENT + 7), (5, 5)))
+    def test_content(self, path: str, use_mmap: bool, start: int, end: Any) -> None:
+        stream = MultipartFileStream(
+            "files[]",
+            path,
+            start=start,
+            end=end,
+            buffer_size=ALIGNMENT,
+            use_mmap=use_mmap,
+        )
+
+        # Iterable again, for retries
+        for _ in range(2):
+            content, _ = decode(stream)
+            assert content == CONTENT[start:end]
+
+    def test_aligned_blocks(self, path: str) -> None:
+        stream = MultipartFileStream("files[]", path, start=100, buffer_size=ALIGNMENT)
+        blocks = list(stream._aligned_ranges())  # pylint: disable=protected-access
+
+        assert blocks[0] == range(100, ALIGNMENT)
+        assert all(block.start % ALIGNMENT == 0 for block in blocks[1:])
+        assert blocks[-1].stop == len(CONTENT)
+
+    def test_buffer_size_rounding(self, path: str) -> None:
+        assert MultipartFileStream("files[]", path, buffer_size=1).buffer_size == ALIGNMENT
+        stream = MultipartFileStream("files[]", path, buffer_size=ALIGNMENT + 1)
+        assert stream.buffer_size == 2 * ALIGNMENT
+
+    def test_headers(self, path: str) -> None:
+        stream = MultipartFileStream("files[]", path, content_type="application/octet-stream")
+        with open(path, "rb") as f:
+            encoder = MultipartEncoder(
+                fields={"files[]": ("slide.tif", f, "application/octet-stream")},
+                boundary=stream.boundary,
+            )
+            expected = encoder.to_string()
+
+        assert b"".join(bytes(block) for block in stream) == expected
+
+    def test_progress(self, path: str) -> None:
+        progress: List[Tuple[int, int]] = []
+        stream = MultipartFileStream(
+            "files[]",
+            path,
+            buffer_size=ALIGNMENT,
+            progress=lambda sent, total: progress.append((sent, total)),
+        )
+        list(stream)
+
+        assert [sent for sent, _ in progress] == sorted(sent for sent, _ in progress)
+        assert progress[-1] == (len(stream), len(stream))
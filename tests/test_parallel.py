@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+# pylint: disable=unused-argument
+
+import threading
+from typing import Any, Dict, Iterator, List
+
+import pytest
+import requests  # type: ignore
+
+from cytomine.cytomine import Cytomine
+from cytomine.models._utilities import parallel
+from cytomine.models._utilities.parallel import (
+    generic_chunk_parallel,
+    generic_download,
+    generic_parallel,
+    generic_parallel_stream,
+)
+
+
+@pytest.fixture(name="client_options")
+def fixture_client_options() -> Dict[str, Any]:
+    return {"max_workers": 4}
+
+
+class TestGenericParallel:
+    def test_without_client(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(parallel, "_get_client", lambda: None)
+        data: List[Any] = [1, None, 2, 3]
+        results = generic_parallel(data, lambda x: x * 2, n_workers=2)
+
+        assert sorted(results) == [(1, 2), (2, 4), (3, 6)]
+
+    def test_reuses_client_pool(self, stand_in_client: Cytomine) -> None:
+        names: List[str] = []
+
+        def worker(item: int) -> int:
+            names.append(threading.current_thread().name)
+            return item
+
+        for _ in range(3):
+            generic_parallel(range(20), worker)
+
+        assert len(set(names)) <= stand_in_client.max_workers
+
+    def test_bounded_in_flight(self, stand_in_client: Cytomine) -> None:
+        lock = threading.Lock()
+        counters = {"current": 0, "max": 0}
+
+        def worker(item: Any) -> Any:
+            with lock:
+                counters["current"] += 1
+                counters["max"] = max(counters["max"], counters["current"])
+            threading.Event().wait(0.01)
+            with lock:
+                counters["current"] -= 1
+            return item
+
+        generic_parallel(range(12), worker, n_workers=2)
+
+        assert counters["max"] <= 2
+
+    def test_nested_call(self, stand_in_client: Cytomine) -> None:
+        def worker(item: int) -> int:
+            return sum(x for x, _ in generic_parallel(range(item), abs))
+
+        results = generic_parallel(range(10), worker)
+
+        assert sorted(results) == [(i, sum(range(i))) for i in range(10)]
+
+    def test_chunks(self, stand_in_client: Cytomine) -> None:
+        data = list(range(8))
+        results = generic_chunk_parallel(data, len, chunk_size=4)
+
+        assert sorted(results) == [((0, 4), 4), ((4, 8), 4)]
+
+
+class TestGenericParallelStream:
+    def test_lazy_generator(self, stand_in_client: Cytomine) -> None:
+        pulled = []
+
+        def generate() -> Iterator[int]:
+            for i in range(1000):
+                pulled.append(i)
+                yield i
+
+        stream = generic_parallel_stream(generate(), abs, n_workers=3)
+        first = [next(stream) for _ in range(5)]
+        stream.close()
+
+        assert len(first) == 5
+        assert len(pulled) <= 5 + 3
+
+    def test_ordered(self, stand_in_client: Cytomine) -> None:
+        def worker(item: int) -> int:
+            threading.Event().wait(0.001 * (item % 3))
+            return item
+
+        results = list(generic_parallel_stream(range(30), worker, ordered=True))
+
+        assert results == [(i, i) for i in range(30)]
+
+    def test_worker_error(self, stand_in_client: Cytomine) -> None:
+        def worker(item: int) -> int:
+            if item == 3:
+                raise ValueError("boom")
+            return item
+
+        with pytest.raises(ValueError):
+            list(generic_parallel_stream(range(10), worker, ordered=True))
+
+
+def test_download_errors(stand_in_client: Cytomine) -> None:
+    def download(item: int) -> int:
+        if item == 3:
+            raise requests.exceptions.ConnectionError("retries exhausted")
+        return item
+
+    results = generic_download(range(5), download)
+
+    assert sorted(results) == [(0, 0), (1, 1), (2, 2), (3, None), (4, 4)]
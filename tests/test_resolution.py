@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# pylint: disable=unused-argument
+
+from typing import Optional
+
+import pytest
+
+from cytomine.cytomine import Cytomine
+from cytomine.models import ImageInstance
+from tests.conftest import StandInServer
+
+
+def image(zoom: Optional[int] = 8) -> ImageInstance:
+    return ImageInstance(
+        id=1,
+        width=100000,
+        height=80000,
+        zoom=zoom,
+        magnification=40,
+        physicalSizeX=0.25,
+    )
+
+
+@pytest.mark.parametrize(
+    "magnification, resolution, expected",
+    [
+        (40, None, (2000, 8)),
+        (10, None, (500, 6)),
+        (15, None, (750, 7)),  # read at 20x, then downsampled
+        (80, None, (2000, 8)),  # no upsampling
+        (0.01, None, (1, 0)),  # lowest resolution level
+        (None, 1.0, (500, 6)),
+        (None, 0.7, (714, 7)),
+    ],
+)
+def test_window_scale(
+    magnification: Optional[float],
+    resolution: Optional[float],
+    expected: tuple,
+) -> None:
+    assert image().window_scale(2000, 1000, magnification, resolution) == expected
+
+
+def test_window_scale_without_pyramid() -> None:
+    assert image(zoom=None).window_scale(2000, 1000, magnification=10) == (500, None)
+
+
+def test_window_scale_errors() -> None:
+    with pytest.raises(ValueError):
+        image().window_scale(2000, 1000)
+    with pytest.raises(ValueError):
+        image().window_scale(2000, 1000, magnification=10, resolution=1.0)
+    with pytest.raises(ValueError):
+        ImageInstance(id=1, zoom=8).window_scale(2000, 1000, magnification=10)
+    with pytest.raises(ValueError):
+        image().window_content(0, 0, 2000, 1000, magnification=10, max_size=512)
+
+
+def test_window_at_magnification(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    stand_in.route_file("/api/imageinstance/1/window-0-0-2000-1000.jpg", b"window")
+
+    assert image().window_content(0, 0, 2000, 1000, magnification=10) == b"window"
+
+    _, _, query = stand_in.requests[-1]
+    assert query["zoom"] == "6" and query["maxSize"] == "500"
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# pylint: disable=unused-argument
+
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+import pytest
+import requests
+
+from cytomine.cytomine import Cytomine
+from cytomine.models import Project
+from cytomine.retry import CircuitBreaker, CircuitOpenError, RetryBudget, RetryPolicy
+from tests.conftest import StandInServer
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+@pytest.fixture(name="sleeps")
+def fixture_sleeps(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    delays: List[float] = []
+    monkeypatch.setattr(time, "sleep", delays.append)
+    return delays
+
+
+def serve_failures(
+    server: StandInServer,
+    method: str,
+    path: str,
+    failures: List[Response],
+) -> None:
+    def respond(query: Dict[str, str], handler: Any) -> Response:
+        if failures:
+            return failures.pop(0)
+        return 200, {"Content-Type": "application/json"}, b'{"id": 1}'
+
+    server.route(method, path, respond)
+
+
+class TestRetryPolicy:
+    def test_method_retries(self) -> None:
+        policy = RetryPolicy(method_retries={"post": 2})
+
+        assert policy.retries("GET") == 3
+        assert policy.retries("POST") == 2
+        assert policy.retries("DELETE") == 0
+        assert RetryPolicy.disabled().retries("GET") == 0
+
+    def test_backoff(self) -> None:
+        policy = RetryPolicy(backoff_factor=0.5, backoff_max=3, jitter=False)
+        assert [policy.backoff(attempt) for attempt in range(5)] == [0.5, 1, 2, 3, 3]
+
+        policy = RetryPolicy(backoff_factor=0.5, backoff_max=3)
+        assert all(0 <= policy.backoff(attempt) <= 3 for attempt in range(10))
+
+    def test_retry_after(self) -> None:
+        policy = RetryPolicy()
+        response = requests.Response()
+        assert policy.retry_after(response) is None
+
+        response.headers["Retry-After"] = "3"
+        assert policy.retry_after(response) == 3.0
+
+        response.headers["Retry-After"] = "Thu, 01 Jan 1970 00:00:00 GMT"
+        assert policy.retry_after(response) == 0.0
+
+    def test_budget(self) -> None:
+        budget = RetryBudget(ratio=0.5, min_per_second=0, max_tokens=2)
+
+        assert budget.withdraw() and budget.withdraw()
+        assert not budget.withdraw()
+        budget.deposit()
+        assert not budget.withdraw()
+        budget.deposit()
+        assert budget.withdraw()
+
+    def test_circuit_breaker(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        now = [0.0]
+        monkeypatch.setattr(time, "monotonic", lambda: now[0])
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.is_open and not breaker.allow()
+
+        now[0] = 10.0
+        assert breaker.allow()  # a single probe
+        assert not breaker.allow()
+        breaker.record_failure()
+        now[0] = 15.0
+        assert not breaker.allow()
+
+        now[0] = 20.0
+        assert breaker.allow()
+        breaker.record_success()
+        assert not breaker.is_open and breaker.allow() and breaker.allow()
+
+
+class TestClientRetry:
+    def test_server_errors(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        sleeps: List[float],
+    ) -> None:
+        serve_failures(stand_in, "GET", "/api/project/1.json", [(503, {}, b""), (502, {}, b"")])
+
+        assert stand_in_client.get("project/1.json") == {"id": 1}
+        assert stand_in.count("GET", "/api/project/1.json") == 3
+        assert len(sleeps) == 2
+
+    def test_retry_after(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        sleeps: List[float],
+    ) -> None:
+        serve_failures(
+            stand_in,
+            "GET",
+            "/api/project/1.json",
+            [(429, {"Retry-After": "2"}, b""), (429, {"Retry-After": "3600"}, b"")],
+        )
+
+        assert stand_in_client.get("project/1.json") is False
+        assert sleeps == [2.0]
+        assert stand_in.count("GET", "/api/project/1.json") == 2
+
+    def test_exhausted_retries(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        sleeps: List[float],
+    ) -> None:
+        serve_failures(stand_in, "GET", "/api/project/1.json", [(500, {}, b"")] * 10)
+
+        assert stand_in_client.get("project/1.json") is False
+        assert stand_in.count("GET", "/api/project/1.json") == 4
+
+    def test_not_idempotent(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        sleeps: List[float],
+    ) -> None:
+        serve_failures(stand_in, "POST", "/api/project.json", [(503, {}, b"")])
+
+        assert stand_in_client.post("project.json", "{}") is False
+        assert stand_in.count("POST", "/api/project.json") == 1
+
+    def test_download(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        sleeps: List[float],
+        tmp_path: Any,
+    ) -> None:
+        serve_failures(stand_in, "GET", "/api/image/1/download", [(503, {}, b"")])
+        destination = os.path.join(tmp_path, "image")
+
+        assert stand_in_client.download_file("image/1/download", destination)
+        with open(destination, "rb") as f:
+            assert f.read() == b'{"id": 1}'
+
+    def test_upload_file(
+        self,
+        stand_in: StandInServer,
+        sleeps: List[float],
+        tmp_path: Any,
+    ) -> None:
+        def unavailable(query: Dict[str, str], handler: Any) -> Response:
+            handler.rfile.read(int(handler.headers["Content-Length"]))
+            return 503, {}, b""
+
+        stand_in.route("POST", "/api/attachedfile.json", unavailable)
+        path = os.path.join(tmp_path, "file.txt")
+        with open(path, "wb") as f:
+            f.write(b"content")
+
+        with Cytomine(
+            stand_in.url,
+            "public",
+            "private",
+            use_cache=False,
+            configure_logging=False,
+            retry_policy=RetryPolicy(method_retries={"post": 3}, failure_threshold=2),
+        ) as client:
+            assert client.upload_file(Project(), path, uri="attachedfile.json") is False
+            assert stand_in.count("POST", "/api/attachedfile.json") == 1  # not retried
+
+            assert client.upload_file(Project(), path, uri="attachedfile.json") is False
+            with pytest.raises(CircuitOpenError):
+                client.upload_file(Project(), path, uri="attachedfile.json")
+            assert stand_in.count("POST", "/api/attachedfile.json") == 2
+
+    def test_circuit_breaker(self, stand_in: StandInServer, sleeps: List[float]) -> None:
+        with Cytomine(
+            stand_in.url,
+            "public",
+            "private",
+            use_cache=False,
+            configure_logging=False,
+            keep_alive=False,
+            retry_policy=RetryPolicy(failure_threshold=3),
+        ) as client:
+            stand_in.stop()
+
+            with pytest.raises(requests.exceptions.ConnectionError) as error:
+                client.get("project/1.json")
+            assert not isinstance(error.value, CircuitOpenError)
+            assert len(sleeps) == 2  # the circuit opens on the third failure
+
+            with pytest.raises(CircuitOpenError):
+                client.get("project/1.json")
+            assert len(sleeps) == 2
+            assert not client.is_alive()
+
+    def test_failing_resource(self, stand_in: StandInServer, sleeps: List[float]) -> None:
+        serve_failures(stand_in, "GET", "/api/project/2.json", [(500, {}, b"")] * 20)
+        serve_failures(stand_in, "GET", "/api/project/1.json", [])
+
+        with Cytomine(
+            stand_in.url,
+            "public",
+            "private",
+            use_cache=False,
+            configure_logging=False,
+            retry_policy=RetryPolicy(failure_threshold=3),
+        ) as client:
+            assert client.get("project/2.json") is False
+            assert client.get("project/2.json") is False
+            assert client.get("project/1.json") == {"id": 1}
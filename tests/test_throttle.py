@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# pylint: disable=unused-argument
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from cytomine.cytomine import Cytomine
+from cytomine.retry import RetryPolicy
+from cytomine.throttle import RequestLimiter, TokenBucket
+from tests.conftest import StandInServer, file_response
+
+
+class ConcurrencyProbe:
+    def __init__(self) -> None:
+        self.current = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+        with self._lock:
+            self.current += 1
+            self.max = max(self.max, self.current)
+        time.sleep(0.02)
+        with self._lock:
+            self.current -= 1
+        return 200, {"Content-Type": "application/json"}, b'{"id": 1}'
+
+
+class TestTokenBucket:
+    def test_reserve(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        now = [0.0]
+        monkeypatch.setattr(time, "monotonic", lambda: now[0])
+        bucket = TokenBucket(rate=10, burst=2)
+
+        assert [bucket.reserve() for _ in range(4)] == pytest.approx([0, 0, 0.1, 0.2])
+        now[0] = 1.0
+        assert bucket.reserve() == 0
+
+    def test_invalid_rate(self) -> None:
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestRequestLimiter:
+    def test_max_in_flight(self) -> None:
+        limiter = RequestLimiter(max_in_flight=2)
+        probe = ConcurrencyProbe()
+
+        def request(_: Any) -> None:
+            with limiter:
+                probe({}, None)
+
+        with ThreadPoolExecutor(6) as executor:
+            list(executor.map(request, range(12)))
+
+        assert probe.max == 2
+        assert limiter.in_flight == 0
+
+    def test_unlimited(self) -> None:
+        with RequestLimiter() as limiter:
+            assert limiter.in_flight == 1
+
+
+class TestClientLimits:
+    def test_image_limiter(self, stand_in: StandInServer, tmp_path: Any) -> None:
+        probe = ConcurrencyProbe()
+        stand_in.route("GET", "/api/image/1/download", probe)
+
+        with Cytomine(
+            stand_in.url,
+            "public",
+            "private",
+            use_cache=False,
+            configure_logging=False,
+            image_limiter=RequestLimiter(max_in_flight=2),
+        ) as client:
+            with ThreadPoolExecutor(8) as executor:
+                downloads = executor.map(
+                    lambda i: client.download_file(
+                        "image/1/download",
+                        os.path.join(tmp_path, str(i)),
+                    ),
+                    range(16),
+                )
+                assert all(downloads)
+
+        assert probe.max == 2
+
+    def test_api_limiter(self, stand_in: StandInServer) -> None:
+        stand_in.route_json("GET", "/api/project/1.json", {"id": 1})
+
+        with Cytomine(
+            stand_in.url,
+            "public",
+            "private",
+            use_cache=False,
+            configure_logging=False,
+            api_limiter=RequestLimiter(rate=50, burst=1),
+        ) as client:
+            assert client.limiter("api").rate == 50
+            start = time.monotonic()
+            for _ in range(10):
+                client.get("project/1.json")
+            assert time.monotonic() - start >= 0.15
+
+    def test_image_slot_released_before_retries(
+        self,
+        stand_in: StandInServer,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Any,
+    ) -> None:
+        failures = [1]
+
+        def unavailable(query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+            if failures[0] > 0:
+                failures[0] -= 1
+                return 503, {}, b""
+            return file_response(b"image", handler)
+
+        stand_in.route("GET", "/api/image/1/download", unavailable)
+
+        with Cytomine(
+            stand_in.url,
+            "public",
+            "private",
+            use_cache=False,
+            configure_logging=False,
+            image_limiter=RequestLimiter(max_in_flight=1),
+            retry_policy=RetryPolicy(backoff_factor=0, jitter=False),
+        ) as client:
+            limiter = client.limiter("image")
+            in_flight: List[int] = []
+            monkeypatch.setattr(time, "sleep", lambda _: in_flight.append(limiter.in_flight))
+
+            assert client.download_content("image/1/download") == b"image"
+            failures[0] = 1
+            assert client.download_file("image/1/download", os.path.join(tmp_path, "image"))
+
+        assert in_flight == [0, 0]
+        assert limiter.in_flight == 0
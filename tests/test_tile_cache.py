@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# pylint: disable=unused-argument
+
+import os
+from typing import Any, Dict
+
+import pytest
+
+from cytomine.cytomine import Cytomine
+from cytomine.models import Annotation, AnnotationCollection, ImageInstance
+from cytomine.retry import RetryPolicy
+from cytomine import tile_cache
+from cytomine.tile_cache import TileCache, cacheable, persistent
+from tests.conftest import StandInServer
+
+WINDOW = "/api/imageinstance/1/window-0-0-256-256.jpg"
+
+
+@pytest.fixture(name="cache")
+def fixture_cache(tmp_path: str) -> TileCache:
+    return TileCache(memory_size=1000, directory=str(tmp_path), disk_size=3000)
+
+
+@pytest.fixture(name="client_options")
+def fixture_client_options(cache: TileCache) -> Dict[str, Any]:
+    return {"retry_policy": RetryPolicy.disabled(), "tile_cache": cache}
+
+
+def test_cacheable() -> None:
+    assert cacheable(f"http://host{WINDOW}")
+    assert cacheable("http://host/api/imageinstance/1/thumb.png")
+    assert cacheable("http://host/api/userannotation/2/alphamask.png?zoom=1")
+    assert not cacheable("http://host/api/abstractimage/1/download")
+    assert not cacheable("http://host/api/imageinstance/1.json")
+
+
+def test_persistent() -> None:
+    assert persistent(f"http://host{WINDOW}", {"zoom": 1, "terms": None})
+    assert persistent("http://host/api/imageinstance/1/thumb.png")
+    assert not persistent(f"http://host{WINDOW}", {"annotations": "1,2"})
+    assert not persistent(f"http://host{WINDOW}", {"alphaMask": "true", "terms": "3"})
+    assert not persistent("http://host/api/userannotation/2/crop.png")
+    assert not persistent("http://host/api/userannotation/2/mask.png")
+    assert not persistent("http://host/api/abstractimage/1/download")
+
+
+def test_key() -> None:
+    key = TileCache.key(WINDOW, {"bits": 8, "zoom": 1, "mask": None})
+
+    assert key == TileCache.key(WINDOW, {"zoom": 1, "bits": 8})
+    assert key != TileCache.key(WINDOW, {"zoom": 2, "bits": 8})
+    assert key != TileCache.key(WINDOW, {"zoom": 1, "bits": 8, "alphaMask": "true"})
+    assert key != TileCache.key(WINDOW.replace("jpg", "png"), {"zoom": 1, "bits": 8})
+
+
+def test_memory_lru() -> None:
+    cache = TileCache(memory_size=1000)
+    for key in "abc":
+        cache.put(key, key.encode("utf-8") * 400)
+    cache.put("d", b"d" * 2000)  # larger than the memory tier
+
+    assert cache.get("a") is None
+    assert cache.get("b") == b"b" * 400
+    cache.put("e", b"e" * 400)
+    assert cache.get("c") is None
+    assert cache.get("b") is not None and cache.get("d") is None
+
+    statistics = cache.statistics()
+    assert statistics["memory_hits"] == 2 and statistics["misses"] == 3
+    assert statistics["evictions"] == 2 and statistics["memory_bytes"] == 800
+    assert statistics["hit_rate"] == pytest.approx(0.4)
+
+
+def test_disk_tier(cache: TileCache, tmp_path: str) -> None:
+    for key in ("a" * 64, "b" * 64, "c" * 64, "d" * 64):
+        cache.put(key, key[:1].encode("utf-8") * 900)
+
+    assert sorted(os.listdir(tmp_path)) == ["b" * 64, "c" * 64, "d" * 64]
+    cache.clear()
+    assert cache.get("b" * 64) == b"b" * 900
+    assert cache.statistics()["disk_hits"] == 1
+    assert cache.get("b" * 64) is not None
+    assert cache.statistics()["memory_hits"] == 1
+
+    # Indexed again by a new cache, "b" being the most recently used
+    reopened = TileCache(memory_size=1000, directory=str(tmp_path), disk_size=2000)
+    assert sorted(os.listdir(tmp_path)) == ["b" * 64, "d" * 64]
+    os.remove(os.path.join(tmp_path, "d" * 64))
+    assert reopened.get("d" * 64) is None
+    assert reopened.statistics()["disk_items"] == 1
+
+
+def test_memory_only(cache: TileCache, tmp_path: str) -> None:
+    cache.put("a" * 64, b"a" * 100, on_disk=False)
+
+    assert not os.listdir(tmp_path)
+    assert cache.get("a" * 64) == b"a" * 100
+
+
+def test_concurrent_eviction(
+    cache: TileCache,
+    tmp_path: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    for key in ("a" * 64, "b" * 64, "c" * 64):
+        cache.put(key, key[:1].encode("utf-8") * 900)
+
+    def removed_by_another_process(path: str) -> None:
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(tile_cache.os, "remove", removed_by_another_process)
+    reopened = TileCache(memory_size=1000, directory=str(tmp_path), disk_size=1000)
+    reopened.put("d" * 64, b"d" * 900)
+
+    assert reopened.statistics()["disk_items"] == 1
+
+
+def test_client_uses_the_cache(
+    stand_in_client: Cytomine,
+    stand_in: StandInServer,
+    cache: TileCache,
+    tmp_path: str,
+) -> None:
+    stand_in.route_file(WINDOW, b"window")
+    image = ImageInstance(id=1)
+    destination = os.path.join(tmp_path, "out", "window.jpg")
+
+    assert image.window_content(0, 0, 256, 256) == b"window"
+    assert image.window_content(0, 0, 256, 256) == b"window"
+    assert image.window(0, 0, 256, 256, dest_pattern=destination)
+    assert image.window_content(0, 0, 256, 256, bits=16) == b"window"
+
+    with open(destination, "rb") as f:
+        assert f.read() == b"window"
+    assert stand_in.count("GET", WINDOW) == 2
+    assert cache.statistics()["memory_hits"] == 2 and cache.statistics()["misses"] == 2
+
+
+def test_failures_are_not_cached(
+    stand_in_client: Cytomine,
+    stand_in: StandInServer,
+    cache: TileCache,
+) -> None:
+    image = ImageInstance(id=1)
+
+    assert image.window_content(0, 0, 256, 256) is None
+    assert image.window_content(0, 0, 256, 256) is None
+    assert stand_in.count("GET", WINDOW) == 2
+    assert cache.statistics()["memory_items"] == 0
+
+
+def test_crop_connection_errors(
+    stand_in_client: Cytomine,
+    stand_in: StandInServer,
+    tmp_path: str,
+) -> None:
+    crop = "/api/userannotation/1/crop.png"
+    stand_in.route_file(crop, b"crop")
+    annotations = AnnotationCollection()
+    annotations.append(Annotation(id=1, cropURL=f"{stand_in.url}{crop}"))
+    # Nothing listens on port 1: the connection is refused
+    annotations.append(Annotation(id=2, cropURL="http://127.0.0.1:1/api/userannotation/2/crop.png"))
+
+    dumped = annotations.dump_crops(os.path.join(tmp_path, "{id}.png"))
+
+    assert [annotation.id for annotation in dumped] == [1]
+
+
+def test_crops_are_not_persisted(
+    stand_in_client: Cytomine,
+    stand_in: StandInServer,
+    cache: TileCache,
+    tmp_path: str,
+) -> None:
+    crop = "/api/userannotation/1/crop.jpg"
+    stand_in.route_file(crop, b"crop")
+    annotation = Annotation(id=1, cropURL=f"{stand_in.url}{crop}")
+
+    assert annotation.dump_content() == b"crop"
+    assert annotation.dump_content() == b"crop"
+
+    assert stand_in.count("GET", crop) == 1
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+# pylint: disable=unused-argument
+
+import threading
+from io import BytesIO
+from typing import Any, Dict, Tuple
+
+import pytest
+
+from cytomine.cytomine import Cytomine
+from cytomine.models import ImageInstance
+from cytomine.retry import RetryPolicy
+from cytomine.utilities.tiling import Tile, iter_tiles, tile_grid
+from tests.conftest import StandInServer
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+@pytest.fixture(name="client_options")
+def fixture_client_options() -> Dict[str, Any]:
+    return {"retry_policy": RetryPolicy.disabled()}
+
+
+def window_path(tile: Tile) -> str:
+    return f"/api/imageinstance/1/window-{tile.x}-{tile.y}-{tile.width}-{tile.height}.png"
+
+
+def png(tile: Tile) -> bytes:
+    image_module = pytest.importorskip("PIL.Image")
+    image = image_module.new("L", tile.output_size, color=tile.row * 16 + tile.col)
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def route_tiles(stand_in: StandInServer, tiles: Any, delays: Dict[int, float]) -> None:
+    def route(index: int, tile: Tile) -> None:
+        body = png(tile)
+
+        def fn(query: Dict[str, str], handler: Any) -> Response:
+            threading.Event().wait(delays.get(index, 0))
+            return 200, {"Content-Type": "image/png"}, body
+
+        stand_in.route("GET", window_path(tile), fn)
+
+    for index, tile in enumerate(tiles):
+        route(index, tile)
+
+
+def test_tile_grid_covers_the_image() -> None:
+    tiles = tile_grid(1000, 600, tile_size=512)
+
+    assert [(t.col, t.row) for t in tiles] == [(0, 0), (1, 0), (0, 1), (1, 1)]
+    assert [t.region for t in tiles] == [
+        (0, 0, 512, 512),
+        (512, 0, 488, 512),
+        (0, 512, 512, 88),
+        (512, 512, 488, 88),
+    ]
+
+
+def test_tile_grid_overlap_reaches_the_end() -> None:
+    tiles = tile_grid(1000, 100, tile_size=400, overlap=100)
+
+    assert [(t.x, t.width) for t in tiles] == [(0, 400), (300, 400), (600, 400)]
+
+    tiles = tile_grid(1001, 100, tile_size=400, overlap=100)
+
+    assert [(t.x, t.width) for t in tiles] == [(0, 400), (300, 400), (600, 400), (900, 101)]
+
+
+def test_tile_grid_zoom_and_roi() -> None:
+    tiles = tile_grid(10000, 10000, tile_size=256, zoom=2, roi=(9000, 100, 2000, 1024))
+
+    assert [t.region for t in tiles] == [(9000, 100, 1000, 1024)]
+    assert tiles[0].output_size == (250, 256)
+    assert not tile_grid(100, 100, roi=(200, 0, 10, 10))
+
+
+@pytest.mark.parametrize("overlap", [-1, 512])
+def test_tile_grid_invalid_overlap(overlap: int) -> None:
+    with pytest.raises(ValueError):
+        tile_grid(1000, 1000, tile_size=512, overlap=overlap)
+
+
+def test_iter_tiles_in_scan_order(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    image = ImageInstance(id=1, width=700, height=600)
+    tiles = tile_grid(700, 600, tile_size=256, zoom=1)
+    # The first tiles are the slowest
+    route_tiles(stand_in, tiles, {0: 0.2, 1: 0.1})
+
+    result = list(iter_tiles(image, 256, zoom=1, format="png", n_workers=4))
+
+    assert [(t.col, t.row) for t in result] == [(t.col, t.row) for t in tiles]
+    assert all(t.data == png(t) for t in result)
+    sizes = {query["maxSize"] for _, path, query in stand_in.requests if "window" in path}
+    assert sizes == {"256", "94"}
+
+
+def test_iter_tiles_unordered(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    image = ImageInstance(id=1, width=600, height=256)
+    tiles = tile_grid(600, 256, tile_size=256)
+    route_tiles(stand_in, tiles, {0: 0.3})
+
+    result = list(iter_tiles(image, 256, format="png", ordered=False))
+
+    assert len(result) == 3
+    assert result[-1].col == 0
+
+
+def test_iter_tiles_failures(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    image = ImageInstance(id=1, width=600, height=256)
+    tiles = tile_grid(600, 256, tile_size=256)
+    route_tiles(stand_in, tiles[:2], {})
+
+    result = list(iter_tiles(image, 256, format="png"))
+
+    assert [t.data is None for t in result] == [False, False, True]
+    query = stand_in.requests[-1][2]
+    assert "zoom" not in query and "maxSize" not in query
+
+
+def test_iter_tiles_decoded_and_padded(stand_in_client: Cytomine, stand_in: StandInServer) -> None:
+    pytest.importorskip("numpy")
+    image = ImageInstance(id=1, width=300, height=200)
+    tiles = tile_grid(300, 200, tile_size=256)
+    route_tiles(stand_in, tiles, {})
+
+    result = list(iter_tiles(image, 256, format="png", decode=True, pad=True, pad_value=255))
+
+    array = result[1].data
+    assert array.shape == (256, 256)
+    assert array[0, 0] == 1 and array[0, 43] == 1 and array[0, 44] == 255 and array[200, 0] == 255
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+# * Copyright (c) 2009-2024. Authors: see NOTICE file.
+# *
+# * Licensed under the Apache License, Version 2.0 (the "License");
+# * you may not use this file except in compliance with the License.
+# * You may obtain a copy of the License at
+# *
+# *      http://www.apache.org/licenses/LICENSE-2.0
+# *
+# * Unless required by applicable law or agreed to in writing, software
+# * distributed under the License is distributed on an "AS IS" BASIS,
+# * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# * See the License for the specific language governing permissions and
+# * limitations under the License.
+
+
+
+# pylint: disable=unused-argument
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pytest
+from requests_toolbelt.multipart.decoder import MultipartDecoder
+
+from cytomine.cytomine import Cytomine
+from cytomine.download import TransferCheckpoint, content_range
+from cytomine.models import UploadedFile
+from tests.conftest import StandInServer
+
+CONTENT = os.urandom(100_000)
+UPLOAD_RESPONSE = json.dumps(
+    [{"uploadedFile": {"id": 5, "originalFilename": "slide.tif"}, "images": []}]
+).encode("utf-8")
+
+
+@pytest.fixture(autouse=True)
+def fixture_sleeps(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(time, "sleep", lambda delay: None)
+
+
+@pytest.fixture(name="checkpoints")
+def fixture_checkpoints(tmp_path: Any) -> str:
+    return os.path.join(tmp_path, "checkpoints")
+
+
+@pytest.fixture(name="slide")
+def fixture_slide(tmp_path: Any) -> str:
+    path = os.path.join(tmp_path, "slide.tif")
+    with open(path, "wb") as f:
+        f.write(CONTENT)
+    return path
+
+
+class ChunkReceiver:
+    """Stand-in of the upload endpoint writing the chunks at the offset of their
+    Content-Range. Chunks starting at an offset of `failing` fail while it is set."""
+
+    def __init__(self, failing: Optional[Set[int]] = None, failures: int = -1) -> None:
+        self.content = bytearray()
+        self.ranges: List[Tuple[int, int]] = []
+        self.failing = failing or set()
+        self.failures = failures
+        self._lock = threading.Lock()
+
+    def __call__(self, query: Dict[str, str], handler: Any) -> Tuple[int, Dict[str, str], bytes]:
+        body = handler.rfile.read(int(handler.headers["Content-Length"]))
+        part = MultipartDecoder(body, handler.headers["Content-Type"]).parts[0]
+        bounds = content_range(handler.headers.get("Content-Range"))
+        if bounds is None:
+            self.content = bytearray(part.content)
+            return 200, {}, UPLOAD_RESPONSE
+
+        start, last, total = bounds
+        with self._lock:
+            if start in self.failing and self.failures != 0:
+                self.failures -= 1
+                return 503, {}, b""
+            self.ranges.append((start, last + 1))
+            if len(self.content) < start:
+                self.content.extend(b"\0" * (start - len(self.content)))
+            self.content[start : last + 1] = part.content
+        return 200, {}, UPLOAD_RESPONSE if last + 1 == total else b"[]"
+
+
+class TestChunkedUpload:
+    @pytest.fixture(name="client_options")
+    def fixture_client_options(self, checkpoints: str) -> Dict[str, Any]:
+        return {"chunked_uploads": True, "upload_checkpoints": checkpoints}
+
+    def test_single_request(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        slide: str,
+    ) -> None:
+        receiver = ChunkReceiver()
+        stand_in.route("POST", "/upload", receiver)
+        progress: List[Tuple[int, int]] = []
+
+        uploaded = stand_in_client.upload_image(
+            slide,
+            1,
+            progress=lambda sent, total: progress.append((sent, total)),
+        )
+
+        assert isinstance(uploaded, UploadedFile)
+        assert uploaded.id == 5
+        assert receiver.content == CONTENT
+        assert progress[-1][0] == progress[-1][1] > len(CONTENT)
+
+    @pytest.mark.parametrize("n_workers", (1, 4))
+    def test_chunks(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        slide: str,
+        checkpoints: str,
+        n_workers: int,
+    ) -> None:
+        receiver = ChunkReceiver()
+        stand_in.route("POST", "/upload", receiver)
+        progress: List[int] = []
+
+        uploaded = stand_in_client.upload_image(
+            slide,
+            1,
+            chunk_size=2**14,
+            n_workers=n_workers,
+            progress=lambda sent, total: progress.append(sent),
+        )
+
+        assert isinstance(uploaded, UploadedFile)
+        assert uploaded.id == 5
+        assert receiver.content == CONTENT
+        assert len(receiver.ranges) == 7
+        assert receiver.ranges[-1] == (6 * 2**14, len(CONTENT))
+        assert progress == sorted(progress)
+        assert progress[0] == 0 and progress[-1] == len(CONTENT)
+        assert not os.path.exists(checkpoints) or not os.listdir(checkpoints)
+
+    def test_chunk_retry(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        slide: str,
+    ) -> None:
+        receiver = ChunkReceiver(failing={2**14}, failures=2)
+        stand_in.route("POST", "/upload", receiver)
+
+        uploaded = stand_in_client.upload_image(slide, 1, chunk_size=2**14, n_workers=2)
+
+        assert isinstance(uploaded, UploadedFile)
+        assert receiver.content == CONTENT
+        assert stand_in.count("POST", "/upload") == 9
+
+    def test_resume(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        slide: str,
+        checkpoints: str,
+    ) -> None:
+        receiver = ChunkReceiver(failing={2 * 2**14})
+        stand_in.route("POST", "/upload", receiver)
+
+        assert not stand_in_client.upload_image(slide, 1, chunk_size=2**14, retries=1)
+        assert len(os.listdir(checkpoints)) == 1
+        assert sorted(os.listdir(os.path.dirname(slide))) == ["checkpoints", "slide.tif"]
+        assert (6 * 2**14, len(CONTENT)) not in receiver.ranges
+
+        receiver.failing.clear()
+        receiver.ranges.clear()
+        uploaded = stand_in_client.upload_image(slide, 1, chunk_size=2**14)
+
+        assert isinstance(uploaded, UploadedFile)
+        assert receiver.content == CONTENT
+        assert (0, 2**14) not in receiver.ranges
+        assert receiver.ranges[-1] == (6 * 2**14, len(CONTENT))
+        assert not os.listdir(checkpoints)
+
+    def test_acknowledged_checkpoint(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        slide: str,
+        checkpoints: str,
+    ) -> None:
+        receiver = ChunkReceiver(failing={2 * 2**14})
+        stand_in.route("POST", "/upload", receiver)
+        assert not stand_in_client.upload_image(slide, 1, chunk_size=2**14, retries=0)
+
+        # Interrupted after the last chunk was acknowledged, before removing the checkpoint
+        path = os.path.join(checkpoints, os.listdir(checkpoints)[0])
+        with open(path, encoding="utf-8") as f:
+            checkpoint = TransferCheckpoint.load(path, json.load(f)["key"])
+        assert checkpoint is not None
+        checkpoint.add(0, len(CONTENT))
+        checkpoint.save()
+
+        receiver.failing.clear()
+        receiver.ranges.clear()
+        uploaded = stand_in_client.upload_image(slide, 1, chunk_size=2**14)
+
+        assert isinstance(uploaded, UploadedFile)
+        assert len(receiver.ranges) == 7
+        assert receiver.ranges[-1] == (6 * 2**14, len(CONTENT))
+
+    def test_empty_file(
+        self,
+        stand_in: StandInServer,
+        stand_in_client: Cytomine,
+        tmp_path: Any,
+    ) -> None:
+        receiver = ChunkReceiver()
+        stand_in.route("POST", "/upload", receiver)
+        empty = os.path.join(tmp_path, "empty.tif")
+        with open(empty, "wb"):
+            pass
+
+        assert stand_in_client.upload_image(empty, 1, chunk_size=2**14)
+        assert receiver.content == b""
+        assert not receiver.ranges
+
+
+def test_chunks_not_supported(stand_in_client: Cytomine, slide: str) -> None:
+    with pytest.raises(ValueError):
+        stand_in_client.upload_image(slide, 1, chunk_size=2**14)